@@ -1,5 +1,6 @@
 import pandas as pd
 from database_connection import get_database_connection
+from utils.memoria import carregar_csv_compacto, csv_cabe_no_orcamento, linhas_por_bloco
 import warnings
 
 warnings.filterwarnings('ignore')
@@ -8,8 +9,13 @@ print("="*60)
 print("VALIDAÇÃO E VERIFICAÇÃO DOS DADOS LIMPOS")
 print("="*60)
 
-# Carregar dados limpos
-df = pd.read_csv('dados_limpos.csv', low_memory=False)
+# Carregar dados limpos (texto como categorias se o arquivo não couber no orçamento de memória)
+cabe, bytes_linha = csv_cabe_no_orcamento('dados_limpos.csv')
+if cabe:
+    df = pd.read_csv('dados_limpos.csv', low_memory=False)
+else:
+    print(f"\n💾 Arquivo maior que o orçamento de memória: colunas de texto carregadas como categorias")
+    df = carregar_csv_compacto('dados_limpos.csv', linhas_por_bloco(bytes_linha))
 
 # ============================================================
 # 1. DIMENSÕES DO DATASET
@@ -30,14 +36,14 @@ print("2. TIPOS DE VARIÁVEIS")
 print("="*60)
 
 # Contar tipos
-tipo_count = df.dtypes.value_counts()
+tipo_count = df.dtypes.astype(str).value_counts()
 print("\n📋 Resumo dos tipos:")
 for tipo, count in tipo_count.items():
     print(f"   {tipo}: {count} colunas")
 
 # Separar por categoria
 numericas = df.select_dtypes(include=['number']).columns.tolist()
-categoricas = df.select_dtypes(include=['object']).columns.tolist()
+categoricas = df.select_dtypes(include=['object', 'category']).columns.tolist()
 
 print(f"\n📈 Colunas numéricas ({len(numericas)}):")
 for col in numericas:
@@ -149,7 +155,7 @@ if 'PA_SEXO' in df.columns:
         problemas.append(f"⚠️ {len(sexos_invalidos)} registros com sexo inválido")
         print(f"   ❌ {len(sexos_invalidos)} valores inválidos de sexo")
         print(f"   Valores inválidos encontrados:")
-        print(df[~df['PA_SEXO'].isin(sexos_validos)]['PA_SEXO'].value_counts())
+        print(df[~df['PA_SEXO'].isin(sexos_validos)]['PA_SEXO'].value_counts().loc[lambda s: s > 0])
     else:
         print("   ✅ Todos os valores de sexo são válidos")
 
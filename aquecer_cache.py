@@ -0,0 +1,39 @@
+"""
+Executa as consultas das tabelas de dimensão e grava os resultados no cache de consultas
+
+Os scripts seguintes (e os processos de siasus.py) leem essas tabelas do cache em disco
+enquanto elas não mudarem no banco.
+
+Uso:
+    python aquecer_cache.py              # aquece o cache das dimensões
+    python aquecer_cache.py --limpar     # apaga o cache em disco antes de aquecer
+"""
+
+import argparse
+import time
+
+from utils import imprimir_cabecalho
+from utils.cache_consultas import CACHE, resumo_cache
+from utils.data_loader import aquecer_cache_dimensoes
+
+def main():
+    parser = argparse.ArgumentParser(description="Aquece o cache de consultas com as tabelas de dimensão")
+    parser.add_argument('--limpar', action='store_true', help="Apaga o cache em disco antes de aquecer")
+    args = parser.parse_args()
+
+    imprimir_cabecalho("CACHE DE CONSULTAS", 60)
+    if not CACHE.ativo:
+        print("Cache desativado (CACHE_CONSULTAS=0)")
+        return
+    if args.limpar:
+        CACHE.limpar(disco=True)
+    inicio = time.perf_counter()
+    for tabela, linhas in aquecer_cache_dimensoes().items():
+        print(f"  {tabela:<12} {linhas:>10,} linhas")
+
+    print(f"\n{resumo_cache()}")
+    print(f"Pasta: {CACHE.pasta}")
+    print(f"Tempo: {time.perf_counter() - inicio:.2f} s")
+
+if __name__ == "__main__":
+    main()
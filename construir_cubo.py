@@ -0,0 +1,58 @@
+"""
+Constrói (ou atualiza) o cubo de medidas da PARS a partir dos dados limpos
+
+Uso:
+    python construir_cubo.py                                   # cubo de dados_limpos.csv
+    python construir_cubo.py --dados dados_limpos_sr.csv
+    python construir_cubo.py --nova-competencia dados_202507.csv
+        # substitui no cubo apenas as competências presentes no arquivo novo
+    python construir_cubo.py --memoria 512M    # lê o CSV em blocos se não couber no orçamento
+"""
+
+import argparse
+import time
+import warnings
+
+# Suprimir warnings do pandas
+warnings.filterwarnings('ignore', category=UserWarning)
+
+from utils import SessaoAnalise, imprimir_cabecalho
+from utils.cubo import CuboPARS, assinatura_arquivo, pasta_cubo
+from utils.memoria import configurar_orcamento, resumo_memoria
+
+def main():
+    parser = argparse.ArgumentParser(description="Constrói o cubo de medidas da PARS")
+    parser.add_argument('--dados', default='dados_limpos.csv', help="CSV de dados limpos")
+    parser.add_argument('--nova-competencia', help="CSV limpo com competências novas (atualização incremental)")
+    parser.add_argument('--memoria', help="Orçamento de memória, ex.: 512M, 2G (padrão: ORCAMENTO_MEMORIA)")
+    args = parser.parse_args()
+    if args.memoria:
+        try:
+            configurar_orcamento(args.memoria)
+        except ValueError as e:
+            parser.error(str(e))
+
+    imprimir_cabecalho("CUBO DE MEDIDAS DA PARS", 60)
+    pasta = pasta_cubo(args.dados)
+    inicio = time.perf_counter()
+
+    if args.nova_competencia:
+        # A origem registra o arquivo base e cada arquivo incremental: as análises
+        # usam este cubo enquanto nenhum desses arquivos mudar
+        cubo = CuboPARS.carregar(pasta)
+        df_novo = SessaoAnalise(args.nova_competencia).dados()
+        cubo.atualizar(df_novo, assinatura_arquivo(args.nova_competencia))
+        print(f"Competências atualizadas: {sorted(df_novo['PA_CMP'].unique().tolist())}")
+    else:
+        # O cubo corresponde à versão atual do arquivo de dados
+        cubo = SessaoAnalise(args.dados).construir_cubo(assinatura_arquivo(args.dados))
+    cubo.salvar(pasta)
+
+    print(f"\nCubo gravado em: {pasta}")
+    for dimensoes, cuboide in cubo.cuboides.items():
+        print(f"  {' × '.join(dimensoes):<75} {len(cuboide):>10,} linhas")
+    print(f"\nTempo: {time.perf_counter() - inicio:.2f} s")
+    print(resumo_memoria())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Cria um banco local (SQLite ou DuckDB) com as tabelas pars e de dimensão, sem servidor MySQL
+
+Uso:
+    python gerar_dados_sinteticos.py --pasta sintetico
+    python criar_banco_local.py --pasta sintetico                    # datasus_db.sqlite na raiz do projeto
+    python criar_banco_local.py --pasta sintetico --backend duckdb   # datasus_db.duckdb
+
+Depois, no .env (ou no ambiente): DB_BACKEND=sqlite (ou duckdb) e, se o
+arquivo não for o padrão, DB_ARQUIVO=<arquivo>. Extração, carregadores e
+validação de CIDs passam a consultar o arquivo local.
+"""
+
+import argparse
+import time
+
+from database_connection import caminho_banco_local
+from utils import imprimir_cabecalho
+from utils.banco_local import criar_banco_local
+
+def main():
+    parser = argparse.ArgumentParser(description="Cria um banco SQLite ou DuckDB a partir dos CSVs sintéticos")
+    parser.add_argument('--pasta', default='sintetico', help="Pasta com dados_pars*.csv e dimensoes/")
+    parser.add_argument('--backend', choices=['sqlite', 'duckdb'], default='sqlite', help="Banco embutido")
+    parser.add_argument('--arquivo', help="Arquivo do banco (padrão: DB_ARQUIVO ou datasus_db.<backend>)")
+    parser.add_argument('--bloco', type=int,
+                        help="Linhas lidas e inseridas por bloco (padrão: pelo orçamento de memória, ORCAMENTO_MEMORIA)")
+    args = parser.parse_args()
+
+    imprimir_cabecalho("BANCO LOCAL", 60)
+    inicio = time.perf_counter()
+    arquivo = args.arquivo or caminho_banco_local(args.backend)
+    linhas = criar_banco_local(args.pasta, arquivo, args.backend, args.bloco)
+
+    print(f"\nArquivo: {arquivo}")
+    for tabela, n in linhas.items():
+        print(f"  {tabela:<12} {n:>12,} linhas")
+    print(f"\nTempo: {time.perf_counter() - inicio:.2f} s")
+    print(f"\nPara usar: DB_BACKEND={args.backend}" + (f" e DB_ARQUIVO={arquivo}" if args.arquivo else ""))
+
+if __name__ == "__main__":
+    main()
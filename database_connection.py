@@ -1,21 +1,33 @@
 """
-Módulo de conexão com o banco de dados MySQL.
+Módulo de conexão com o banco de dados.
+
+O backend é escolhido pela variável DB_BACKEND: 'mysql' (padrão, servidor
+configurado pelas variáveis DB_*), 'sqlite' ou 'duckdb' (arquivo local em
+DB_ARQUIVO, criado por criar_banco_local.py com as mesmas tabelas).
 """
 
-import mysql.connector
-from mysql.connector import Error
 import os
 from dotenv import load_dotenv
 
 # Carrega as variáveis de ambiente do arquivo .env
 load_dotenv()
 
+BACKENDS = ('mysql', 'sqlite', 'duckdb')
+
+# Extensão do arquivo padrão (<DB_DATABASE>.<extensão>) de cada backend embutido
+EXTENSOES = {'sqlite': '.sqlite', 'duckdb': '.duckdb'}
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+
 
 class DatabaseConnection:
-    """Classe para gerenciar conexões com o banco de dados MySQL"""
-    
+    """Classe para gerenciar conexões com o banco de dados (MySQL, SQLite ou DuckDB)"""
+
     def __init__(self):
         """Inicializa a configuração da conexão a partir das variáveis de ambiente"""
+        self.backend = os.getenv('DB_BACKEND', 'mysql').strip().lower()
+        if self.backend not in BACKENDS:
+            raise ValueError(f"DB_BACKEND inválido: {self.backend} (use {', '.join(BACKENDS)})")
         self.config = {
             'host': os.getenv('DB_HOST', 'localhost'),
             'port': os.getenv('DB_PORT', '3306'),
@@ -23,10 +35,32 @@ class DatabaseConnection:
             'user': os.getenv('DB_USER', 'root'),
             'password': os.getenv('DB_PASSWORD', '')
         }
+        self.arquivo = caminho_banco_local(self.backend)
         self.connection = None
-    
+
     def connect(self):
         """Estabelece conexão com o banco de dados"""
+        if self.backend == 'mysql':
+            return self._conectar_mysql()
+        try:
+            if not os.path.exists(self.arquivo):
+                raise FileNotFoundError(f"arquivo {self.arquivo} não encontrado (crie com criar_banco_local.py)")
+            if self.backend == 'sqlite':
+                import sqlite3
+                # Somente leitura: vários processos (pipeline, análises) podem ler ao mesmo tempo
+                self.connection = sqlite3.connect(f"{_uri_arquivo(self.arquivo)}?mode=ro", uri=True)
+            else:
+                import duckdb
+                self.connection = duckdb.connect(self.arquivo, read_only=True)
+            return self.connection
+        except Exception as e:
+            print(f"✗ Erro ao abrir o banco {self.backend} local: {e}")
+            return None
+
+    def _conectar_mysql(self):
+        """Conexão com o servidor MySQL"""
+        import mysql.connector
+        from mysql.connector import Error
         try:
             self.connection = mysql.connector.connect(**self.config)
             if self.connection.is_connected():
@@ -34,12 +68,52 @@ class DatabaseConnection:
         except Error as e:
             print(f"✗ Erro ao conectar ao MySQL: {e}")
             return None
-    
+
     def disconnect(self):
         """Fecha a conexão com o banco de dados"""
-        if self.connection and self.connection.is_connected():
+        if self.connection is None:
+            return
+        if self.backend != 'mysql' or self.connection.is_connected():
             self.connection.close()
             print("✓ Conexão com o banco de dados fechada.")
+        self.connection = None
+
+
+def _uri_arquivo(caminho):
+    """URI file: do arquivo (aceita caminhos do Windows)"""
+    from pathlib import Path
+    return Path(caminho).resolve().as_uri()
+
+
+def caminho_banco_local(backend=None):
+    """Arquivo do banco embutido: DB_ARQUIVO (relativo à raiz do projeto) ou <DB_DATABASE>.<extensão>"""
+    backend = backend or os.getenv('DB_BACKEND', 'mysql').strip().lower()
+    padrao = os.getenv('DB_DATABASE', 'datasus_db') + EXTENSOES.get(backend, '')
+    return os.path.join(RAIZ, os.getenv('DB_ARQUIVO') or padrao)
+
+
+def versao_tabela(conn, nome_tabela, backend=None):
+    """Identifica a versão dos dados de uma tabela, para o cache de consultas (muda quando os dados mudam)
+
+    Bancos locais: tamanho e data de modificação do arquivo. MySQL: UPDATE_TIME
+    de information_schema (nulo em algumas versões do InnoDB) e a contagem de linhas.
+    """
+    backend = backend or os.getenv('DB_BACKEND', 'mysql').strip().lower()
+    if backend != 'mysql':
+        arquivo = caminho_banco_local(backend)
+        info = os.stat(arquivo)
+        return f"{backend}:{os.path.abspath(arquivo)}:{info.st_size}:{info.st_mtime_ns}"
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT UPDATE_TIME FROM information_schema.tables "
+                       "WHERE table_schema = DATABASE() AND table_name = %s", (nome_tabela,))
+        atualizacao = cursor.fetchone()
+        cursor.execute(f"SELECT COUNT(*) FROM {nome_tabela}")
+        linhas = cursor.fetchone()[0]
+    finally:
+        cursor.close()
+    servidor = f"{os.getenv('DB_HOST', 'localhost')}:{os.getenv('DB_PORT', '3306')}/{os.getenv('DB_DATABASE', 'datasus_db')}"
+    return f"mysql:{servidor}:{nome_tabela}:{atualizacao[0] if atualizacao else None}:{linhas}"
 
 
 def get_database_connection():
@@ -0,0 +1,110 @@
+"""
+Executa as análises de scripts/ em um único processo, sobre uma sessão compartilhada
+
+Uso:
+    python executar_analises.py            # todas as análises
+    python executar_analises.py 1 3 5      # apenas as análises escolhidas
+    python executar_analises.py --motor duckdb --particoes particoes/dados_limpos   # agregações em SQL
+    python executar_analises.py --memoria 2G   # orçamento de memória (DuckDB e leituras em blocos)
+"""
+
+import argparse
+import importlib.util
+import time
+import warnings
+from pathlib import Path
+
+# Suprimir warnings do pandas
+warnings.filterwarnings('ignore', category=UserWarning)
+
+from utils import (SessaoAnalise, imprimir_cabecalho, configurar_renderizacao, fila_de_renderizacao,
+                   etapa, finalizar_instrumentacao)
+from utils.memoria import configurar_orcamento
+
+PASTA_SCRIPTS = Path(__file__).parent / 'scripts'
+
+def listar_analises():
+    """Retorna dict número -> caminho do script de análise"""
+    return {int(p.name.split('_')[0]): p for p in sorted(PASTA_SCRIPTS.glob('[0-9]_*.py'))}
+
+def importar_analise(caminho):
+    """Importa um script de análise como módulo (os nomes começam com dígito)"""
+    spec = importlib.util.spec_from_file_location(f"analise_{caminho.stem}", caminho)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+def executar_analises(numeros=None, sessao=None):
+    """Executa as análises escolhidas e retorna lista de (nome, segundos, erro)"""
+    analises = listar_analises()
+    numeros = numeros or sorted(analises)
+    sessao = sessao or SessaoAnalise()
+    tempos = []
+
+    # Carregamento único compartilhado por todas as análises
+    inicio = time.perf_counter()
+    sessao.tabela()
+    tempos.append(('carregamento da sessão', time.perf_counter() - inicio, None))
+
+    # Gráficos padronizados são enfileirados e renderizados em paralelo ao final
+    with fila_de_renderizacao() as fila:
+        for numero in numeros:
+            caminho = analises[numero]
+            inicio = time.perf_counter()
+            erro = None
+            try:
+                with etapa(caminho.stem, 'analise'):
+                    importar_analise(caminho).main(sessao)
+            except Exception as e:
+                erro = str(e)
+                print(f"✗ Erro em {caminho.name}: {e}")
+            tempos.append((caminho.stem, time.perf_counter() - inicio, erro))
+
+        inicio = time.perf_counter()
+        fila.renderizar()
+        tempos.append(('renderização dos gráficos', time.perf_counter() - inicio, None))
+
+    return tempos
+
+def imprimir_tempos(tempos):
+    """Imprime o tempo gasto por análise"""
+    imprimir_cabecalho("TEMPO POR ANÁLISE", 80)
+    for nome, segundos, erro in tempos:
+        status = "ERRO" if erro else "ok"
+        print(f"  {nome:<45} {segundos:>10.2f} s  {status}")
+    print(f"  {'Total':<45} {sum(t[1] for t in tempos):>10.2f} s")
+
+def main():
+    parser = argparse.ArgumentParser(description="Executa as análises sobre uma sessão compartilhada")
+    parser.add_argument('analises', nargs='*', type=int, help="Números das análises (padrão: todas)")
+    parser.add_argument('--dados', default='dados_limpos.csv', help="CSV de dados limpos")
+    parser.add_argument('--rascunho', action='store_true', help="Gráficos em baixa resolução")
+    parser.add_argument('--svg', action='store_true', help="No rascunho, gerar SVG em vez de PNG")
+    parser.add_argument('--processos', type=int, default=None, help="Processos de renderização")
+    parser.add_argument('--motor', choices=['pandas', 'duckdb'], default=None,
+                        help="Motor das agregações (padrão: MOTOR_ANALISES ou pandas)")
+    parser.add_argument('--particoes', help="Pasta de Parquet particionado lida pelo motor duckdb")
+    parser.add_argument('--memoria', help="Orçamento de memória, ex.: 512M, 2G (padrão: ORCAMENTO_MEMORIA)")
+    args = parser.parse_args()
+    invalidas = sorted(set(args.analises) - set(listar_analises()))
+    if invalidas:
+        parser.error(f"análise inexistente: {', '.join(map(str, invalidas))} "
+                     f"(use {', '.join(map(str, sorted(listar_analises())))})")
+    if args.memoria:
+        try:
+            configurar_orcamento(args.memoria)
+        except ValueError as e:
+            parser.error(str(e))
+
+    configurar_renderizacao(
+        rascunho=args.rascunho or None,
+        formato_rascunho='svg' if args.svg else None,
+        trabalhadores=args.processos
+    )
+
+    tempos = executar_analises(args.analises, SessaoAnalise(args.dados, motor=args.motor, particoes=args.particoes))
+    imprimir_tempos(tempos)
+    finalizar_instrumentacao('executar_analises')
+
+if __name__ == "__main__":
+    main()
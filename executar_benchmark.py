@@ -0,0 +1,83 @@
+"""
+Benchmark das etapas do projeto sobre dados sintéticos de vários tamanhos
+
+Mede tempo de parede, tempo de CPU, pico de memória e registros por segundo de
+cada etapa (extração, carga, limpeza, análise exploratória, processamento e as
+sete análises) sobre um banco local criado com os dados, grava o resultado em
+benchmarks/resultados/<commit>.json e compara com uma base salva.
+
+Uso:
+    python executar_benchmark.py                                  # 10 mil e 100 mil registros, todas as etapas
+    python executar_benchmark.py --tamanhos 1000000 --casos limpeza analise_5 -r 3
+    python executar_benchmark.py --salvar-base                    # grava o resultado como base
+    python executar_benchmark.py --base a1b2c3d --limite 0.15     # compara com o resultado de outro commit
+"""
+
+import argparse
+import os
+import shutil
+import sys
+
+from utils import imprimir_cabecalho, imprimir_subcabecalho
+from utils.benchmark import (ARQUIVO_BASE, BANCO_PADRAO, CASOS, LIMITE_REGRESSAO, carregar_relatorio, comparar,
+                             executar_benchmark, salvar_relatorio)
+
+def imprimir_resultado(resultado):
+    """Uma linha por caso medido"""
+    if resultado['status'] != 'ok':
+        print(f"  {resultado['caso']:<22} {resultado['tamanho']:>10,}  ERRO: {resultado['erro']}")
+        return
+    pico = f"{resultado['pico_rss_mb']:>8.0f} MB" if resultado['pico_rss_mb'] is not None else f"{'-':>11}"
+    vazao = f"{resultado['registros_por_s']:>12,.0f}/s" if resultado['registros_por_s'] else f"{'-':>14}"
+    print(f"  {resultado['caso']:<22} {resultado['tamanho']:>10,} {resultado['tempo_s']:>9.2f} s "
+          f"{resultado['cpu_s']:>9.2f} s {pico} {vazao}")
+
+def imprimir_comparacao(comparacao, limite):
+    """Variação de cada métrica em relação à base; retorna as regressões"""
+    imprimir_subcabecalho(f"COMPARAÇÃO COM A BASE (limite: +{limite:.0%})", 80)
+    for linha in comparacao:
+        marca = "REGRESSÃO" if linha['regressao'] else ""
+        print(f"  {linha['caso']:<22} {linha['tamanho']:>10,} {linha['metrica']:<12} "
+              f"{linha['base']:>10.2f} → {linha['atual']:>10.2f} ({linha['variacao']:+7.1%}) {marca}")
+    return [linha for linha in comparacao if linha['regressao']]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark das etapas do projeto sobre dados sintéticos")
+    parser.add_argument('--tamanhos', nargs='+', type=int, default=[10_000, 100_000],
+                        help="Registros gerados por execução (repartidos entre os três municípios)")
+    parser.add_argument('--casos', nargs='+', choices=[c.nome for c in CASOS], help="Etapas medidas (padrão: todas)")
+    parser.add_argument('-r', '--repeticoes', type=int, default=1, help="Execuções por etapa (vale a mediana)")
+    parser.add_argument('--semente', type=int, default=42, help="Semente dos dados sintéticos")
+    parser.add_argument('--banco', choices=['sqlite', 'duckdb', 'configurado'], default=BANCO_PADRAO,
+                        help="Banco local criado com os dados (configurado = o do .env)")
+    parser.add_argument('--saida', help="Arquivo do relatório (padrão: benchmarks/resultados/<commit>.json)")
+    parser.add_argument('--base', default=ARQUIVO_BASE, help="Relatório (ou commit) usado como base")
+    parser.add_argument('--limite', type=float, default=LIMITE_REGRESSAO, help="Piora relativa tolerada")
+    parser.add_argument('--salvar-base', action='store_true', help="Grava o resultado também como base")
+    args = parser.parse_args()
+
+    imprimir_cabecalho("BENCHMARK DAS ETAPAS", 80)
+    print(f"  {'Etapa':<22} {'Tamanho':>10} {'Parede':>11} {'CPU':>11} {'Pico RSS':>11} {'Vazão':>14}")
+    banco = None if args.banco == 'configurado' else args.banco
+    relatorio = executar_benchmark(args.tamanhos, args.casos, args.repeticoes, args.semente, banco,
+                                   ao_concluir=imprimir_resultado)
+
+    caminho = salvar_relatorio(relatorio, args.saida)
+    print(f"\n✓ Resultado do commit {relatorio['commit']} salvo em: {caminho}")
+    if args.salvar_base:
+        shutil.copyfile(caminho, ARQUIVO_BASE)
+        print(f"✓ Base atualizada: {ARQUIVO_BASE}")
+        return
+
+    if not os.path.exists(args.base) and args.base == ARQUIVO_BASE:
+        print("\nNenhuma base salva para comparar (use --salvar-base)")
+        return
+
+    regressoes = imprimir_comparacao(comparar(relatorio, carregar_relatorio(args.base), args.limite), args.limite)
+    if regressoes:
+        print(f"\n✗ {len(regressoes)} regressões acima do limite")
+        sys.exit(1)
+    print("\n✓ Nenhuma regressão acima do limite")
+
+if __name__ == "__main__":
+    main()
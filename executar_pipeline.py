@@ -0,0 +1,89 @@
+"""
+Pipeline completo: extração → limpeza → análise exploratória → análises
+
+Cada etapa só é executada quando suas entradas, seu código ou seus parâmetros
+mudaram desde a última execução; etapas independentes rodam em paralelo.
+
+Uso:
+    python executar_pipeline.py --dry-run          # mostra o que seria recalculado
+    python executar_pipeline.py                    # executa o que estiver desatualizado
+    python executar_pipeline.py analise_5 -j 2     # apenas uma análise (e suas dependências)
+"""
+
+import argparse
+from pathlib import Path
+
+from utils.orquestrador import Pipeline, Tarefa, comando_python, dependencias_codigo
+
+PASTAS_GRAFICOS = {
+    1: 'graficos/1_volume_perfil_procedimentos',
+    2: 'graficos/2_producao_estabelecimentos',
+    3: 'graficos/3_perfil_demografico_epidemiologico',
+    4: 'graficos/4_fluxos_regionais_acessos',
+    5: 'graficos/5_recursos_financeiros',
+    6: 'graficos/6_areas_criticas',
+    7: 'graficos/7_comparacoes_tendencias',
+}
+
+def versao_pars():
+    """Versão da tabela pars no banco (a extração roda de novo quando os dados de origem mudam)"""
+    from database_connection import get_database_connection, versao_tabela
+    conn = get_database_connection()
+    if not conn:
+        raise ConnectionError("sem conexão com o banco")
+    try:
+        return versao_tabela(conn, 'pars')
+    finally:
+        conn.close()
+
+def montar_tarefas():
+    """Declara as etapas do pipeline com suas entradas e saídas"""
+    tarefas = [
+        Tarefa('extrair_ijui', comando_python('extrair_dados_slq_to_csv.py'),
+               saidas=['dados_pars.csv'],
+               codigo=dependencias_codigo('extrair_dados_slq_to_csv.py'),
+               parametros={'municipio': '431020'}, fonte=versao_pars),
+        Tarefa('extrair_cruz_alta', comando_python('extrair_outras_cidades.py'),
+               saidas=['dados_pars_ca.csv'],
+               codigo=dependencias_codigo('extrair_outras_cidades.py'),
+               parametros={'municipio': '430610'}, fonte=versao_pars),
+        Tarefa('limpar_ijui', comando_python('limpeza_dados.py'),
+               entradas=['dados_pars.csv'], saidas=['dados_limpos.csv'],
+               codigo=dependencias_codigo('limpeza_dados.py')),
+        Tarefa('limpar_cruz_alta', comando_python('limpeza_dados_outras_cidades.py'),
+               entradas=['dados_pars_ca.csv'], saidas=['dados_limpos_ca.csv'],
+               codigo=dependencias_codigo('limpeza_dados_outras_cidades.py')),
+        Tarefa('analise_exploratoria', comando_python('analise_exploratoria_de_dados.py'),
+               entradas=['dados_limpos.csv'],
+               codigo=dependencias_codigo('analise_exploratoria_de_dados.py')),
+    ]
+
+    for script in sorted(Path('scripts').glob('[0-9]_*.py')):
+        numero = int(script.name.split('_')[0])
+        entradas = ['dados_limpos.csv']
+        if numero == 7:
+            # Santa Rosa não tem etapa de extração própria: o CSV é uma entrada de origem
+            entradas += ['dados_limpos_sr.csv', 'dados_limpos_ca.csv']
+        tarefas.append(Tarefa(
+            f'analise_{numero}', comando_python(str(script)),
+            entradas=entradas,
+            saidas=[PASTAS_GRAFICOS[numero]],
+            codigo=dependencias_codigo(str(script)),
+        ))
+
+    return tarefas
+
+def main():
+    parser = argparse.ArgumentParser(description="Executa o pipeline pulando etapas atualizadas")
+    parser.add_argument('alvos', nargs='*', help="Tarefas a executar (padrão: todas)")
+    parser.add_argument('--dry-run', action='store_true', help="Apenas mostra o que seria recalculado")
+    parser.add_argument('--forcar', action='store_true', help="Executa mesmo as etapas atualizadas")
+    parser.add_argument('-j', '--trabalhadores', type=int, default=4, help="Tarefas em paralelo")
+    args = parser.parse_args()
+
+    pipeline = Pipeline(montar_tarefas())
+    pipeline.executar(args.alvos or None, forcar=args.forcar,
+                      trabalhadores=args.trabalhadores, simular=args.dry_run)
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,39 @@
 import pandas as pd
 from database_connection import *
+from utils.banco_local import ESQUEMAS
+from utils.memoria import bytes_por_linha_esquema, linhas_por_bloco, orcamento_bytes
 
-conn = get_database_connection()
+def extrair_municipio(codigo='431020', destino='dados_pars.csv', periodo=None):
+    """Extrai os registros da PARS de um município (e de um período AAAAMM, se informado) para CSV
 
-df = pd.read_sql("SELECT * FROM pars WHERE pa_ufmun = '431020';", conn)
-df.to_csv('dados_pars.csv', index=False, encoding='utf-8-sig')
-print(df)
+    Com orçamento de memória (ORCAMENTO_MEMORIA), lê e grava em blocos do tamanho
+    estimado pelo esquema da PARS e retorna None em vez do DataFrame.
+    """
+    conn = get_database_connection()
 
-conn.close()
\ No newline at end of file
+    consulta = f"SELECT * FROM pars WHERE pa_ufmun = '{codigo}'"
+    if periodo:
+        consulta += f" AND pa_cmp BETWEEN '{periodo[0]}' AND '{periodo[1]}'"
+    if orcamento_bytes():
+        linhas = linhas_por_bloco(bytes_por_linha_esquema(ESQUEMAS['pars']))
+        cursor = conn.cursor()
+        cursor.execute(consulta + ";")
+        colunas = [descricao[0] for descricao in cursor.description]
+        with open(destino, 'w', encoding='utf-8-sig', newline='') as arquivo:
+            # Cabeçalho do cursor: sem registros, o CSV fica igual ao da leitura inteira
+            pd.DataFrame(columns=colunas).to_csv(arquivo, index=False)
+            while registros := cursor.fetchmany(linhas):
+                pd.DataFrame.from_records(registros, columns=colunas).to_csv(arquivo, index=False, header=False)
+        cursor.close()
+        conn.close()
+        return None
+    df = pd.read_sql(consulta + ";", conn)
+    df.to_csv(destino, index=False, encoding='utf-8-sig')
+
+    conn.close()
+    return df
+
+if __name__ == "__main__":
+    df = extrair_municipio('431020', 'dados_pars.csv')
+    if df is not None:
+        print(df)
\ No newline at end of file
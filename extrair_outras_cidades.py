@@ -1,12 +1,5 @@
-import pandas as pd
-from database_connection import *
-
-conn = get_database_connection()
+from extrair_dados_slq_to_csv import extrair_municipio
 
 # Santa Rosa: 431720
 # Cruz Alta: 430610
-df = pd.read_sql("SELECT * FROM pars WHERE pa_ufmun = '430610';", conn)
-df.to_csv('dados_pars_ca.csv', index=False, encoding='utf-8-sig')
-len(df)
-
-conn.close()
\ No newline at end of file
+df = extrair_municipio('430610', 'dados_pars_ca.csv')
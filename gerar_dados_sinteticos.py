@@ -0,0 +1,54 @@
+"""
+Gera dados sintéticos no formato da PARS e as tabelas de dimensão correspondentes
+
+Uso:
+    python gerar_dados_sinteticos.py                                  # 100 mil registros de Ijuí, Santa Rosa e Cruz Alta
+    python gerar_dados_sinteticos.py --registros 10000000 --municipios 497 --inicio 202401
+    python gerar_dados_sinteticos.py --registros 1000000 --particionar  # um CSV por município
+
+Os registros vão para <pasta>/dados_pars.csv (mesmo formato da extração, com
+duplicatas, idades inválidas e nulos para a limpeza tratar) e as dimensões
+(tb_sigtaw, tb_municip, cadgerrs, s_cid, dimtempo) para <pasta>/dimensoes/.
+A mesma semente gera sempre os mesmos dados.
+"""
+
+import argparse
+import time
+
+from utils import imprimir_cabecalho
+from utils.sintetico import GeradorPARS
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera dados sintéticos da PARS para testes em escala")
+    parser.add_argument('--registros', type=int, default=100_000, help="Quantidade de registros")
+    parser.add_argument('--municipios', type=int, default=3, help="Quantidade de municípios")
+    parser.add_argument('--inicio', type=int, default=202501, help="Primeira competência (AAAAMM)")
+    parser.add_argument('--fim', type=int, default=202512, help="Última competência (AAAAMM)")
+    parser.add_argument('--procedimentos', type=int, default=4000, help="Procedimentos no catálogo SIGTAP")
+    parser.add_argument('--estabelecimentos', type=int, default=40, help="Estabelecimentos por município (média)")
+    parser.add_argument('--semente', type=int, default=42, help="Semente do gerador")
+    parser.add_argument('--bloco', type=int, default=1_000_000, help="Registros gerados e gravados por bloco")
+    parser.add_argument('--particionar', action='store_true', help="Um CSV por município")
+    parser.add_argument('--pasta', default='sintetico', help="Pasta de saída")
+    args = parser.parse_args()
+
+    imprimir_cabecalho("DADOS SINTÉTICOS DA PARS", 60)
+    inicio = time.perf_counter()
+
+    gerador = GeradorPARS(municipios=args.municipios, inicio=args.inicio, fim=args.fim,
+                          procedimentos=args.procedimentos, estabelecimentos=args.estabelecimentos,
+                          semente=args.semente)
+    linhas = gerador.gravar(args.pasta, args.registros, tamanho_bloco=args.bloco, particionar=args.particionar)
+
+    print(f"\nCatálogo: {len(gerador.municipios):,} municípios, {len(gerador.procedimentos):,} procedimentos, "
+          f"{len(gerador.estabelecimentos):,} estabelecimentos, {len(gerador.cids):,} CIDs")
+    print(f"Competências: {gerador.competencias[0]} a {gerador.competencias[-1]}")
+    print(f"\nArquivos gravados em: {args.pasta}")
+    for caminho, n in list(linhas.items())[:20]:
+        print(f"  {caminho:<50} {n:>12,} linhas")
+    if len(linhas) > 20:
+        print(f"  ... e mais {len(linhas) - 20} arquivos")
+    print(f"\nTempo: {time.perf_counter() - inicio:.2f} s")
+
+if __name__ == "__main__":
+    main()
@@ -1,111 +1,262 @@
+import numpy as np
 import pandas as pd
 import warnings
 
+from utils.memoria import csv_cabe_no_orcamento, inferir_tipos_csv, linhas_por_bloco
+
 # Suprimir warnings específicos (opcional)
 warnings.filterwarnings('ignore', category=FutureWarning)
 
-print("="*60)
-print("LIMPEZA DE DADOS")
-print("="*60)
+# Período padrão da limpeza (competências AAAAMM, inclusive)
+PERIODO_PADRAO = ('202501', '202512')
+
+def _filtrar_periodo(bloco, periodo):
+    """Competências AAAAMM dentro do período (PA_CMP vira texto, como na limpeza em memória)"""
+    bloco['PA_CMP'] = bloco['PA_CMP'].astype(str)
+    return bloco[bloco['PA_CMP'].str[:6].between(periodo[0], periodo[1])]
 
-# Carregar dados com low_memory=False para evitar DtypeWarning
-df = pd.read_csv('dados_pars.csv', low_memory=False)
+def _tipo_idade(tipos):
+    """Tipo de PA_IDADE depois de pd.to_numeric no arquivo inteiro (inteiro só se todos os blocos forem)"""
+    return np.dtype('int64') if all(pd.api.types.is_integer_dtype(t) for t in tipos) else np.dtype('float64')
 
-print(f"\n📊 Dimensões iniciais: {df.shape[0]} linhas x {df.shape[1]} colunas")
+def _limpar_em_blocos(entrada, saida, periodo, linhas):
+    """Mesma limpeza de limpar_dados, lendo o CSV em blocos (arquivos maiores que o orçamento de memória)
 
-# 1. Filtrar apenas dados de 2025
-if 'PA_CMP' in df.columns:
-    print("\n🗓️ Filtrando dados de 2025...")
-    antes = len(df)
+    1ª leitura: tipos das colunas iguais aos da leitura inteira.
+    2ª leitura: hash de cada linha no período (duplicatas no arquivo todo) e nulos por linha.
+    3ª leitura: remove duplicatas, preenche nulos, filtra idades e grava em modo de acréscimo.
+    """
+    print(f"\n💾 Arquivo maior que o orçamento de memória: limpeza em blocos de {linhas:,} linhas")
+    tipos = inferir_tipos_csv(entrada, linhas)
+    colunas = list(tipos)
+    tem_periodo = 'PA_CMP' in colunas
     
-    # Converter PA_CMP para string e extrair o ano (primeiros 4 dígitos)
-    df['PA_CMP'] = df['PA_CMP'].astype(str)
-    df['ano_temp'] = df['PA_CMP'].str[:4]
+    # 2ª leitura: hashes e nulos das linhas no período
+    total = 0
+    hashes, nulos, tipos_idade = [], [], []
+    for bloco in pd.read_csv(entrada, chunksize=linhas, dtype=tipos, low_memory=False):
+        total += len(bloco)
+        if tem_periodo:
+            bloco = _filtrar_periodo(bloco, periodo)
+        hashes.append(pd.util.hash_pandas_object(bloco, index=False).to_numpy())
+        nulos.append(np.packbits(bloco.isnull().to_numpy(), axis=1))
+        if 'PA_IDADE' in colunas:
+            tipos_idade.append(pd.to_numeric(bloco['PA_IDADE'], errors='coerce').dtype)
     
-    # Filtrar apenas 2025
-    df = df[df['ano_temp'] == '2025']
+    print(f"\n📊 Dimensões iniciais: {total} linhas x {len(colunas)} colunas")
+    hashes = np.concatenate(hashes) if hashes else np.empty(0, dtype=np.uint64)
+    df_original = len(hashes)
+    if tem_periodo:
+        print(f"\n🗓️ Filtrando competências de {periodo[0]} a {periodo[1]}...")
+        print(f"   ✅ Mantidos apenas dados de {periodo[0]} a {periodo[1]}")
+        print(f"   ✅ Removidas {total - df_original} linhas de outros períodos")
+    else:
+        print("\n   ⚠️ Coluna 'PA_CMP' não encontrada - filtro de período não aplicado")
     
-    # Remover coluna temporária
-    df = df.drop(columns=['ano_temp'])
+    # Duplicatas no arquivo todo: fica a primeira ocorrência, como em drop_duplicates
+    print("\n🧹 Removendo duplicatas...")
+    manter = ~pd.Series(hashes).duplicated().to_numpy()
+    restantes = int(manter.sum())
+    print(f"   ✅ Removidas {df_original - restantes} linhas duplicadas")
     
-    print(f"   ✅ Mantidos apenas dados de 2025")
-    print(f"   ✅ Removidas {antes - len(df)} linhas de outros anos")
-else:
-    print("\n   ⚠️ Coluna 'PA_CMP' não encontrada - filtro de ano não aplicado")
-
-# 2. Remover duplicatas
-print("\n🧹 Removendo duplicatas...")
-df_original = len(df)
-df = df.drop_duplicates()
-print(f"   ✅ Removidas {df_original - len(df)} linhas duplicadas")
-
-# 3. Remover colunas com muitos valores nulos (>50%)
-print("\n🧹 Analisando colunas com valores nulos...")
-threshold = 0.5  # 50% de valores nulos
+    contagem_nulos = np.zeros(len(colunas), dtype=np.int64)
+    inicio = 0
+    for bits in nulos:
+        fim = inicio + len(bits)
+        contagem_nulos += np.unpackbits(bits[manter[inicio:fim]], axis=1, count=len(colunas)).sum(axis=0, dtype=np.int64)
+        inicio = fim
+    
+    print("\n🧹 Analisando colunas com valores nulos...")
+    threshold = 0.5  # 50% de valores nulos
+    colunas_para_remover = []
+    colunas_para_preencher = []
+    for col, qtd in zip(colunas, contagem_nulos):
+        if qtd > 0:
+            percentual_nulo = qtd / restantes
+            if percentual_nulo > threshold:
+                colunas_para_remover.append(col)
+                print(f"   ❌ {col}: {qtd} nulos ({percentual_nulo*100:.2f}%) - SERÁ REMOVIDA")
+            else:
+                colunas_para_preencher.append(col)
+                print(f"   ⚠️ {col}: {qtd} nulos ({percentual_nulo*100:.2f}%) - SERÁ PREENCHIDA")
+    
+    # 3ª leitura: limpeza de cada bloco e gravação em modo de acréscimo
+    tipo_idade = _tipo_idade(tipos_idade)
+    sexos = pd.Series(dtype='int64')
+    linhas_limpas = colunas_limpas = nulos_restantes = 0
+    inicio = 0
+    with open(saida, 'w', encoding='utf-8', newline='') as arquivo:
+        for i, bloco in enumerate(pd.read_csv(entrada, chunksize=linhas, dtype=tipos, low_memory=False)):
+            if tem_periodo:
+                bloco = _filtrar_periodo(bloco, periodo)
+            fim = inicio + len(bloco)
+            bloco = bloco[manter[inicio:fim]]
+            inicio = fim
+            
+            bloco = bloco.drop(columns=colunas_para_remover)
+            for col in colunas_para_preencher:
+                if bloco[col].dtype == 'object':
+                    bloco[col] = bloco[col].fillna('Não informado')
+                else:
+                    bloco[col] = bloco[col].fillna(-1)
+            if 'PA_SEXO' in bloco.columns:
+                sexos = sexos.add(bloco['PA_SEXO'].value_counts(), fill_value=0)
+            if 'PA_IDADE' in bloco.columns:
+                bloco['PA_IDADE'] = pd.to_numeric(bloco['PA_IDADE'], errors='coerce').astype(tipo_idade)
+                bloco = bloco[(bloco['PA_IDADE'] >= 0) & (bloco['PA_IDADE'] <= 120)]
+            for col in ['PA_VALAPR', 'PA_VALPRO']:
+                if col in bloco.columns:
+                    bloco[col + '_CENT'] = (pd.to_numeric(bloco[col], errors='coerce').fillna(0) * 100).round().astype('int64')
+            
+            bloco.to_csv(arquivo, index=False, header=i == 0)
+            linhas_limpas += len(bloco)
+            colunas_limpas = bloco.shape[1]
+            nulos_restantes += int(bloco.isnull().sum().sum())
+    
+    if colunas_para_remover:
+        print(f"\n   ✅ Removidas {len(colunas_para_remover)} colunas com mais de {threshold*100}% de nulos")
+    if colunas_para_preencher:
+        print(f"\n🧹 Preenchidas {len(colunas_para_preencher)} colunas com menos de {threshold*100}% de nulos")
+    if 'PA_SEXO' in colunas and 'PA_SEXO' not in colunas_para_remover:
+        print("\n📊 Distribuição do campo 'PA_SEXO':")
+        print(f"   {sexos.astype('int64').sort_values(ascending=False, kind='stable').to_dict()}")
+    if 'PA_IDADE' in colunas and 'PA_IDADE' not in colunas_para_remover:
+        print(f"\n🔧 Removidas {restantes - linhas_limpas} linhas com idade inválida")
+    
+    print("\n" + "="*60)
+    print("RESUMO DA LIMPEZA")
+    print("="*60)
+    print(f"📊 Dados originais: {df_original} linhas")
+    print(f"📊 Dados limpos: {linhas_limpas} linhas x {colunas_limpas} colunas")
+    if df_original:
+        print(f"📉 Linhas removidas: {df_original - linhas_limpas} ({((df_original - linhas_limpas)/df_original*100):.2f}%)")
+    print(f"📉 Colunas removidas: {len(colunas_para_remover)}")
+    print(f"✅ Valores nulos restantes: {nulos_restantes}")
+    print(f"\n💾 Dados limpos salvos em '{saida}'")
+    
+    print("\n" + "="*60)
+    print("✅ LIMPEZA CONCLUÍDA!")
+    print("="*60)
 
-colunas_para_remover = []
-colunas_para_preencher = []
+def limpar_dados(entrada='dados_pars.csv', saida='dados_limpos.csv', periodo=PERIODO_PADRAO):
+    """Limpa o CSV extraído e grava os dados limpos; retorna o DataFrame limpo
 
-for col in df.columns:
-    if df[col].isnull().sum() > 0:
-        percentual_nulo = df[col].isnull().sum() / len(df)
-        qtd = df[col].isnull().sum()
+    Se o arquivo não couber no orçamento de memória (ORCAMENTO_MEMORIA), a limpeza
+    é feita em blocos, com o mesmo resultado, e a função retorna None.
+    """
+    print("="*60)
+    print("LIMPEZA DE DADOS")
+    print("="*60)
+    
+    cabe, bytes_linha = csv_cabe_no_orcamento(entrada)
+    if not cabe:
+        return _limpar_em_blocos(entrada, saida, periodo, linhas_por_bloco(bytes_linha))
+    
+    # Carregar dados com low_memory=False para evitar DtypeWarning
+    df = pd.read_csv(entrada, low_memory=False)
+    
+    print(f"\n📊 Dimensões iniciais: {df.shape[0]} linhas x {df.shape[1]} colunas")
+    
+    # 1. Filtrar o período (competências AAAAMM)
+    if 'PA_CMP' in df.columns:
+        print(f"\n🗓️ Filtrando competências de {periodo[0]} a {periodo[1]}...")
+        antes = len(df)
         
-        if percentual_nulo > threshold:
-            colunas_para_remover.append(col)
-            print(f"   ❌ {col}: {qtd} nulos ({percentual_nulo*100:.2f}%) - SERÁ REMOVIDA")
-        else:
-            colunas_para_preencher.append(col)
-            print(f"   ⚠️ {col}: {qtd} nulos ({percentual_nulo*100:.2f}%) - SERÁ PREENCHIDA")
-
-# Remover colunas com muitos nulos
-if colunas_para_remover:
-    df = df.drop(columns=colunas_para_remover)
-    print(f"\n   ✅ Removidas {len(colunas_para_remover)} colunas com mais de {threshold*100}% de nulos")
-
-# Preencher colunas com poucos nulos
-if colunas_para_preencher:
-    print(f"\n🧹 Preenchendo colunas com menos de {threshold*100}% de nulos...")
-    for col in colunas_para_preencher:
-        if df[col].dtype == 'object':
-            df[col] = df[col].fillna('Não informado')
-        else:
-            df[col] = df[col].fillna(-1)
-        print(f"   ✅ {col}: preenchido")
-
-# 4. Verificar campo 'sexo'
-if 'PA_SEXO' in df.columns:
-    print("\n📊 Distribuição do campo 'PA_SEXO':")
-    valores_sexo = df['PA_SEXO'].value_counts().to_dict()
-    print(f"   {valores_sexo}")
-    print("   ✅ Valores mantidos como estão no dataset original")
-
-# 5. Remover idades inválidas (se existir)
-if 'PA_IDADE' in df.columns:
-    print("\n🔧 Removendo idades inválidas...")
-    antes = len(df)
+        # Converter PA_CMP para string e comparar os seis primeiros dígitos (AAAAMM)
+        df['PA_CMP'] = df['PA_CMP'].astype(str)
+        df = df[df['PA_CMP'].str[:6].between(periodo[0], periodo[1])]
+        
+        print(f"   ✅ Mantidos apenas dados de {periodo[0]} a {periodo[1]}")
+        print(f"   ✅ Removidas {antes - len(df)} linhas de outros períodos")
+    else:
+        print("\n   ⚠️ Coluna 'PA_CMP' não encontrada - filtro de período não aplicado")
     
-    # Converter PA_IDADE para numérico se não for
-    df['PA_IDADE'] = pd.to_numeric(df['PA_IDADE'], errors='coerce')
+    # 2. Remover duplicatas
+    print("\n🧹 Removendo duplicatas...")
+    df_original = len(df)
+    df = df.drop_duplicates()
+    print(f"   ✅ Removidas {df_original - len(df)} linhas duplicadas")
     
-    # Remover idades inválidas
-    df = df[(df['PA_IDADE'] >= 0) & (df['PA_IDADE'] <= 120)]
-    print(f"   ✅ Removidas {antes - len(df)} linhas com idade inválida")
-
-# 6. Resumo da limpeza
-print("\n" + "="*60)
-print("RESUMO DA LIMPEZA")
-print("="*60)
-print(f"📊 Dados originais: {df_original} linhas")
-print(f"📊 Dados limpos: {len(df)} linhas x {df.shape[1]} colunas")
-print(f"📉 Linhas removidas: {df_original - len(df)} ({((df_original - len(df))/df_original*100):.2f}%)")
-print(f"📉 Colunas removidas: {len(colunas_para_remover)}")
-print(f"✅ Valores nulos restantes: {df.isnull().sum().sum()}")
-
-# 7. Salvar dados limpos
-df.to_csv('dados_limpos.csv', index=False)
-print(f"\n💾 Dados limpos salvos em 'dados_limpos.csv'")
+    # 3. Remover colunas com muitos valores nulos (>50%)
+    print("\n🧹 Analisando colunas com valores nulos...")
+    threshold = 0.5  # 50% de valores nulos
+    
+    colunas_para_remover = []
+    colunas_para_preencher = []
+    
+    for col in df.columns:
+        if df[col].isnull().sum() > 0:
+            percentual_nulo = df[col].isnull().sum() / len(df)
+            qtd = df[col].isnull().sum()
+            
+            if percentual_nulo > threshold:
+                colunas_para_remover.append(col)
+                print(f"   ❌ {col}: {qtd} nulos ({percentual_nulo*100:.2f}%) - SERÁ REMOVIDA")
+            else:
+                colunas_para_preencher.append(col)
+                print(f"   ⚠️ {col}: {qtd} nulos ({percentual_nulo*100:.2f}%) - SERÁ PREENCHIDA")
+    
+    # Remover colunas com muitos nulos
+    if colunas_para_remover:
+        df = df.drop(columns=colunas_para_remover)
+        print(f"\n   ✅ Removidas {len(colunas_para_remover)} colunas com mais de {threshold*100}% de nulos")
+    
+    # Preencher colunas com poucos nulos
+    if colunas_para_preencher:
+        print(f"\n🧹 Preenchendo colunas com menos de {threshold*100}% de nulos...")
+        for col in colunas_para_preencher:
+            if df[col].dtype == 'object':
+                df[col] = df[col].fillna('Não informado')
+            else:
+                df[col] = df[col].fillna(-1)
+            print(f"   ✅ {col}: preenchido")
+    
+    # 4. Verificar campo 'sexo'
+    if 'PA_SEXO' in df.columns:
+        print("\n📊 Distribuição do campo 'PA_SEXO':")
+        valores_sexo = df['PA_SEXO'].value_counts().to_dict()
+        print(f"   {valores_sexo}")
+        print("   ✅ Valores mantidos como estão no dataset original")
+    
+    # 5. Remover idades inválidas (se existir)
+    if 'PA_IDADE' in df.columns:
+        print("\n🔧 Removendo idades inválidas...")
+        antes = len(df)
+        
+        # Converter PA_IDADE para numérico se não for
+        df['PA_IDADE'] = pd.to_numeric(df['PA_IDADE'], errors='coerce')
+        
+        # Remover idades inválidas
+        df = df[(df['PA_IDADE'] >= 0) & (df['PA_IDADE'] <= 120)]
+        print(f"   ✅ Removidas {antes - len(df)} linhas com idade inválida")
+    
+    # 6. Valores monetários em centavos inteiros (somas exatas nas análises)
+    if 'PA_VALAPR' in df.columns or 'PA_VALPRO' in df.columns:
+        print("\n💰 Convertendo valores monetários para centavos...")
+        for col in ['PA_VALAPR', 'PA_VALPRO']:
+            if col in df.columns:
+                df[col + '_CENT'] = (pd.to_numeric(df[col], errors='coerce').fillna(0) * 100).round().astype('int64')
+                print(f"   ✅ {col}_CENT: criada")
+    
+    # 7. Resumo da limpeza
+    print("\n" + "="*60)
+    print("RESUMO DA LIMPEZA")
+    print("="*60)
+    print(f"📊 Dados originais: {df_original} linhas")
+    print(f"📊 Dados limpos: {len(df)} linhas x {df.shape[1]} colunas")
+    print(f"📉 Linhas removidas: {df_original - len(df)} ({((df_original - len(df))/df_original*100):.2f}%)")
+    print(f"📉 Colunas removidas: {len(colunas_para_remover)}")
+    print(f"✅ Valores nulos restantes: {df.isnull().sum().sum()}")
+    
+    # 8. Salvar dados limpos
+    df.to_csv(saida, index=False)
+    print(f"\n💾 Dados limpos salvos em '{saida}'")
+    
+    print("\n" + "="*60)
+    print("✅ LIMPEZA CONCLUÍDA!")
+    print("="*60)
+    
+    return df
 
-print("\n" + "="*60)
-print("✅ LIMPEZA CONCLUÍDA!")
-print("="*60)
\ No newline at end of file
+if __name__ == "__main__":
+    limpar_dados('dados_pars.csv', 'dados_limpos.csv')
\ No newline at end of file
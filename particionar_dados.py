@@ -0,0 +1,35 @@
+"""
+Grava os dados limpos em Parquet particionado por município e competência, para o motor DuckDB
+
+Uso:
+    python particionar_dados.py                                       # dados_limpos.csv -> particoes/dados_limpos/
+    python particionar_dados.py dados_limpos.csv dados_limpos_sr.csv dados_limpos_ca.csv --destino particoes/regiao
+    python executar_analises.py --motor duckdb --particoes particoes/dados_limpos
+
+Requer o pacote duckdb (pip install duckdb).
+"""
+
+import argparse
+import os
+import time
+
+from utils import imprimir_cabecalho
+from utils.motor_duckdb import PARTICOES_PADRAO, particionar_parquet
+
+def main():
+    parser = argparse.ArgumentParser(description="Grava os CSVs limpos em Parquet particionado (DuckDB)")
+    parser.add_argument('dados', nargs='*', default=['dados_limpos.csv'], help="CSVs de dados limpos")
+    parser.add_argument('--destino', help="Pasta das partições (padrão: particoes/<primeiro CSV>)")
+    parser.add_argument('--por', nargs='+', default=list(PARTICOES_PADRAO), help="Colunas de partição")
+    args = parser.parse_args()
+
+    imprimir_cabecalho("PARTICIONAMENTO DOS DADOS LIMPOS", 60)
+    inicio = time.perf_counter()
+    destino = args.destino or os.path.join('particoes', os.path.splitext(os.path.basename(args.dados[0]))[0])
+    registros = particionar_parquet(args.dados, destino, args.por)
+
+    print(f"\n{registros:,} registros gravados em: {destino} (por {', '.join(args.por)})")
+    print(f"Tempo: {time.perf_counter() - inicio:.2f} s")
+
+if __name__ == "__main__":
+    main()
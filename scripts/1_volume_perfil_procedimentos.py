@@ -1,6 +1,5 @@
 """
 Análise de Volume e Perfil dos Procedimentos
-Município: Ijuí - RS
 """
 
 import sys
@@ -16,17 +15,19 @@ sys.path.insert(0, str(ROOT_DIR))
 
 from utils import *
 
-def main():
+def main(sessao=None):
     # Configuração inicial
+    if sessao is None:
+        sessao = SessaoAnalise()
     configurar_estilo_graficos()
     pasta_graficos = criar_diretorio('graficos/1_volume_perfil_procedimentos')
     
-    imprimir_cabecalho("ANÁLISE: VOLUME E PERFIL DOS PROCEDIMENTOS\nMUNICÍPIO: IJUÍ - RS", 60)
+    imprimir_cabecalho(f"ANÁLISE: VOLUME E PERFIL DOS PROCEDIMENTOS\nMUNICÍPIO: {sessao.nome_municipio.upper()}", 60)
     
     # ========== CARREGAR DADOS ==========
-    df = carregar_csv()
-    df_procedimentos = carregar_procedimentos()
-    df_dim_tempo = carregar_dim_tempo()
+    df = sessao.dados()
+    cubo = sessao.cubo()
+    df_dim_tempo = sessao.dim_tempo()
     
     # Preparar dados temporais
     df = preparar_temporal(df)
@@ -49,18 +50,12 @@ def main():
     # ========== ANÁLISE 2: DISTRIBUIÇÃO POR PROCEDIMENTO ==========
     imprimir_subcabecalho("DISTRIBUIÇÃO POR PROCEDIMENTO", 60)
     
-    # Padronizar código
-    df = padronizar_codigo(df, 'PA_PROC_ID')
-    
-    # Agrupar por procedimento
-    dist_proc = df.groupby('PA_PROC_ID').size().reset_index(name='quantidade')
+    # Agrupar por procedimento (a partir do cubo)
+    dist_proc = cubo.consultar(['PA_PROC_ID'], ['registros']).rename(columns={'registros': 'quantidade'})
     dist_proc = dist_proc.sort_values('quantidade', ascending=False)
     
     # Adicionar descrições
-    dist_proc = adicionar_descricoes(
-        dist_proc, df_procedimentos, 
-        'PA_PROC_ID', 'ip_cod_padrao', 'ip_dscr'
-    )
+    dist_proc['ip_dscr'] = dist_proc['PA_PROC_ID'].map(sessao.descricoes_procedimentos())
     
     # Exibir top 15
     print(f"\nTotal de procedimentos diferentes: {len(dist_proc)}\n")
@@ -81,7 +76,7 @@ def main():
     criar_grafico_barras_horizontal(
         top15['quantidade'].values,
         labels,
-        'Top 15 Procedimentos Ambulatoriais em Ijuí',
+        f'Top 15 Procedimentos Ambulatoriais em {sessao.nome_municipio}',
         'Quantidade',
         f'{pasta_graficos}/distribuicao_especialidades.png',
         color='steelblue'
@@ -90,11 +85,13 @@ def main():
     # ========== ANÁLISE 3: EVOLUÇÃO TEMPORAL ==========
     imprimir_subcabecalho("EVOLUÇÃO TEMPORAL", 60)
     
-    # Merge com dimensão tempo
-    df_temporal = df.merge(df_dim_tempo, on='anomes', how='left', suffixes=('', '_dim'))
+    # Quantidade por competência (a partir do cubo) com a dimensão tempo
+    por_competencia = cubo.consultar(['PA_CMP'], ['registros']).rename(columns={'registros': 'quantidade'})
+    df_temporal = por_competencia.merge(df_dim_tempo, left_on='PA_CMP', right_on='anomes', how='left')
+    df_temporal = df_temporal.rename(columns={'ano': 'ano_dim'})
     
     # Evolução mensal (remover duplicatas)
-    evolucao_mensal = df_temporal.groupby(['ano_dim', 'mes', 'mesext']).size().reset_index(name='quantidade')
+    evolucao_mensal = df_temporal.groupby(['ano_dim', 'mes', 'mesext'])['quantidade'].sum().reset_index()
     evolucao_mensal = evolucao_mensal.sort_values(['ano_dim', 'mes']).drop_duplicates()
     
     print("\nÚltimos 12 meses:")
@@ -104,7 +101,7 @@ def main():
         print(f"  {row['mesext']}/{ano_str}: {row['quantidade']:>8,} procedimentos")
     
     # Evolução trimestral
-    evolucao_trimestral = df_temporal.groupby(['anotri', 'triex_t']).size().reset_index(name='quantidade')
+    evolucao_trimestral = df_temporal.groupby(['anotri', 'triex_t'])['quantidade'].sum().reset_index()
     evolucao_trimestral = evolucao_trimestral.sort_values('anotri').drop_duplicates()
     
     print("\n\nÚltimos trimestres:")
@@ -150,7 +147,42 @@ def main():
         mostrar_limites=True
     )
     
+    # ========== ANÁLISE 4: GRUPOS E SUBGRUPOS SIGTAP ==========
+    imprimir_subcabecalho("DISTRIBUIÇÃO POR GRUPO SIGTAP", 60)
+    
+    # Níveis da hierarquia materializados no cubo (sem varrer os registros)
+    por_grupo = cubo.consultar(['PROC_GRUPO'], ['registros']).rename(columns={'registros': 'quantidade'})
+    por_grupo = por_grupo.sort_values('quantidade', ascending=False)
+    por_grupo['nome'] = por_grupo['PROC_GRUPO'].map(nome_grupo)
+    
+    print()
+    for _, row in por_grupo.iterrows():
+        perc = (row['quantidade']/len(df)*100)
+        print(f"{row['PROC_GRUPO']} - {truncar_texto(row['nome'], 46):<46} {row['quantidade']:>10,} ({perc:.2f}%)")
+    
+    if not por_grupo.empty:
+        # Detalhamento do grupo com mais procedimentos por subgrupo
+        grupo_principal = por_grupo['PROC_GRUPO'].iloc[0]
+        por_subgrupo = cubo.consultar(['PROC_SUBGRUPO'], ['registros'], filtros={'PROC_GRUPO': grupo_principal})
+        por_subgrupo = top_k(por_subgrupo, 'registros', 10)
+    
+        print(f"\nSubgrupos do grupo {grupo_principal} ({nome_grupo(grupo_principal)}):")
+        print("-" * 60)
+        for _, row in por_subgrupo.iterrows():
+            print(f"  {row['PROC_SUBGRUPO']}: {row['registros']:>10,}")
+    
+        # Gráfico 3: Procedimentos por Grupo SIGTAP
+        criar_grafico_barras_horizontal(
+            por_grupo['quantidade'].values,
+            [f"{row['PROC_GRUPO']} - {truncar_texto(row['nome'], 40)}" for _, row in por_grupo.iterrows()],
+            'Procedimentos por Grupo SIGTAP',
+            'Quantidade',
+            f'{pasta_graficos}/grupos_sigtap.png',
+            color='steelblue'
+        )
+    
     imprimir_cabecalho("ANÁLISE CONCLUÍDA!", 60)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
+    finalizar_instrumentacao(Path(__file__).stem)
\ No newline at end of file
@@ -1,6 +1,5 @@
 """
 Análise de Produção por Estabelecimento de Saúde
-Município: Ijuí - RS
 """
 import sys
 from pathlib import Path
@@ -15,28 +14,24 @@ sys.path.insert(0, str(ROOT_DIR))
 
 from utils import *
 
-def main():
+def main(sessao=None):
     # Configuração inicial
+    if sessao is None:
+        sessao = SessaoAnalise()
     configurar_estilo_graficos()
     pasta_graficos = criar_diretorio('graficos/2_producao_estabelecimentos')
     
-    imprimir_cabecalho("ANÁLISE: PRODUÇÃO POR ESTABELECIMENTO DE SAÚDE\nMUNICÍPIO: IJUÍ - RS", 60)
+    imprimir_cabecalho(f"ANÁLISE: PRODUÇÃO POR ESTABELECIMENTO DE SAÚDE\nMUNICÍPIO: {sessao.nome_municipio.upper()}", 60)
     
     # ========== CARREGAR DADOS ==========
-    df = carregar_csv()
-    df_estabelecimentos = carregar_estabelecimentos()
-    
-    # Padronizar CNES
-    df = padronizar_codigo(df, 'PA_CODUNI', tamanho=7)
+    cubo = sessao.cubo()
+    df_estabelecimentos = sessao.estabelecimentos()
     
     # ========== ANÁLISE 1: RANKING DE PRODUÇÃO ==========
     imprimir_subcabecalho("RANKING DE PRODUÇÃO DOS ESTABELECIMENTOS", 60)
     
-    # Agrupar por estabelecimento
-    producao_estab = df.groupby('PA_CODUNI').agg({
-        'PA_QTDAPR': 'sum',
-        'PA_QTDPRO': 'sum'
-    }).reset_index()
+    # Agrupar por estabelecimento (a partir do cubo)
+    producao_estab = cubo.consultar(['PA_CODUNI'], ['PA_QTDAPR', 'PA_QTDPRO'])
     
     producao_estab.columns = ['cnes', 'aprovados', 'produzidos']
     
@@ -56,8 +51,8 @@ def main():
         on='cnes', how='left', suffixes=('', '_extra')
     )
     
-    # Ordenar por produzidos
-    producao_com_nome = producao_com_nome.sort_values('produzidos', ascending=False)
+    # Top 15 por produzidos (seleção parcial, sem ordenar todos os estabelecimentos)
+    top15 = top_k(producao_com_nome, 'produzidos', 15)
     
     print(f"\nTotal de estabelecimentos: {len(producao_com_nome)}")
     print("\nTop 15 Estabelecimentos por Volume de Produção:")
@@ -65,7 +60,7 @@ def main():
     print(f"{'#':<3} {'CNES':<10} {'Nome':<45} {'Aprovados':>12} {'Produzidos':>12} {'Taxa':>8} {'Diferença':>12}")
     print("-" * 120)
     
-    for idx, (_, row) in enumerate(producao_com_nome.head(15).iterrows(), 1):
+    for idx, (_, row) in enumerate(top15.iterrows(), 1):
         nome = row['fantasia'] if pd.notna(row['fantasia']) else row['raz_soci'] if pd.notna(row['raz_soci']) else 'Nome não encontrado'
         nome = truncar_texto(nome, 45)
         
@@ -102,7 +97,7 @@ def main():
         print("-" * 110)
         print(f"{'Nome':<45} {'Taxa':>8} {'Aprovados':>12} {'Produzidos':>12} {'Diferença':>12}")
         print("-" * 110)
-        for _, row in baixa_producao.head(10).iterrows():
+        for _, row in top_k(baixa_producao, 'produzidos', 10).iterrows():
             nome = row['fantasia'] if pd.notna(row['fantasia']) else row['raz_soci'] if pd.notna(row['raz_soci']) else 'Nome não encontrado'
             nome = truncar_texto(nome, 45)
             print(f"{nome:<45} {row['taxa_producao']:>7.1f}% {row['aprovados']:>12,} {row['produzidos']:>12,} {row['diferenca']:>12,}")
@@ -115,7 +110,7 @@ def main():
         print("-" * 110)
         print(f"{'Nome':<45} {'Taxa':>8} {'Aprovados':>12} {'Produzidos':>12} {'Diferença':>12}")
         print("-" * 110)
-        for _, row in alta_producao.head(10).iterrows():
+        for _, row in top_k(alta_producao, 'produzidos', 10).iterrows():
             nome = row['fantasia'] if pd.notna(row['fantasia']) else row['raz_soci'] if pd.notna(row['raz_soci']) else 'Nome não encontrado'
             nome = truncar_texto(nome, 45)
             print(f"{nome:<45} {row['taxa_producao']:>7.1f}% {row['aprovados']:>12,} {row['produzidos']:>12,} {row['diferenca']:>12,}")
@@ -130,7 +125,6 @@ def main():
     # ========== GRÁFICOS ==========
     
     # Gráfico 1: Ranking - Aprovados vs Produzidos
-    top15 = producao_com_nome.head(15)
     labels = [truncar_texto(row['fantasia'] if pd.notna(row['fantasia']) else row['raz_soci'], 35) 
               for _, row in top15.iterrows()]
     
@@ -145,7 +139,7 @@ def main():
     )
     
     # Gráfico 2: Taxa de Produção
-    import matplotlib.pyplot as plt
+    plt = pyplot()
     
     plt.figure(figsize=(14, 8))
     
@@ -170,4 +164,5 @@ def main():
     imprimir_cabecalho("ANÁLISE CONCLUÍDA!", 60)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
+    finalizar_instrumentacao(Path(__file__).stem)
\ No newline at end of file
@@ -1,6 +1,5 @@
 """
 Análise do Perfil Demográfico e Epidemiológico
-Município: Ijuí - RS
 """
 import sys
 from pathlib import Path
@@ -15,38 +14,26 @@ sys.path.insert(0, str(ROOT_DIR))
 
 from utils import *
 
-def preparar_faixas_etarias(df):
-    """Cria faixas etárias de 5 em 5 anos"""
-    bins = list(range(0, 101, 5)) + [150]
-    labels = [f'{i}-{i+4}' for i in range(0, 100, 5)] + ['100+']
-    df['Faixa_Etaria'] = pd.cut(df['PA_IDADE'], bins=bins, labels=labels, right=False)
-    return df
-
-def preparar_sexo(df):
-    """Mapeia valores de sexo"""
-    sexo_map = {'M': 'Masculino', 'F': 'Feminino', 0: 'Não Informado', '0': 'Não Informado'}
-    df['Sexo_Label'] = df['PA_SEXO'].map(sexo_map)
-    return df
-
-def main():
+def main(sessao=None):
     # Configuração inicial
+    if sessao is None:
+        sessao = SessaoAnalise()
     configurar_estilo_graficos()
     pasta_graficos = criar_diretorio('graficos/3_perfil_demografico_epidemiologico')
     
     imprimir_cabecalho("PERFIL DEMOGRÁFICO E EPIDEMIOLÓGICO DA POPULAÇÃO ATENDIDA", 80)
     
     # ========== CARREGAR DADOS ==========
-    df = carregar_csv()
+    df = sessao.dados()
     
-    # Preparar dados
-    df = preparar_sexo(df)
-    df = preparar_faixas_etarias(df)
+    # Histograma faixa etária (5 em 5 anos) × sexo em uma única contagem
+    histograma = HistogramaDemografico.construir(df)
     
     # ========== ANÁLISE 1: DISTRIBUIÇÃO POR SEXO ==========
     imprimir_subcabecalho("DISTRIBUIÇÃO POR SEXO", 80)
     
-    sexo_counts = df['Sexo_Label'].value_counts()
-    sexo_percentual = df['Sexo_Label'].value_counts(normalize=True) * 100
+    sexo_counts = histograma.por_sexo()
+    sexo_percentual = sexo_counts / sexo_counts.sum() * 100
     
     print(f"\nTotal de registros: {len(df):,}")
     print("\nDistribuição:")
@@ -66,8 +53,8 @@ def main():
     # ========== ANÁLISE 2: DISTRIBUIÇÃO POR FAIXA ETÁRIA ==========
     imprimir_subcabecalho("DISTRIBUIÇÃO POR FAIXA ETÁRIA (5 em 5 anos)", 80)
     
-    faixa_etaria_counts = df['Faixa_Etaria'].value_counts().sort_index()
-    faixa_etaria_percentual = df['Faixa_Etaria'].value_counts(normalize=True).sort_index() * 100
+    faixa_etaria_counts = histograma.por_faixa()
+    faixa_etaria_percentual = faixa_etaria_counts / faixa_etaria_counts.sum() * 100
     
     print("\nDistribuição por faixa etária:")
     for faixa, count in faixa_etaria_counts.items():
@@ -87,7 +74,7 @@ def main():
     # ========== ANÁLISE 3: ESTATÍSTICAS DESCRITIVAS DA IDADE ==========
     imprimir_subcabecalho("ESTATÍSTICAS DESCRITIVAS DA IDADE", 80)
     
-    stats_idade = calcular_estatisticas_basicas(df, 'PA_IDADE')
+    stats_idade = calcular_estatisticas_basicas(sessao.tabela(), 'PA_IDADE')
     
     print(f"\nIdade média: {stats_idade['media']:.2f} anos")
     print(f"Mediana: {stats_idade['mediana']:.2f} anos")
@@ -96,7 +83,7 @@ def main():
     print(f"Idade máxima: {stats_idade['max']:.0f} anos")
     
     print("\nIdade média por sexo:")
-    idade_por_sexo = df.groupby('Sexo_Label')['PA_IDADE'].mean()
+    idade_por_sexo = histograma.idade_media_por_sexo().sort_index()
     for sexo, idade_media in idade_por_sexo.items():
         print(f"  {sexo}: {idade_media:.2f} anos")
     
@@ -104,10 +91,10 @@ def main():
     imprimir_subcabecalho("DISTRIBUIÇÃO POR SEXO E FAIXA ETÁRIA", 80)
     
     # Gráfico 3: Barras agrupadas - Sexo por Faixa Etária
-    import matplotlib.pyplot as plt
+    plt = pyplot()
     
     plt.figure(figsize=(14, 8))
-    crosstab_plot = pd.crosstab(df['Faixa_Etaria'], df['Sexo_Label'])
+    crosstab_plot = histograma.faixa_sexo().sort_index(axis=1)
     crosstab_plot.plot(kind='bar', color=['#3498db', '#95a5a6', '#e74c3c'])
     plt.title('Distribuição por Sexo e Faixa Etária', fontsize=16, fontweight='bold', pad=20)
     plt.xlabel('Faixa Etária (anos)', fontsize=12)
@@ -121,26 +108,27 @@ def main():
     # ========== ANÁLISE 5: IDENTIFICAR GRUPOS PREDOMINANTES ==========
     imprimir_subcabecalho("GRUPOS PREDOMINANTES", 80)
     
-    # Top 5 faixas etárias - CORRIGIDO: ordenar por quantidade
-    faixa_etaria_por_qtd = df['Faixa_Etaria'].value_counts()  # Já ordena por quantidade decrescente
-    top5_faixas = faixa_etaria_por_qtd.head(5)
+    # Top 5 faixas etárias, por quantidade
+    top5_faixas = faixa_etaria_counts.sort_values(ascending=False, kind='stable').head(5)
     
     print("\nTop 5 Faixas Etárias mais atendidas:")
     for i, (faixa, count) in enumerate(top5_faixas.items(), 1):
         perc = (count / len(df)) * 100
         print(f"  {i}. {faixa} anos: {count:,} ({perc:.2f}%)")
     
-    # Distribuição por sexo nas top 5 faixas
+    # Distribuição por sexo nas top 5 faixas (linhas da mesma tabela faixa × sexo)
+    piramide = histograma.faixa_sexo()
     print("\nDistribuição por sexo nas faixas etárias predominantes:")
     for faixa in top5_faixas.index[:3]:  # Top 3 apenas para detalhar
-        df_faixa = df[df['Faixa_Etaria'] == faixa]
-        sexo_dist = df_faixa['Sexo_Label'].value_counts()
+        sexo_dist = piramide.loc[faixa].sort_values(ascending=False, kind='stable')
+        sexo_dist = sexo_dist[sexo_dist > 0]
         print(f"\n  {faixa} anos:")
         for sexo, count in sexo_dist.items():
-            perc = (count / len(df_faixa)) * 100
+            perc = (count / sexo_dist.sum()) * 100
             print(f"    {sexo}: {count:,} ({perc:.2f}%)")
     
     imprimir_cabecalho("✓ ANÁLISE CONCLUÍDA!", 80)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
+    finalizar_instrumentacao(Path(__file__).stem)
\ No newline at end of file
@@ -1,6 +1,5 @@
 """
 Análise de Fluxos Regionais e Acesso aos Serviços
-Município: Ijuí - RS
 """
 
 import sys
@@ -16,66 +15,69 @@ sys.path.insert(0, str(ROOT_DIR))
 
 from utils import *
 
-CODIGO_IJUI = '431020'
+# Quantidade de estabelecimentos na tabela de origem (o custo não depende deste valor)
+TOP_ESTABELECIMENTOS_FLUXO = 5
 
-def main():
+def main(sessao=None):
     # Configuração inicial
+    if sessao is None:
+        sessao = SessaoAnalise()
     configurar_estilo_graficos()
     pasta_graficos = criar_diretorio('graficos/4_fluxos_regionais_acessos')
     
     imprimir_cabecalho("FLUXOS REGIONAIS E ACESSO AOS SERVIÇOS DE SAÚDE", 80)
     
-    # ========== CARREGAR DADOS ==========
-    df = carregar_csv()
-    df_municipios = carregar_municipios()
-    df_estabelecimentos = carregar_estabelecimentos()
+    # Município analisado (padrão da sessão: Ijuí)
+    codigo_local = sessao.codigo_municipio
+    nome_local = sessao.nome_municipio
     
-    # Padronizar códigos
-    df = padronizar_codigo(df, 'PA_CODUNI', tamanho=7)
-    df = padronizar_codigo(df, 'PA_MUNPCN', tamanho=6)
+    # ========== CARREGAR DADOS ==========
+    df = sessao.dados()
+    df_municipios = sessao.municipios()
+    df_estabelecimentos = sessao.estabelecimentos()
     
-    # Adicionar informações dos municípios
-    df = adicionar_descricoes(df, df_municipios, 'PA_MUNPCN', 'co_municip', 'ds_nome')
+    nomes_municipios = df_municipios.drop_duplicates('co_municip').set_index('co_municip')['ds_nome']
+    nomes_estabelecimentos = df_estabelecimentos.drop_duplicates('cnes').set_index('cnes')['fantasia']
     
-    # Adicionar informações dos estabelecimentos
-    df = adicionar_descricoes(df, df_estabelecimentos, 'PA_CODUNI', 'cnes', 'fantasia')
+    # Matrizes de fluxo: origem × município de atendimento e origem × estabelecimento
+    fluxos = MatrizFluxos.construir(df)
+    fluxos_estab = MatrizFluxos.construir(df, destino='PA_CODUNI')
     
-    # Identificar origem (Ijuí ou outros)
-    df['origem_ijui'] = df['PA_MUNPCN'] == CODIGO_IJUI
+    # Origem dos pacientes de cada estabelecimento (local ou outros), em uma única tabela
+    origem_por_estab = fluxos_estab.tabular_origens({codigo_local: nome_local}, padrao='Outros')
     
     # ========== ANÁLISE 1: MUNICÍPIOS DE ORIGEM ==========
     imprimir_subcabecalho("MUNICÍPIOS DE ORIGEM DOS PACIENTES", 80)
     
-    origem_counts = df.groupby(['PA_MUNPCN', 'ds_nome']).size().reset_index(name='quantidade')
-    origem_counts = origem_counts.sort_values('quantidade', ascending=False)
+    origem_counts = fluxos.saidas()
+    total_atend = int(origem_counts.sum())
     
-    print(f"\nTotal de atendimentos: {len(df):,}")
-    print(f"Total de municípios distintos: {df['PA_MUNPCN'].nunique():,}\n")
+    print(f"\nTotal de atendimentos: {total_atend:,}")
+    print(f"Total de municípios distintos: {len(origem_counts):,}\n")
     
     print("Top 20 municípios de origem:")
-    for idx, (_, row) in enumerate(origem_counts.head(20).iterrows(), 1):
-        nome = row['ds_nome'] if pd.notna(row['ds_nome']) else 'Nome não encontrado'
-        perc = (row['quantidade'] / len(df)) * 100
-        marcador = "*" if row['PA_MUNPCN'] == CODIGO_IJUI else " "
-        print(f"{marcador} {idx:2}. {nome:<30} ({row['PA_MUNPCN']}): {row['quantidade']:>7,} ({perc:>5.2f}%)")
+    for idx, (codigo, quantidade) in enumerate(origem_counts.head(20).items(), 1):
+        nome = nomes_municipios.get(codigo, 'Nome não encontrado')
+        perc = (quantidade / total_atend) * 100
+        marcador = "*" if codigo == codigo_local else " "
+        print(f"{marcador} {idx:2}. {nome:<30} ({codigo}): {quantidade:>7,} ({perc:>5.2f}%)")
     
     # ========== ANÁLISE 2: ATENDIMENTOS POR ORIGEM ==========
-    imprimir_subcabecalho("ATENDIMENTOS POR ORIGEM (IJUÍ vs OUTROS MUNICÍPIOS)", 80)
+    imprimir_subcabecalho(f"ATENDIMENTOS POR ORIGEM ({nome_local.upper()} vs OUTROS MUNICÍPIOS)", 80)
     
-    atend_ijui = df[df['origem_ijui']].shape[0]
-    atend_outros = df[~df['origem_ijui']].shape[0]
-    total_atend = len(df)
+    atend_local = int(origem_counts.get(codigo_local, 0))
+    atend_outros = total_atend - atend_local
     
-    perc_ijui = (atend_ijui / total_atend) * 100
+    perc_local = (atend_local / total_atend) * 100
     perc_outros = (atend_outros / total_atend) * 100
     
-    print(f"\nAtendimentos de moradores de Ijuí: {atend_ijui:,} ({perc_ijui:.2f}%)")
+    print(f"\nAtendimentos de moradores de {nome_local}: {atend_local:,} ({perc_local:.2f}%)")
     print(f"Atendimentos de outros municípios: {atend_outros:,} ({perc_outros:.2f}%)")
     
     # Gráfico 1: Pizza - Origem dos Pacientes
     criar_grafico_pizza(
-        [atend_ijui, atend_outros],
-        ['Ijuí', 'Outros Municípios'],
+        [atend_local, atend_outros],
+        [nome_local, 'Outros Municípios'],
         'Origem dos Pacientes Atendidos',
         f'{pasta_graficos}/origem_pacientes.png',
         colors=['#3498db', '#e74c3c']
@@ -84,13 +86,13 @@ def main():
     # ========== ANÁLISE 3: ESTABELECIMENTOS MAIS PROCURADOS ==========
     imprimir_subcabecalho("ESTABELECIMENTOS MAIS PROCURADOS", 80)
     
-    estab_counts = df.groupby(['PA_CODUNI', 'fantasia']).size().reset_index(name='quantidade')
-    estab_counts = estab_counts.sort_values('quantidade', ascending=False)
+    estab_counts = fluxos_estab.entradas().rename_axis('PA_CODUNI').reset_index(name='quantidade')
+    estab_counts['fantasia'] = estab_counts['PA_CODUNI'].map(nomes_estabelecimentos)
     
     print("\nTop 10 estabelecimentos:")
     for idx, (_, row) in enumerate(estab_counts.head(10).iterrows(), 1):
         nome = truncar_texto(row['fantasia'], 50) if pd.notna(row['fantasia']) else 'Nome não encontrado'
-        perc = (row['quantidade'] / len(df)) * 100
+        perc = (row['quantidade'] / total_atend) * 100
         print(f"{idx:2}. {nome:<50} {row['quantidade']:>7,} ({perc:>5.2f}%)")
     
     # Gráfico 2: Top 10 Estabelecimentos
@@ -110,37 +112,29 @@ def main():
     # ========== ANÁLISE 4: FLUXO POR ESTABELECIMENTO E ORIGEM ==========
     imprimir_subcabecalho("FLUXO POR ESTABELECIMENTO E ORIGEM", 80)
     
-    # Top 5 estabelecimentos - analisar origem
-    top5_estab_cnes = estab_counts.head(5)['PA_CODUNI'].tolist()
+    top_estab = estab_counts.head(TOP_ESTABELECIMENTOS_FLUXO)
+    origem_top = origem_por_estab.reindex(top_estab['PA_CODUNI'], fill_value=0)
     
-    print("\nDistribuição Ijuí vs Outros nos Top 5 estabelecimentos:")
+    print(f"\nDistribuição {nome_local} vs Outros nos Top {TOP_ESTABELECIMENTOS_FLUXO} estabelecimentos:")
     print("-" * 90)
-    print(f"{'Estabelecimento':<50} {'Ijuí':>10} {'Outros':>10} {'Total':>10}")
+    print(f"{'Estabelecimento':<50} {truncar_texto(nome_local, 10):>10} {'Outros':>10} {'Total':>10}")
     print("-" * 90)
     
-    for cnes in top5_estab_cnes:
-        df_estab = df[df['PA_CODUNI'] == cnes]
-        nome = df_estab['fantasia'].iloc[0] if pd.notna(df_estab['fantasia'].iloc[0]) else 'Sem nome'
-        nome = truncar_texto(nome, 50)
-        
-        ijui_count = df_estab[df_estab['origem_ijui']].shape[0]
-        outros_count = df_estab[~df_estab['origem_ijui']].shape[0]
-        total = len(df_estab)
-        
-        print(f"{nome:<50} {ijui_count:>10,} {outros_count:>10,} {total:>10,}")
+    for fantasia, (_, row) in zip(top_estab['fantasia'], origem_top.iterrows()):
+        nome = truncar_texto(fantasia if pd.notna(fantasia) else 'Sem nome', 50)
+        print(f"{nome:<50} {row[nome_local]:>10,} {row['Outros']:>10,} {row['Total']:>10,}")
     
     # ========== ANÁLISE 5: TOP MUNICÍPIOS EXTERNOS ==========
-    imprimir_subcabecalho("MUNICÍPIOS EXTERNOS QUE MAIS UTILIZAM IJUÍ", 80)
+    imprimir_subcabecalho(f"MUNICÍPIOS EXTERNOS QUE MAIS UTILIZAM {nome_local.upper()}", 80)
     
-    df_externos = df[~df['origem_ijui']]
-    externos_counts = df_externos.groupby(['PA_MUNPCN', 'ds_nome']).size().reset_index(name='quantidade')
-    externos_counts = externos_counts.sort_values('quantidade', ascending=False)
+    externos_counts = fluxos.principais_origens(n=15, excluir_local=True)
+    externos_counts = externos_counts[externos_counts['destino'] == codigo_local]
+    externos_counts = externos_counts.assign(ds_nome=externos_counts['origem'].map(nomes_municipios))
     
     print("\nTop 15 municípios externos:")
-    for idx, (_, row) in enumerate(externos_counts.head(15).iterrows(), 1):
+    for _, row in externos_counts.iterrows():
         nome = row['ds_nome'] if pd.notna(row['ds_nome']) else 'Nome não encontrado'
-        perc = (row['quantidade'] / len(df_externos)) * 100
-        print(f"{idx:2}. {nome:<30} ({row['PA_MUNPCN']}): {row['quantidade']:>6,} ({perc:>5.2f}%)")
+        print(f"{row['posicao']:2}. {nome:<30} ({row['origem']}): {row['registros']:>6,} ({row['participacao']:>5.2f}%)")
     
     # Gráfico 3: Top 10 Municípios Externos
     top10_externos = externos_counts.head(10)
@@ -148,9 +142,9 @@ def main():
               for _, row in top10_externos.iterrows()]
     
     criar_grafico_barras_horizontal(
-        top10_externos['quantidade'].values,
+        top10_externos['registros'].values,
         labels,
-        'Top 10 Municípios Externos que Mais Utilizam Ijuí',
+        f'Top 10 Municípios Externos que Mais Utilizam {nome_local}',
         'Quantidade de Atendimentos',
         f'{pasta_graficos}/top_municipios_externos.png',
         color='#e74c3c'
@@ -159,4 +153,5 @@ def main():
     imprimir_cabecalho("ANÁLISE CONCLUÍDA!", 80)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
+    finalizar_instrumentacao(Path(__file__).stem)
\ No newline at end of file
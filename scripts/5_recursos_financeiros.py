@@ -1,6 +1,5 @@
 """
 Análise de Recursos Financeiros
-Município: Ijuí - RS
 """
 
 import sys
@@ -16,46 +15,65 @@ sys.path.insert(0, str(ROOT_DIR))
 
 from utils import *
 
-def main():
+def main(sessao=None):
     # Configuração inicial
+    if sessao is None:
+        sessao = SessaoAnalise()
     configurar_estilo_graficos()
     pasta_graficos = criar_diretorio('graficos/5_recursos_financeiros')
     
     imprimir_cabecalho("ANÁLISE DE RECURSOS FINANCEIROS", 80)
     
     # ========== CARREGAR DADOS ==========
-    df = carregar_csv()
-    df_procedimentos = carregar_procedimentos()
-    df_dim_tempo = carregar_dim_tempo()
+    df = sessao.dados()
+    cubo = sessao.cubo()
     
-    # Padronizar código de procedimento
-    df = padronizar_codigo(df, 'PA_PROC_ID')
+    # Faixas de valor (em reais; a classificação é feita sobre os centavos)
+    faixas = [0, 10, 50, 100, 500, 1000, float('inf')]
+    labels_faixas = ['Até R$ 10', 'R$ 10-50', 'R$ 50-100', 'R$ 100-500', 'R$ 500-1000', 'Acima R$ 1000']
+    
+    # Totais, competência, procedimento e grupo SIGTAP vêm do cubo (valores em centavos inteiros)
+    medidas_cubo = ['PA_VALAPR_CENT', 'PA_VALPRO_CENT', 'registros']
+    totais = cubo.consultar([], medidas_cubo).iloc[0]
+    por_competencia = preparar_competencia(cubo.consultar(['PA_CMP'], medidas_cubo))
+    por_procedimento = cubo.consultar(['PA_PROC_ID'], medidas_cubo)
+    por_grupo = cubo.consultar(['PROC_GRUPO'], medidas_cubo)
+    
+    # A faixa depende do valor de cada registro
+    quantidade_faixa, valor_faixa = somar_por_faixa(df['PA_VALAPR_CENT'].to_numpy(), faixas)
+    dist_faixas = pd.DataFrame({
+        'Faixa_Valor': labels_faixas,
+        'Valor_Aprovado': valor_faixa,
+        'Quantidade': quantidade_faixa,
+    })
+    dist_faixas = dist_faixas[dist_faixas['Quantidade'] > 0].reset_index(drop=True)
     
     # ========== ANÁLISE 1: TOTAL DE VALORES APROVADOS E PRODUZIDOS ==========
     imprimir_subcabecalho("VALORES TOTAIS APROVADOS VS PRODUZIDOS", 80)
     
-    total_aprovado = df['PA_VALAPR'].sum()
-    total_produzido = df['PA_VALPRO'].sum()
+    total_aprovado = int(totais['PA_VALAPR_CENT'])
+    total_produzido = int(totais['PA_VALPRO_CENT'])
+    total_registros = int(totais['registros'])
     diferenca = total_produzido - total_aprovado
     percentual_diferenca = (diferenca / total_aprovado) * 100
     
-    print(f"\nTotal de registros analisados: {len(df):,}")
-    print(f"\nValor Total Aprovado (SUS): {formatar_valor_monetario(total_aprovado)}")
-    print(f"Valor Total Produzido:      {formatar_valor_monetario(total_produzido)}")
-    print(f"Diferença:                  {formatar_valor_monetario(diferenca)}")
+    print(f"\nTotal de registros analisados: {total_registros:,}")
+    print(f"\nValor Total Aprovado (SUS): {formatar_centavos(total_aprovado)}")
+    print(f"Valor Total Produzido:      {formatar_centavos(total_produzido)}")
+    print(f"Diferença:                  {formatar_centavos(diferenca)}")
     print(f"Percentual da diferença:    {percentual_diferenca:+.2f}%")
     
     if diferenca > 0:
-        print(f"\nO valor produzido SUPEROU o valor aprovado em {formatar_valor_monetario(diferenca)}")
+        print(f"\nO valor produzido SUPEROU o valor aprovado em {formatar_centavos(diferenca)}")
     elif diferenca < 0:
-        print(f"\nO valor produzido ficou ABAIXO do aprovado em {formatar_valor_monetario(abs(diferenca))}")
+        print(f"\nO valor produzido ficou ABAIXO do aprovado em {formatar_centavos(abs(diferenca))}")
     else:
         print("\nValores aprovado e produzido estão EQUILIBRADOS")
     
     # Gráfico 1: Comparação Aprovado vs Produzido
     criar_grafico_barras_vertical(
         ['Aprovado', 'Produzido'],
-        [total_aprovado, total_produzido],
+        de_centavos([total_aprovado, total_produzido]).tolist(),
         'Valores Totais: Aprovado vs Produzido',
         'Valor (R$)',
         f'{pasta_graficos}/01_valores_totais.png',
@@ -65,15 +83,8 @@ def main():
     # ========== ANÁLISE 2: EVOLUÇÃO MENSAL DOS VALORES ==========
     imprimir_subcabecalho("EVOLUÇÃO MENSAL DOS VALORES", 80)
     
-    # Preparar competência
-    df = preparar_competencia(df)
-    
-    # Agrupar por competência
-    evolucao_mensal = df.groupby('Competencia').agg({
-        'PA_VALAPR': 'sum',
-        'PA_VALPRO': 'sum',
-        'PA_CODUNI': 'count'
-    }).reset_index()
+    # Agrupado por competência
+    evolucao_mensal = por_competencia[['Competencia', 'PA_VALAPR_CENT', 'PA_VALPRO_CENT', 'registros']].copy()
     
     evolucao_mensal.columns = ['Competencia', 'Valor_Aprovado', 'Valor_Produzido', 'Quantidade_Procedimentos']
     evolucao_mensal['Diferenca'] = evolucao_mensal['Valor_Produzido'] - evolucao_mensal['Valor_Aprovado']
@@ -84,18 +95,19 @@ def main():
     print(f"{'Competência':<12} {'Aprovado':>15} {'Produzido':>15} {'Diferença':>15} {'%':>8} {'Procedimentos':>15}")
     print("-" * 120)
     for _, row in evolucao_mensal.iterrows():
-        print(f"{row['Competencia']:<12} {row['Valor_Aprovado']:>15,.2f} {row['Valor_Produzido']:>15,.2f} "
-              f"{row['Diferenca']:>15,.2f} {row['Percentual_Diferenca']:>7.2f}% {row['Quantidade_Procedimentos']:>15,}")
+        print(f"{row['Competencia']:<12} {formatar_centavos(row['Valor_Aprovado'], ''):>15} "
+              f"{formatar_centavos(row['Valor_Produzido'], ''):>15} {formatar_centavos(row['Diferenca'], ''):>15} "
+              f"{row['Percentual_Diferenca']:>7.2f}% {row['Quantidade_Procedimentos']:>15,}")
     
     # Gráfico 2: Evolução Temporal dos Valores
-    import matplotlib.pyplot as plt
+    plt = pyplot()
     
     plt.figure(figsize=(16, 8))
     x = range(len(evolucao_mensal))
     
-    plt.plot(x, evolucao_mensal['Valor_Aprovado'], marker='o', linewidth=2, 
+    plt.plot(x, de_centavos(evolucao_mensal['Valor_Aprovado']), marker='o', linewidth=2, 
              label='Aprovado', color='#3498db')
-    plt.plot(x, evolucao_mensal['Valor_Produzido'], marker='s', linewidth=2, 
+    plt.plot(x, de_centavos(evolucao_mensal['Valor_Produzido']), marker='s', linewidth=2, 
              label='Produzido', color='#2ecc71')
     
     plt.xticks(x, evolucao_mensal['Competencia'], rotation=45, ha='right')
@@ -110,8 +122,8 @@ def main():
     # ========== ANÁLISE 3: GASTO MÉDIO POR PROCEDIMENTO ==========
     imprimir_subcabecalho("GASTO MÉDIO POR PROCEDIMENTO", 80)
     
-    evolucao_mensal['Gasto_Medio_Aprovado'] = evolucao_mensal['Valor_Aprovado'] / evolucao_mensal['Quantidade_Procedimentos']
-    evolucao_mensal['Gasto_Medio_Produzido'] = evolucao_mensal['Valor_Produzido'] / evolucao_mensal['Quantidade_Procedimentos']
+    evolucao_mensal['Gasto_Medio_Aprovado'] = de_centavos(evolucao_mensal['Valor_Aprovado']) / evolucao_mensal['Quantidade_Procedimentos']
+    evolucao_mensal['Gasto_Medio_Produzido'] = de_centavos(evolucao_mensal['Valor_Produzido']) / evolucao_mensal['Quantidade_Procedimentos']
     
     print("\nGasto médio por procedimento por mês:")
     print("-" * 80)
@@ -120,8 +132,8 @@ def main():
     for _, row in evolucao_mensal.iterrows():
         print(f"{row['Competencia']:<12} {row['Gasto_Medio_Aprovado']:>24,.2f} {row['Gasto_Medio_Produzido']:>24,.2f}")
     
-    gasto_medio_geral_aprovado = df['PA_VALAPR'].sum() / len(df)
-    gasto_medio_geral_produzido = df['PA_VALPRO'].sum() / len(df)
+    gasto_medio_geral_aprovado = total_aprovado / 100 / total_registros
+    gasto_medio_geral_produzido = total_produzido / 100 / total_registros
     
     print(f"\nGASTO MÉDIO GERAL POR PROCEDIMENTO:")
     print(f"  Aprovado:  {formatar_valor_monetario(gasto_medio_geral_aprovado)}")
@@ -152,40 +164,32 @@ def main():
     # ========== ANÁLISE 4: TOP PROCEDIMENTOS MAIS CAROS ==========
     imprimir_subcabecalho("TOP 10 PROCEDIMENTOS MAIS CAROS", 80)
     
-    # Agrupar por procedimento
-    custo_por_proc = df.groupby('PA_PROC_ID').agg({
-        'PA_VALAPR': 'sum',
-        'PA_VALPRO': 'sum',
-        'PA_CODUNI': 'count'
-    }).reset_index()
+    # Agrupado por procedimento
+    custo_por_proc = por_procedimento
     
     custo_por_proc.columns = ['PA_PROC_ID', 'Total_Aprovado', 'Total_Produzido', 'Quantidade']
-    custo_por_proc['Custo_Medio_Aprovado'] = custo_por_proc['Total_Aprovado'] / custo_por_proc['Quantidade']
-    custo_por_proc = custo_por_proc.sort_values('Total_Aprovado', ascending=False)
+    custo_por_proc['Custo_Medio_Aprovado'] = de_centavos(custo_por_proc['Total_Aprovado']) / custo_por_proc['Quantidade']
+    top10_caros = top_k(custo_por_proc, 'Total_Aprovado', 10).copy()
     
-    # Adicionar descrições
-    custo_por_proc = adicionar_descricoes(
-        custo_por_proc, df_procedimentos,
-        'PA_PROC_ID', 'ip_cod_padrao', 'ip_dscr'
-    )
+    # Adicionar descrições (apenas dos procedimentos do ranking)
+    top10_caros['ip_dscr'] = top10_caros['PA_PROC_ID'].map(sessao.descricoes_procedimentos())
     
     print("\nTop 10 Procedimentos pelo Valor Total Aprovado:")
     print("-" * 130)
     print(f"{'#':<3} {'Código':<12} {'Descrição':<50} {'Total Aprovado':>18} {'Quantidade':>12} {'Custo Médio':>15}")
     print("-" * 130)
     
-    for idx, (_, row) in enumerate(custo_por_proc.head(10).iterrows(), 1):
+    for idx, (_, row) in enumerate(top10_caros.iterrows(), 1):
         desc = truncar_texto(row['ip_dscr'], 50) if pd.notna(row['ip_dscr']) else 'Descrição não encontrada'
-        print(f"{idx:<3} {row['PA_PROC_ID']:<12} {desc:<50} {row['Total_Aprovado']:>18,.2f} "
+        print(f"{idx:<3} {row['PA_PROC_ID']:<12} {desc:<50} {formatar_centavos(row['Total_Aprovado'], ''):>18} "
               f"{row['Quantidade']:>12,} {row['Custo_Medio_Aprovado']:>15,.2f}")
     
     # Gráfico 4: Top 10 Procedimentos Mais Caros
-    top10_caros = custo_por_proc.head(10)
     labels = [f"{row['PA_PROC_ID'][:6]}... - {truncar_texto(row['ip_dscr'], 30)}" 
               for _, row in top10_caros.iterrows()]
     
     criar_grafico_barras_horizontal(
-        top10_caros['Total_Aprovado'].values,
+        de_centavos(top10_caros['Total_Aprovado']),
         labels,
         'Top 10 Procedimentos Mais Caros (Valor Total Aprovado)',
         'Valor Total (R$)',
@@ -196,20 +200,9 @@ def main():
     # ========== ANÁLISE 5: DISTRIBUIÇÃO DE VALORES ==========
     imprimir_subcabecalho("DISTRIBUIÇÃO DE VALORES POR FAIXA", 80)
     
-    # Criar faixas de valor
-    faixas = [0, 10, 50, 100, 500, 1000, float('inf')]
-    labels_faixas = ['Até R$ 10', 'R$ 10-50', 'R$ 50-100', 'R$ 100-500', 'R$ 500-1000', 'Acima R$ 1000']
-    
-    df['Faixa_Valor'] = pd.cut(df['PA_VALAPR'], bins=faixas, labels=labels_faixas, right=False)
-    
-    dist_faixas = df.groupby('Faixa_Valor', observed=True).agg({
-        'PA_VALAPR': 'sum',
-        'PA_CODUNI': 'count'
-    }).reset_index()
-    
     dist_faixas.columns = ['Faixa', 'Total_Valor', 'Quantidade']
     dist_faixas['Percentual_Valor'] = (dist_faixas['Total_Valor'] / total_aprovado) * 100
-    dist_faixas['Percentual_Qtd'] = (dist_faixas['Quantidade'] / len(df)) * 100
+    dist_faixas['Percentual_Qtd'] = (dist_faixas['Quantidade'] / total_registros) * 100
     
     print("\nDistribuição por faixa de valor:")
     print("-" * 100)
@@ -217,19 +210,67 @@ def main():
     print("-" * 100)
     
     for _, row in dist_faixas.iterrows():
-        print(f"{row['Faixa']:<20} {row['Total_Valor']:>18,.2f} {row['Percentual_Valor']:>9.2f}% "
+        print(f"{row['Faixa']:<20} {formatar_centavos(row['Total_Valor'], ''):>18} {row['Percentual_Valor']:>9.2f}% "
               f"{row['Quantidade']:>12,} {row['Percentual_Qtd']:>9.2f}%")
     
     # Gráfico 5: Distribuição por Faixa de Valor
     criar_grafico_pizza(
-        dist_faixas['Total_Valor'].values,
+        de_centavos(dist_faixas['Total_Valor']),
         dist_faixas['Faixa'].tolist(),
         'Distribuição do Valor Total por Faixa de Preço',
         f'{pasta_graficos}/05_distribuicao_faixas.png',
         colors=['#3498db', '#2ecc71', '#f39c12', '#e74c3c', '#9b59b6', '#1abc9c']
     )
     
+    # ========== ANÁLISE 6: VALORES ATÍPICOS POR PROCEDIMENTO ==========
+    imprimir_subcabecalho("VALORES ATÍPICOS POR PROCEDIMENTO", 80)
+    
+    # Escore robusto (mediana e MAD do procedimento) de cada registro
+    pontuacao = pontuar_outliers(df, 'PA_VALAPR_CENT', ['PA_PROC_ID'])
+    total_pontuados = int(pontuacao['escore'].notna().sum())
+    total_outliers = int(pontuacao['outlier'].sum())
+    valor_outliers = df.loc[pontuacao['outlier'], 'PA_VALAPR_CENT'].sum()
+    
+    print(f"\nRegistros avaliados (procedimentos com {MINIMO_REGISTROS}+ registros): {total_pontuados:,}")
+    if total_pontuados > 0:
+        print(f"Registros atípicos (|escore| > {LIMITE_ESCORE}): {total_outliers:,} "
+              f"({total_outliers / total_pontuados * 100:.2f}%)")
+        print(f"Valor aprovado dos registros atípicos: {formatar_centavos(valor_outliers)}")
+    
+    resumo_estab = resumo_outliers(df, pontuacao, 'PA_VALAPR_CENT', 'PA_CODUNI')
+    top10_atipicos = top_k(resumo_estab[resumo_estab['outliers'] > 0], 'outliers', 10)
+    
+    if not top10_atipicos.empty:
+        nomes = sessao.estabelecimentos().drop_duplicates('cnes').set_index('cnes')['fantasia']
+        print("\nEstabelecimentos com mais registros atípicos:")
+        print("-" * 110)
+        print(f"{'CNES':<10} {'Nome':<40} {'Registros':>10} {'Atípicos':>10} {'% Atípicos':>11} {'Valor Atípico':>18}")
+        print("-" * 110)
+        for _, row in top10_atipicos.iterrows():
+            nome = nomes.get(row['PA_CODUNI'])
+            nome = truncar_texto(nome, 40) if pd.notna(nome) else 'Nome não encontrado'
+            print(f"{row['PA_CODUNI']:<10} {nome:<40} {row['registros']:>10,} {row['outliers']:>10,} "
+                  f"{row['perc_outliers']:>10.2f}% {formatar_centavos(row['valor_outliers'], ''):>18}")
+    
+    # ========== ANÁLISE 7: VALORES POR GRUPO SIGTAP ==========
+    imprimir_subcabecalho("VALORES POR GRUPO SIGTAP", 80)
+    
+    por_grupo = por_grupo.sort_values('PA_VALAPR_CENT', ascending=False)
+    por_grupo['nome'] = por_grupo['PROC_GRUPO'].map(nome_grupo)
+    
+    print("\nValor aprovado por grupo de procedimentos:")
+    print("-" * 110)
+    print(f"{'Grupo':<48} {'Total Aprovado':>18} {'% Valor':>9} {'Quantidade':>12} {'Custo Médio':>15}")
+    print("-" * 110)
+    for _, row in por_grupo.iterrows():
+        grupo = f"{row['PROC_GRUPO']} - {truncar_texto(row['nome'], 43)}"
+        perc = row['PA_VALAPR_CENT'] / total_aprovado * 100 if total_aprovado > 0 else 0
+        custo_medio = de_centavos(row['PA_VALAPR_CENT']) / row['registros']
+        print(f"{grupo:<48} {formatar_centavos(row['PA_VALAPR_CENT'], ''):>18} {perc:>8.2f}% "
+              f"{row['registros']:>12,} {custo_medio:>15,.2f}")
+    
     imprimir_cabecalho("ANÁLISE CONCLUÍDA!", 80)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
+    finalizar_instrumentacao(Path(__file__).stem)
\ No newline at end of file
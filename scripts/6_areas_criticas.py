@@ -1,6 +1,5 @@
 """
 Análise de Áreas Críticas da Saúde
-Município: Ijuí - RS
 """
 
 import sys
@@ -16,36 +15,20 @@ sys.path.insert(0, str(ROOT_DIR))
 
 from utils import *
 
-def filtro_quimioterapia(df, df_proc):
-    """Filtra procedimentos de quimioterapia"""
-    codigos_quimio = df_proc[df_proc['ip_dscr'].str.contains('QUIMIO', case=False, na=False)]['ip_cod_padrao'].tolist()
-    return df[df['PA_PROC_ID'].isin(codigos_quimio)]
+# Áreas analisadas: título exibido -> área do classificador (utils/classificacao.py)
+AREAS_CRITICAS = {
+    'QUIMIOTERAPIA': 'Quimioterapia',
+    'RADIOTERAPIA': 'Radioterapia',
+    'SAÚDE MENTAL': 'Saúde Mental',
+    'ATENÇÃO BÁSICA': 'Atenção Básica',
+}
 
-def filtro_radioterapia(df, df_proc):
-    """Filtra procedimentos de radioterapia"""
-    codigos_radio = df_proc[df_proc['ip_dscr'].str.contains('RADIO', case=False, na=False)]['ip_cod_padrao'].tolist()
-    return df[df['PA_PROC_ID'].isin(codigos_radio)]
-
-def filtro_saude_mental(df, df_proc):
-    """Filtra procedimentos de saúde mental"""
-    palavras_chave = ['PSICO', 'MENTAL', 'PSIQUIAT', 'CAPS']
-    mask = df_proc['ip_dscr'].str.contains('|'.join(palavras_chave), case=False, na=False)
-    codigos_mental = df_proc[mask]['ip_cod_padrao'].tolist()
-    return df[df['PA_PROC_ID'].isin(codigos_mental)]
-
-def filtro_atencao_basica(df, df_proc):
-    """Filtra procedimentos de atenção básica"""
-    palavras_chave = ['CONSULTA', 'ATENDIMENTO', 'ACOMPANHAMENTO', 'PREVENTIV']
-    mask = df_proc['ip_dscr'].str.contains('|'.join(palavras_chave), case=False, na=False)
-    codigos_basica = df_proc[mask]['ip_cod_padrao'].tolist()
-    return df[df['PA_PROC_ID'].isin(codigos_basica)]
-
-def analisar_area(df, nome_area, filtro_func, df_proc, pasta_graficos):
+def analisar_area(df, nome_area, filtro, df_proc, pasta_graficos):
     """Função genérica para analisar uma área crítica"""
     imprimir_subcabecalho(nome_area, 80)
     
     # Aplicar filtro
-    df_filtrado = filtro_func(df, df_proc)
+    df_filtrado = df[filtro]
     
     if len(df_filtrado) == 0:
         print(f"\nNenhum procedimento encontrado para {nome_area}")
@@ -53,20 +36,20 @@ def analisar_area(df, nome_area, filtro_func, df_proc, pasta_graficos):
     
     # Estatísticas
     total = len(df_filtrado)
-    aprovado = df_filtrado['PA_VALAPR'].sum()
-    produzido = df_filtrado['PA_VALPRO'].sum()
+    aprovado = int(df_filtrado['PA_VALAPR_CENT'].sum())
+    produzido = int(df_filtrado['PA_VALPRO_CENT'].sum())
     diferenca = produzido - aprovado
     perc = (diferenca / aprovado * 100) if aprovado > 0 else 0
     
     print(f"\nTotal de procedimentos: {total:,}")
-    print(f"Valor Total Aprovado: {formatar_valor_monetario(aprovado)}")
-    print(f"Valor Total Produzido: {formatar_valor_monetario(produzido)}")
-    print(f"Diferença: {formatar_valor_monetario(diferenca)} ({perc:+.2f}%)")
+    print(f"Valor Total Aprovado: {formatar_centavos(aprovado)}")
+    print(f"Valor Total Produzido: {formatar_centavos(produzido)}")
+    print(f"Diferença: {formatar_centavos(diferenca)} ({perc:+.2f}%)")
     
     if total > 0:
         # Top 10 procedimentos da área
         top_proc = df_filtrado.groupby('PA_PROC_ID').agg({
-            'PA_VALAPR': 'sum',
+            'PA_VALAPR_CENT': 'sum',
             'PA_CODUNI': 'count'
         }).reset_index()
         top_proc.columns = ['PA_PROC_ID', 'Valor_Total', 'Quantidade']
@@ -85,7 +68,14 @@ def analisar_area(df, nome_area, filtro_func, df_proc, pasta_graficos):
         
         for idx, (_, row) in enumerate(top_proc.head(10).iterrows(), 1):
             desc = truncar_texto(row['ip_dscr'], 50) if pd.notna(row['ip_dscr']) else 'Descrição não encontrada'
-            print(f"{idx:<3} {row['PA_PROC_ID']:<12} {desc:<50} {row['Quantidade']:>12,} {row['Valor_Total']:>18,.2f}")
+            print(f"{idx:<3} {row['PA_PROC_ID']:<12} {desc:<50} {row['Quantidade']:>12,} {formatar_centavos(row['Valor_Total'], ''):>18}")
+        
+        # Subida na hierarquia SIGTAP a partir do total por procedimento
+        por_subgrupo = top_proc.groupby(codigo_nivel(top_proc['PA_PROC_ID'], 'subgrupo'))['Quantidade'].sum()
+        
+        print(f"\nPrincipais subgrupos SIGTAP:")
+        for subgrupo, quantidade in por_subgrupo.sort_values(ascending=False, kind='stable').head(10).items():
+            print(f"  {subgrupo} ({nome_grupo(subgrupo[:2])}): {quantidade:,} procedimentos")
         
         # Evolução temporal
         df_filtrado_temp = preparar_competencia(df_filtrado)
@@ -114,53 +104,40 @@ def analisar_area(df, nome_area, filtro_func, df_proc, pasta_graficos):
     
     return df_filtrado
 
-def main():
+def main(sessao=None):
     # Configuração inicial
+    if sessao is None:
+        sessao = SessaoAnalise()
     configurar_estilo_graficos()
     pasta_graficos = criar_diretorio('graficos/6_areas_criticas')
     
     imprimir_cabecalho("ANÁLISE DE ÁREAS CRÍTICAS DA SAÚDE", 80)
     
     # ========== CARREGAR DADOS ==========
-    df = carregar_csv()
-    df_procedimentos = carregar_procedimentos()
-    
-    # Padronizar código de procedimento
-    df = padronizar_codigo(df, 'PA_PROC_ID')
+    df = sessao.dados()
+    df_procedimentos = sessao.procedimentos()
     
     print(f"\nTotal de registros no dataset: {len(df):,}")
     print(f"Total de procedimentos distintos: {df['PA_PROC_ID'].nunique():,}")
     
-    # ========== ANÁLISE POR ÁREA ==========
-    
-    # 1. Quimioterapia
-    df_quimio = analisar_area(df, "QUIMIOTERAPIA", filtro_quimioterapia, df_procedimentos, pasta_graficos)
+    # Áreas de cada registro em uma única consulta à tabela de classificação
+    classificador = sessao.areas()
+    mascaras = classificador.mascaras(df['PA_PROC_ID'])
     
-    # 2. Radioterapia
-    df_radio = analisar_area(df, "RADIOTERAPIA", filtro_radioterapia, df_procedimentos, pasta_graficos)
-    
-    # 3. Saúde Mental
-    df_mental = analisar_area(df, "SAÚDE MENTAL", filtro_saude_mental, df_procedimentos, pasta_graficos)
-    
-    # 4. Atenção Básica
-    df_basica = analisar_area(df, "ATENÇÃO BÁSICA", filtro_atencao_basica, df_procedimentos, pasta_graficos)
+    # ========== ANÁLISE POR ÁREA ==========
+    resultados = {}
+    for nome_area, area in AREAS_CRITICAS.items():
+        filtro = classificador.filtro(mascaras, area)
+        resultados[area] = analisar_area(df, nome_area, filtro, df_procedimentos, pasta_graficos)
     
     # ========== COMPARAÇÃO ENTRE ÁREAS ==========
     imprimir_subcabecalho("COMPARAÇÃO ENTRE ÁREAS CRÍTICAS", 80)
     
-    areas_dados = []
-    
-    if df_quimio is not None and len(df_quimio) > 0:
-        areas_dados.append(('Quimioterapia', len(df_quimio), df_quimio['PA_VALAPR'].sum()))
-    
-    if df_radio is not None and len(df_radio) > 0:
-        areas_dados.append(('Radioterapia', len(df_radio), df_radio['PA_VALAPR'].sum()))
-    
-    if df_mental is not None and len(df_mental) > 0:
-        areas_dados.append(('Saúde Mental', len(df_mental), df_mental['PA_VALAPR'].sum()))
-    
-    if df_basica is not None and len(df_basica) > 0:
-        areas_dados.append(('Atenção Básica', len(df_basica), df_basica['PA_VALAPR'].sum()))
+    areas_dados = [
+        (area, len(df_area), int(df_area['PA_VALAPR_CENT'].sum()))
+        for area, df_area in resultados.items()
+        if df_area is not None and len(df_area) > 0
+    ]
     
     if areas_dados:
         print("\nResumo Comparativo:")
@@ -168,16 +145,16 @@ def main():
         print(f"{'Área':<20} {'Procedimentos':>15} {'Valor Total':>20} {'% do Total':>12}")
         print("-" * 80)
         
-        total_geral = df['PA_VALAPR'].sum()
+        total_geral = int(df['PA_VALAPR_CENT'].sum())
         
         for area, qtd, valor in areas_dados:
             perc = (valor / total_geral) * 100
-            print(f"{area:<20} {qtd:>15,} {valor:>20,.2f} {perc:>11.2f}%")
+            print(f"{area:<20} {qtd:>15,} {formatar_centavos(valor, ''):>20} {perc:>11.2f}%")
         
         # Gráfico comparativo
         areas_nomes = [a[0] for a in areas_dados]
         areas_qtd = [a[1] for a in areas_dados]
-        areas_valores = [a[2] for a in areas_dados]
+        areas_valores = de_centavos([a[2] for a in areas_dados]).tolist()
         
         # Gráfico: Quantidade de procedimentos
         criar_grafico_barras_vertical(
@@ -204,4 +181,5 @@ def main():
     imprimir_cabecalho("ANÁLISE CONCLUÍDA!", 80)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
+    finalizar_instrumentacao(Path(__file__).stem)
\ No newline at end of file
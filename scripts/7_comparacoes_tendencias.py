@@ -1,6 +1,6 @@
 """
 Análise de Comparações e Tendências Regionais
-Comparação entre Ijuí, Santa Rosa e Cruz Alta - RS
+Comparação entre municípios do RS (padrão: Ijuí, Santa Rosa e Cruz Alta)
 """
 
 import sys
@@ -15,45 +15,30 @@ ROOT_DIR = Path(__file__).parent.parent
 sys.path.insert(0, str(ROOT_DIR))
 
 from utils import *
-import matplotlib.pyplot as plt
 
-def carregar_dados_municipios():
-    """Carrega dados dos três municípios"""
-    df_ijui = carregar_csv('dados_limpos.csv')
-    df_ijui['Municipio'] = 'Ijuí'
-    
-    df_sr = carregar_csv('dados_limpos_sr.csv')
-    df_sr['Municipio'] = 'Santa Rosa'
-    
-    df_ca = carregar_csv('dados_limpos_ca.csv')
-    df_ca['Municipio'] = 'Cruz Alta'
-    
-    return df_ijui, df_sr, df_ca
+# Municípios comparados e o CSV limpo (partição) de cada um
+MUNICIPIOS_COMPARACAO = {
+    'Ijuí': 'dados_limpos.csv',
+    'Santa Rosa': 'dados_limpos_sr.csv',
+    'Cruz Alta': 'dados_limpos_ca.csv',
+}
 
-def preparar_dados_comparacao(df_ijui, df_sr, df_ca):
-    """Prepara e combina dados para comparação"""
-    # Combinar todos os dados
-    df_completo = pd.concat([df_ijui, df_sr, df_ca], ignore_index=True)
-    
-    # Preparar competência para todos
-    df_completo = preparar_competencia(df_completo)
-    
-    # Padronizar código de procedimento
-    df_completo = padronizar_codigo(df_completo, 'PA_PROC_ID')
-    
-    return df_completo
+def agregar_municipios(municipios, classificador, dicionarios=None):
+    """Lê as partições dos municípios em blocos e acumula os agregados da comparação"""
+    return ComparacaoMunicipios(municipios, classificador, dicionarios=dicionarios).processar(municipios)
 
-def analisar_volume_comparativo(df_completo, pasta_graficos):
+def analisar_volume_comparativo(por_municipio, pasta_graficos):
     """Análise comparativa de volume entre municípios"""
     imprimir_subcabecalho("VOLUME COMPARATIVO DE PROCEDIMENTOS", 80)
     
-    volume_por_municipio = df_completo.groupby('Municipio').size().reset_index(name='quantidade')
+    volume_por_municipio = por_municipio[['Municipio', 'quantidade']]
     volume_por_municipio = volume_por_municipio.sort_values('quantidade', ascending=False)
+    total = volume_por_municipio['quantidade'].sum()
     
     print("\nVolume total de procedimentos:")
     print("-" * 60)
     for _, row in volume_por_municipio.iterrows():
-        perc = (row['quantidade'] / len(df_completo)) * 100
+        perc = (row['quantidade'] / total) * 100
         print(f"  {row['Municipio']:<15}: {row['quantidade']:>10,} ({perc:>5.2f}%)")
     
     # Gráfico: Volume comparativo
@@ -68,13 +53,13 @@ def analisar_volume_comparativo(df_completo, pasta_graficos):
     
     return volume_por_municipio
 
-def analisar_evolucao_temporal_comparativa(df_completo, pasta_graficos):
+def analisar_evolucao_temporal_comparativa(por_competencia, pasta_graficos):
     """Análise da evolução temporal comparativa"""
+    plt = pyplot()
     imprimir_subcabecalho("EVOLUÇÃO TEMPORAL COMPARATIVA", 80)
     
-    # Evolução mensal por município
-    evolucao = df_completo.groupby(['Competencia', 'Municipio']).size().reset_index(name='quantidade')
-    evolucao = evolucao.sort_values(['Competencia', 'Municipio'])
+    # Evolução mensal por município (já ordenada por competência e município)
+    evolucao = por_competencia[['Competencia', 'Municipio', 'quantidade']]
     
     # Calcular média mensal por município
     media_mensal = evolucao.groupby('Municipio')['quantidade'].mean()
@@ -112,43 +97,37 @@ def calcular_taxa_crescimento(evolucao):
     print("\nTaxa de crescimento (primeiro vs último mês):")
     print("-" * 80)
     
+    # Todas as séries de uma vez: matriz competência × município
+    tendencias = calcular_tendencias(matriz_series(evolucao, 'Competencia', 'Municipio', 'quantidade'))
+    
     taxas = {}
     
-    for municipio in evolucao['Municipio'].unique():
-        dados_mun = evolucao[evolucao['Municipio'] == municipio].sort_values('Competencia')
+    for municipio, row in tendencias.iterrows():
+        primeiro = int(row['primeiro'])
+        ultimo = int(row['ultimo'])
         
-        if len(dados_mun) >= 2:
-            primeiro = dados_mun.iloc[0]['quantidade']
-            ultimo = dados_mun.iloc[-1]['quantidade']
-            
-            crescimento_abs = ultimo - primeiro
-            crescimento_perc = ((ultimo / primeiro) - 1) * 100 if primeiro > 0 else 0
-            
-            taxas[municipio] = {
-                'primeiro': primeiro,
-                'ultimo': ultimo,
-                'crescimento_abs': crescimento_abs,
-                'crescimento_perc': crescimento_perc
-            }
-            
-            print(f"\n  {municipio}:")
-            print(f"    Primeiro mês: {primeiro:,} procedimentos")
-            print(f"    Último mês:   {ultimo:,} procedimentos")
-            print(f"    Crescimento:  {crescimento_abs:+,} ({crescimento_perc:+.2f}%)")
+        taxas[municipio] = {
+            'primeiro': primeiro,
+            'ultimo': ultimo,
+            'crescimento_abs': ultimo - primeiro,
+            'crescimento_perc': row['crescimento_perc'],
+            'inclinacao': row['inclinacao']
+        }
+        
+        print(f"\n  {municipio}:")
+        print(f"    Primeiro mês: {primeiro:,} procedimentos")
+        print(f"    Último mês:   {ultimo:,} procedimentos")
+        print(f"    Crescimento:  {ultimo - primeiro:+,} ({row['crescimento_perc']:+.2f}%)")
+        print(f"    Tendência:    {row['inclinacao']:+,.1f} procedimentos/mês (mínimos quadrados)")
     
     return taxas
 
-def analisar_valores_comparativos(df_completo, pasta_graficos):
+def analisar_valores_comparativos(por_municipio, pasta_graficos):
     """Análise comparativa de valores financeiros"""
     imprimir_subcabecalho("VALORES FINANCEIROS COMPARATIVOS", 80)
     
-    valores = df_completo.groupby('Municipio').agg({
-        'PA_VALAPR': 'sum',
-        'PA_VALPRO': 'sum'
-    }).reset_index()
-    
-    valores.columns = ['Municipio', 'Valor_Aprovado', 'Valor_Produzido']
-    valores['Valor_Medio_Proc'] = valores['Valor_Aprovado'] / df_completo.groupby('Municipio').size().values
+    valores = por_municipio[['Municipio', 'Valor_Aprovado', 'Valor_Produzido']].copy()
+    valores['Valor_Medio_Proc'] = valores['Valor_Aprovado'] / por_municipio['quantidade']
     valores = valores.sort_values('Valor_Aprovado', ascending=False)
     
     print("\nValores financeiros por município:")
@@ -173,13 +152,13 @@ def analisar_valores_comparativos(df_completo, pasta_graficos):
     
     return valores
 
-def analisar_perfil_etario_comparativo(df_completo, pasta_graficos):
+def analisar_perfil_etario_comparativo(comparacao, por_municipio, pasta_graficos):
     """Análise comparativa do perfil etário"""
+    plt = pyplot()
     imprimir_subcabecalho("PERFIL ETÁRIO COMPARATIVO", 80)
     
     # Estatísticas de idade por município
-    stats_idade = df_completo.groupby('Municipio')['PA_IDADE'].agg(['mean', 'median', 'std']).reset_index()
-    stats_idade.columns = ['Municipio', 'Idade_Media', 'Idade_Mediana', 'Desvio_Padrao']
+    stats_idade = por_municipio[['Municipio', 'Idade_Media', 'Idade_Mediana', 'Desvio_Padrao']]
     
     print("\nEstatísticas de idade por município:")
     print("-" * 80)
@@ -190,20 +169,16 @@ def analisar_perfil_etario_comparativo(df_completo, pasta_graficos):
         print(f"{row['Municipio']:<15} {row['Idade_Media']:>15.2f} "
               f"{row['Idade_Mediana']:>12.1f} {row['Desvio_Padrao']:>18.2f}")
     
-    # Criar faixas etárias amplas
-    df_completo['Faixa_Etaria_Ampla'] = pd.cut(
-        df_completo['PA_IDADE'],
+    # Distribuição por faixa etária ampla (a partir do histograma de idades)
+    dist_etaria = comparacao.faixas_etarias(
         bins=[0, 18, 40, 60, 150],
         labels=['0-17', '18-39', '40-59', '60+']
-    )
-    
-    # Distribuição por faixa etária ampla
-    dist_etaria = df_completo.groupby(['Municipio', 'Faixa_Etaria_Ampla'], observed=True).size().reset_index(name='quantidade')
+    ).rename(columns={'Faixa_Etaria': 'Faixa_Etaria_Ampla'}).astype({'Municipio': str})
     
     print("\nDistribuição por faixa etária (%):")
     print("-" * 80)
     
-    for municipio in df_completo['Municipio'].unique():
+    for municipio in comparacao.municipios:
         print(f"\n  {municipio}:")
         dados_mun = dist_etaria[dist_etaria['Municipio'] == municipio]
         total_mun = dados_mun['quantidade'].sum()
@@ -229,32 +204,18 @@ def analisar_perfil_etario_comparativo(df_completo, pasta_graficos):
     
     return stats_idade
 
-def analisar_areas_especializadas(df_completo, df_procedimentos, pasta_graficos):
+def analisar_areas_especializadas(comparacao, pasta_graficos):
     """Análise de áreas especializadas (cardiologia, oncologia)"""
+    plt = pyplot()
     imprimir_subcabecalho("ANÁLISE DE ÁREAS ESPECIALIZADAS", 80)
     
-    # Identificar procedimentos cardiológicos
-    palavras_cardio = ['CARDIO', 'CORAÇÃO', 'CORONAR', 'VASCULAR']
-    mask_cardio = df_procedimentos['ip_dscr'].str.contains('|'.join(palavras_cardio), case=False, na=False)
-    codigos_cardio = df_procedimentos[mask_cardio]['ip_cod_padrao'].tolist()
-    
-    # Identificar procedimentos oncológicos
-    palavras_onco = ['ONCO', 'CANCER', 'TUMOR', 'QUIMIO', 'RADIO']
-    mask_onco = df_procedimentos['ip_dscr'].str.contains('|'.join(palavras_onco), case=False, na=False)
-    codigos_onco = df_procedimentos[mask_onco]['ip_cod_padrao'].tolist()
-    
-    # Filtrar dados
-    df_completo['Area'] = 'Outros'
-    df_completo.loc[df_completo['PA_PROC_ID'].isin(codigos_cardio), 'Area'] = 'Cardiologia'
-    df_completo.loc[df_completo['PA_PROC_ID'].isin(codigos_onco), 'Area'] = 'Oncologia'
-    
-    # Análise por área e município
-    analise_areas = df_completo.groupby(['Municipio', 'Area']).size().reset_index(name='quantidade')
+    # Contagem por área (Oncologia prevalece sobre Cardiologia), acumulada na leitura
+    analise_areas = comparacao.areas().astype({'Municipio': str})
     
     print("\nProcedimentos especializados por município:")
     print("-" * 80)
     
-    for municipio in df_completo['Municipio'].unique():
+    for municipio in comparacao.municipios:
         print(f"\n  {municipio}:")
         dados_mun = analise_areas[analise_areas['Municipio'] == municipio]
         total_mun = dados_mun['quantidade'].sum()
@@ -284,27 +245,76 @@ def analisar_areas_especializadas(df_completo, df_procedimentos, pasta_graficos)
     
     return analise_areas
 
-def analisar_tendencias_envelhecimento(df_completo, pasta_graficos):
-    """Análise de tendências relacionadas ao envelhecimento"""
-    imprimir_subcabecalho("TENDÊNCIAS DE ENVELHECIMENTO POPULACIONAL", 80)
+def analisar_grupos_sigtap(comparacao, pasta_graficos):
+    """Perfil dos municípios por grupo SIGTAP (nível mais agregado da tabela)"""
+    plt = pyplot()
+    imprimir_subcabecalho("PERFIL POR GRUPO SIGTAP", 80)
     
-    # Evolução da proporção de idosos (60+) ao longo do tempo
-    df_completo['Idoso'] = df_completo['PA_IDADE'] >= 60
+    por_grupo = comparacao.grupos_sigtap()
+    por_grupo['percentual'] = (por_grupo['quantidade'] /
+                               por_grupo.groupby('Municipio', observed=True)['quantidade'].transform('sum') * 100)
     
-    prop_idosos = df_completo.groupby(['Competencia', 'Municipio', 'Idoso']).size().reset_index(name='quantidade')
+    for municipio in comparacao.municipios:
+        print(f"\n  {municipio}:")
+        dados_mun = por_grupo[por_grupo['Municipio'] == municipio]
+        for _, row in dados_mun.iterrows():
+            grupo = f"{row['PROC_GRUPO']} - {truncar_texto(row['Grupo'], 46)}"
+            print(f"    {grupo:<51}: {row['quantidade']:>9,} ({row['percentual']:>5.2f}%)")
     
-    # Calcular proporção
-    total_por_comp = df_completo.groupby(['Competencia', 'Municipio']).size().reset_index(name='total')
-    prop_idosos = prop_idosos.merge(total_por_comp, on=['Competencia', 'Municipio'])
-    prop_idosos['proporcao'] = (prop_idosos['quantidade'] / prop_idosos['total']) * 100
+    # Gráfico: participação de cada grupo por município
+    if not por_grupo.empty:
+        pivot_grupos = por_grupo.pivot(index='PROC_GRUPO', columns='Municipio', values='percentual')
+        pivot_grupos.plot(kind='bar', figsize=(14, 8))
+        
+        plt.title('Participação dos Grupos SIGTAP por Município', fontsize=14, fontweight='bold')
+        plt.xlabel('Grupo SIGTAP', fontsize=12)
+        plt.ylabel('% dos Procedimentos', fontsize=12)
+        plt.legend(title='Município', fontsize=10)
+        plt.xticks(rotation=0)
+        plt.grid(axis='y', alpha=0.3)
+        
+        salvar_grafico(f'{pasta_graficos}/07_grupos_sigtap.png')
+    
+    return por_grupo
+
+def analisar_rankings_regionais(comparacao, sessao):
+    """Procedimentos e estabelecimentos de maior valor aprovado somando todos os municípios"""
+    imprimir_subcabecalho("MAIORES VALORES APROVADOS NA REGIÃO", 80)
+    
+    descricoes = sessao.descricoes_procedimentos()
+    estabelecimentos = sessao.estabelecimentos()
+    nomes_estab = {}
+    if not estabelecimentos.empty:
+        nomes_estab = dict(zip(estabelecimentos['cnes'].str.zfill(7), estabelecimentos['fantasia']))
+    
+    for coluna, titulo, nome in [
+        ('PA_PROC_ID', 'Procedimentos', lambda codigo: descricoes.get(codigo, 'N/A')),
+        ('PA_CODUNI', 'Estabelecimentos', lambda codigo: nomes_estab.get(codigo, 'N/A')),
+    ]:
+        ranking = comparacao.ranking(coluna)
+        print(f"\n{titulo} (top {len(ranking)}):")
+        print("-" * 80)
+        for _, row in ranking.iterrows():
+            rotulo = f"{row[coluna]} - {truncar_texto(nome(row[coluna]), 40)}"
+            print(f"  {rotulo:<53}: {formatar_valor_monetario(row['valor'])}")
+        if comparacao.rankings[coluna].aproximado:
+            print(f"  (aproximado: cada valor pode estar subestimado em até "
+                  f"{formatar_valor_monetario(comparacao.rankings[coluna].erro_maximo)})")
+
+def analisar_tendencias_envelhecimento(por_competencia, pasta_graficos, municipios):
+    """Análise de tendências relacionadas ao envelhecimento"""
+    plt = pyplot()
+    imprimir_subcabecalho("TENDÊNCIAS DE ENVELHECIMENTO POPULACIONAL", 80)
     
-    # Filtrar apenas idosos
-    prop_idosos_filtro = prop_idosos[prop_idosos['Idoso'] == True]
+    # Evolução da proporção de idosos (60+) ao longo do tempo
+    prop_idosos_filtro = por_competencia[['Competencia', 'Municipio', 'Idosos']].copy()
+    prop_idosos_filtro['proporcao'] = (por_competencia['Idosos'] / por_competencia['quantidade']) * 100
+    prop_idosos_filtro = prop_idosos_filtro[por_competencia['Idosos'] > 0]
     
     print("\nProporção de procedimentos para idosos (60+) por município:")
     print("-" * 80)
     
-    for municipio in df_completo['Municipio'].unique():
+    for municipio in municipios:
         dados_mun = prop_idosos_filtro[prop_idosos_filtro['Municipio'] == municipio]
         if not dados_mun.empty:
             media_prop = dados_mun['proporcao'].mean()
@@ -373,28 +383,39 @@ def gerar_relatorio_conclusoes(volume_por_municipio, taxas, valores, stats_idade
     
     print("\n" + "="*80)
 
-def main():
+def main(sessao=None, municipios=None):
     # Configuração inicial
+    if sessao is None:
+        sessao = SessaoAnalise()
     configurar_estilo_graficos()
     pasta_graficos = criar_diretorio('graficos/7_comparacoes_tendencias')
     
-    imprimir_cabecalho("ANÁLISE COMPARATIVA E TENDÊNCIAS REGIONAIS\nIJUÍ, SANTA ROSA E CRUZ ALTA - RS", 80)
+    municipios = municipios or MUNICIPIOS_COMPARACAO
+    nomes = [nome.upper() for nome in municipios]
+    titulo = ', '.join(nomes[:-1]) + ' E ' + nomes[-1] if len(nomes) > 1 else nomes[0]
+    imprimir_cabecalho(f"ANÁLISE COMPARATIVA E TENDÊNCIAS REGIONAIS\n{titulo} - RS", 80)
     
-    # Carregar dados
-    df_ijui, df_sr, df_ca = carregar_dados_municipios()
-    df_completo = preparar_dados_comparacao(df_ijui, df_sr, df_ca)
-    df_procedimentos = carregar_procedimentos()
+    # Agregados acumulados partição a partição (sem concatenar os dados dos municípios)
+    comparacao = agregar_municipios(municipios, sessao.areas(), sessao.dicionarios())
+    # Município como texto: tabelas, groupby e pivôs em ordem alfabética, como no groupby original
+    por_municipio = comparacao.por_municipio().astype({'Municipio': str})
+    por_municipio = por_municipio.sort_values('Municipio', ignore_index=True)
+    por_competencia = comparacao.por_competencia().astype({'Municipio': str})
+    por_competencia = por_competencia.sort_values(['PA_CMP', 'Municipio'], ignore_index=True)
     
     # Análises
-    analisar_volume_comparativo(df_completo, pasta_graficos)
-    analisar_evolucao_temporal_comparativa(df_completo, pasta_graficos)
-    calcular_taxa_crescimento(df_completo.groupby(['Competencia', 'Municipio']).size().reset_index(name='quantidade'))
-    analisar_valores_comparativos(df_completo, pasta_graficos)
-    analisar_perfil_etario_comparativo(df_completo, pasta_graficos)
-    analisar_areas_especializadas(df_completo, df_procedimentos, pasta_graficos)
-    analisar_tendencias_envelhecimento(df_completo, pasta_graficos)
+    analisar_volume_comparativo(por_municipio, pasta_graficos)
+    evolucao = analisar_evolucao_temporal_comparativa(por_competencia, pasta_graficos)
+    calcular_taxa_crescimento(evolucao)
+    analisar_valores_comparativos(por_municipio, pasta_graficos)
+    analisar_perfil_etario_comparativo(comparacao, por_municipio, pasta_graficos)
+    analisar_areas_especializadas(comparacao, pasta_graficos)
+    analisar_grupos_sigtap(comparacao, pasta_graficos)
+    analisar_rankings_regionais(comparacao, sessao)
+    analisar_tendencias_envelhecimento(por_competencia, pasta_graficos, comparacao.municipios)
     
     imprimir_cabecalho("ANÁLISE CONCLUÍDA!", 80)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
+    finalizar_instrumentacao(Path(__file__).stem)
\ No newline at end of file
@@ -0,0 +1,131 @@
+"""
+Ponto de entrada único: extração, limpeza, perfil e análises para um ou vários municípios
+
+Cada município é processado em um processo próprio, em <saida>/<código>/ (dados_pars.csv,
+dados_limpos.csv, graficos/ e logs/ com a saída de cada etapa). Ao final é impresso o tempo
+de cada etapa e as falhas; o código de saída é 1 se alguma etapa falhar.
+
+Uso:
+    python siasus.py extrair 431020 431720 --periodo 202501-202512
+    python siasus.py limpar 431020 431720 --periodo 2025
+    python siasus.py perfil 431020
+    python siasus.py analisar 431020 431720 430610 --analises 1 4 5 -j 3
+    python siasus.py relatorio 431020 431720 430610 --saida resultados   # tudo + comparação (análise 7)
+    python siasus.py relatorio 431020 431720 --memoria 2G   # orçamento de memória de cada município
+
+Os subcomandos também aceitam os nomes extract, clean, profile, analyze e report.
+"""
+
+import argparse
+import sys
+import time
+import warnings
+
+warnings.filterwarnings('ignore', category=UserWarning)
+
+from utils import imprimir_cabecalho
+from utils.memoria import configurar_orcamento, orcamento_bytes
+from utils.lote import (ANALISE_COMPARACAO, ANALISES_MUNICIPIO, ETAPAS, executar_lote, ler_periodo,
+                        nomes_municipios, normalizar_municipio)
+
+# Subcomando -> (etapas por município, apelido em inglês)
+SUBCOMANDOS = {
+    'extrair': (('extrair',), 'extract'),
+    'limpar': (('limpar',), 'clean'),
+    'perfil': (('perfil',), 'profile'),
+    'analisar': (('analisar',), 'analyze'),
+    'relatorio': (ETAPAS, 'report'),
+}
+APELIDOS = {apelido: nome for nome, (_, apelido) in SUBCOMANDOS.items()}
+
+def imprimir_resultado(resultado):
+    """Uma linha por etapa concluída"""
+    status = "ERRO" if resultado.erro else "ok"
+    print(f"  {resultado.municipio:<12} {resultado.etapa:<10} {resultado.segundos:>9.2f} s  {status}", flush=True)
+
+def formatar_pico(etapas):
+    """Pico de memória (RSS) do município e a fração do orçamento, se houver"""
+    picos = [r.pico_rss_mb for r in etapas if r.pico_rss_mb is not None]
+    if not picos:
+        return f"{'-':>9}"
+    texto = f"{max(picos):>6,.0f} MB"
+    if orcamento_bytes():
+        texto += f" ({max(picos) * 1024 ** 2 / orcamento_bytes():.0%})"
+    return texto
+
+def imprimir_resumo(resultados, nomes, inicio):
+    """Tempo total e pico de memória por município e a lista de falhas"""
+    imprimir_cabecalho("RESUMO DO LOTE", 80)
+    por_municipio = {}
+    for resultado in resultados:
+        por_municipio.setdefault(resultado.municipio, []).append(resultado)
+    for municipio, etapas in sorted(por_municipio.items()):
+        nome = nomes.get(municipio, 'comparação entre municípios')
+        falhou = any(r.erro for r in etapas)
+        print(f"  {municipio:<12} {nome:<30} {sum(r.segundos for r in etapas):>9.2f} s  {formatar_pico(etapas)}  "
+              f"{'FALHOU' if falhou else 'ok'} ({len(etapas)} etapas)")
+    print(f"  {'Tempo de parede':<43} {time.perf_counter() - inicio:>9.2f} s")
+    if orcamento_bytes():
+        print(f"  {'Orçamento de memória por município':<43} {orcamento_bytes() / 1024 ** 2:>9,.0f} MB")
+
+    falhas = [r for r in resultados if r.erro]
+    if falhas:
+        print(f"\n✗ {len(falhas)} falhas:")
+        for r in falhas:
+            print(f"  {r.municipio} / {r.etapa}: {r.erro}\n    log: {r.log}")
+    else:
+        print("\n✓ Todas as etapas concluídas")
+    return falhas
+
+def main():
+    parser = argparse.ArgumentParser(description="Etapas do projeto para um ou vários municípios, em paralelo")
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+    for nome, (etapas, apelido) in SUBCOMANDOS.items():
+        sub = subparsers.add_parser(nome, aliases=[apelido], help=f"Etapas: {', '.join(etapas)}")
+        sub.add_argument('municipios', nargs='+', help="Códigos dos municípios (6 ou 7 dígitos)")
+        sub.add_argument('--periodo', help="Competências AAAAMM-AAAAMM, AAAAMM ou AAAA (padrão: 2025)")
+        sub.add_argument('--saida', default='resultados', help="Pasta de saída (uma subpasta por município)")
+        sub.add_argument('-j', '--trabalhadores', type=int, default=None,
+                         help="Municípios processados em paralelo (padrão: processadores)")
+        sub.add_argument('--processos', type=int, default=1, help="Processos de renderização por município")
+        sub.add_argument('--memoria', help="Orçamento de memória por município, ex.: 512M, 2G (padrão: ORCAMENTO_MEMORIA)")
+        if nome in ('analisar', 'relatorio'):
+            sub.add_argument('--analises', nargs='+', type=int,
+                             default=list(ANALISES_MUNICIPIO) + [ANALISE_COMPARACAO],
+                             help=f"Análises (a {ANALISE_COMPARACAO} compara os municípios do lote)")
+    args = parser.parse_args()
+    comando = APELIDOS.get(args.comando, args.comando)
+
+    try:
+        codigos = list(dict.fromkeys(normalizar_municipio(c) for c in args.municipios))
+        periodo = ler_periodo(args.periodo)
+        if args.memoria:
+            # Definido no ambiente: os processos de cada município herdam o orçamento
+            configurar_orcamento(args.memoria)
+    except ValueError as e:
+        parser.error(str(e))
+
+    analises = getattr(args, 'analises', list(ANALISES_MUNICIPIO))
+    etapas = SUBCOMANDOS[comando][0]
+    por_municipio = [a for a in analises if a != ANALISE_COMPARACAO]
+    if not por_municipio:
+        etapas = tuple(e for e in etapas if e != 'analisar')
+    comparar = 'analisar' in SUBCOMANDOS[comando][0] and ANALISE_COMPARACAO in analises
+
+    imprimir_cabecalho(f"{comando.upper()}: {len(codigos)} MUNICÍPIOS", 80)
+    nomes = nomes_municipios(codigos)
+    print(f"  Municípios: {', '.join(f'{nomes[c]} ({c})' for c in codigos)}")
+    if periodo:
+        print(f"  Período: {periodo[0]} a {periodo[1]}")
+    if orcamento_bytes():
+        print(f"  Orçamento de memória: {orcamento_bytes() / 1024 ** 2:,.0f} MB por município")
+    print(f"  Saída: {args.saida}\n")
+
+    inicio = time.perf_counter()
+    resultados = executar_lote(nomes, etapas, args.saida, periodo, por_municipio, args.trabalhadores,
+                               args.processos, comparar, ao_concluir=imprimir_resultado)
+    if imprimir_resumo(resultados, nomes, inicio):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
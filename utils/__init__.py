@@ -10,6 +10,25 @@ from .common import *
 from .data_loader import *
 from .data_processor import *
 from .visualizacoes import *
+from .agregacao import *
+from .sessao import *
+from .renderizacao import configurar_renderizacao, fila_de_renderizacao
+from .cubo import CuboPARS
+from .fluxos import MatrizFluxos
+from .classificacao import AREAS_CLINICAS, ClassificadorAreas, carregar_classificador
+from .comparacao import ComparacaoMunicipios
+from .tendencias import *
+from .demografia import HistogramaDemografico, indice_faixa_etaria, rotulos_faixas_etarias
+from .monetario import *
+from .ranking import RankingTopK, top_k
+from .outliers import *
+from .hierarquia import GRUPOS_SIGTAP, NIVEIS_SIGTAP, adicionar_niveis, codigo_nivel, nome_grupo
+from .instrumentacao import (etapa, instrumentar, configurar_instrumentacao, finalizar_instrumentacao,
+                             imprimir_resumo_rastro, exportar_json, exportar_chrome_trace)
+from .motor_duckdb import FonteDuckDB, particionar_parquet
+from .memoria import configurar_orcamento, orcamento_bytes, linhas_por_bloco, resumo_memoria
+from .cache_consultas import configurar_cache, estatisticas_cache, resumo_cache
+from .dicionarios import DicionarioCodigos, carregar_dicionarios, codificar_particao
 
 __all__ = [
     # Exportar pandas
@@ -19,6 +38,7 @@ __all__ = [
     # common
     'criar_diretorio',
     'configurar_estilo_graficos',
+    'pyplot',
     'salvar_grafico',
     'imprimir_cabecalho',
     'imprimir_subcabecalho',
@@ -33,6 +53,7 @@ __all__ = [
     'carregar_estabelecimentos',
     'carregar_cids',
     'carregar_dim_tempo',
+    'aquecer_cache_dimensoes',
     
     # data_processor
     'padronizar_codigo',
@@ -52,4 +73,94 @@ __all__ = [
     'criar_grafico_linha_temporal',
     'criar_grafico_barras_vertical',
     'criar_grafico_barras_horizontal_agrupadas',
+    
+    # agregacao
+    'agregar_multiplas_medidas',
+    
+    # sessao
+    'SessaoAnalise',
+    
+    # renderizacao
+    'configurar_renderizacao',
+    'fila_de_renderizacao',
+    
+    # cubo
+    'CuboPARS',
+    
+    # fluxos
+    'MatrizFluxos',
+    
+    # classificacao
+    'AREAS_CLINICAS',
+    'ClassificadorAreas',
+    'carregar_classificador',
+    
+    # comparacao
+    'ComparacaoMunicipios',
+    
+    # tendencias
+    'matriz_series',
+    'completar_meses',
+    'variacao',
+    'media_movel',
+    'calcular_tendencias',
+    
+    # demografia
+    'HistogramaDemografico',
+    'indice_faixa_etaria',
+    'rotulos_faixas_etarias',
+    
+    # monetario
+    'para_centavos',
+    'de_centavos',
+    'adicionar_centavos',
+    'formatar_centavos',
+    'somar_por_faixa',
+    
+    # ranking
+    'top_k',
+    'RankingTopK',
+    
+    # outliers
+    'LIMITE_ESCORE',
+    'MINIMO_REGISTROS',
+    'estatisticas_por_grupo',
+    'pontuar_outliers',
+    'resumo_outliers',
+    
+    # hierarquia
+    'GRUPOS_SIGTAP',
+    'NIVEIS_SIGTAP',
+    'adicionar_niveis',
+    'codigo_nivel',
+    'nome_grupo',
+    
+    # instrumentacao
+    'etapa',
+    'instrumentar',
+    'configurar_instrumentacao',
+    'finalizar_instrumentacao',
+    'imprimir_resumo_rastro',
+    'exportar_json',
+    'exportar_chrome_trace',
+    
+    # motor_duckdb
+    'FonteDuckDB',
+    'particionar_parquet',
+    
+    # memoria
+    'configurar_orcamento',
+    'orcamento_bytes',
+    'linhas_por_bloco',
+    'resumo_memoria',
+    
+    # cache_consultas
+    'configurar_cache',
+    'estatisticas_cache',
+    'resumo_cache',
+    
+    # dicionarios
+    'DicionarioCodigos',
+    'carregar_dicionarios',
+    'codificar_particao',
 ]
\ No newline at end of file
@@ -0,0 +1,202 @@
+"""Motor de agregação com várias medidas e vários conjuntos de chaves"""
+
+import numpy as np
+import pandas as pd
+
+def _normalizar_conjuntos(conjuntos_chaves):
+    """Converte os conjuntos de chaves em tuplas de colunas"""
+    if isinstance(conjuntos_chaves, str):
+        conjuntos_chaves = [conjuntos_chaves]
+    return [(c,) if isinstance(c, str) else tuple(c) for c in conjuntos_chaves]
+
+def _quantil_da_operacao(operacao):
+    """Retorna o quantil de operações 'q50', 'q90' ou float; None caso contrário"""
+    if isinstance(operacao, float):
+        return operacao
+    if isinstance(operacao, str) and operacao.startswith('q') and operacao[1:].isdigit():
+        return int(operacao[1:]) / 100
+    if operacao == 'median':
+        return 0.5
+    return None
+
+def combinar_codigos(codigos, tamanhos):
+    """Combina códigos fatorados de várias chaves em um id de grupo compacto
+
+    Retorna (ids por linha, códigos de cada chave por grupo), com os grupos
+    ordenados pelas chaves e linhas com chave nula marcadas com -1.
+    """
+    n_linhas = len(codigos[0])
+    validos = np.ones(n_linhas, dtype=bool)
+    for cod in codigos:
+        validos &= cod >= 0
+
+    combinado = np.zeros(n_linhas, dtype=np.int64)
+    cardinalidade = 1
+    for cod, tam in zip(codigos, tamanhos):
+        if cardinalidade * tam >= 2 ** 62:
+            # Compactar antes de estourar o int64 em chaves com muitas combinações
+            combinado, unicos = pd.factorize(combinado)
+            cardinalidade = max(len(unicos), 1)
+        combinado = combinado * tam + cod
+        cardinalidade *= tam
+
+    # Linhas com chave nula ficam fora, como no groupby padrão
+    ids = np.full(n_linhas, -1, dtype=np.int64)
+    ids[validos], unicos = pd.factorize(combinado[validos])
+    n_grupos = len(unicos)
+
+    # Primeira linha de cada grupo recupera os códigos das chaves
+    primeira = np.empty(n_grupos, dtype=np.int64)
+    linhas = np.flatnonzero(validos)
+    primeira[ids[linhas][::-1]] = linhas[::-1]
+    codigos_grupo = [cod[primeira] for cod in codigos]
+
+    # Ordenar os grupos pelas chaves (os códigos vêm de factorize com sort=True)
+    ordem = np.lexsort(codigos_grupo[::-1])
+    posicao = np.empty(n_grupos, dtype=np.int64)
+    posicao[ordem] = np.arange(n_grupos)
+    ids[validos] = posicao[ids[validos]]
+    return ids, [cod[ordem] for cod in codigos_grupo]
+
+def ordenar_por_grupo(ids, valores, n_grupos):
+    """Ordena valores dentro de cada grupo e retorna (ordenados, inícios, contagens)"""
+    validos = (ids >= 0) & ~np.isnan(valores)
+    ids_v = ids[validos]
+    vals_v = valores[validos]
+    ordem = np.lexsort((vals_v, ids_v))
+    contagens = np.bincount(ids_v, minlength=n_grupos)
+    inicios = np.cumsum(contagens) - contagens
+    return vals_v[ordem], inicios, contagens
+
+def quantil_ordenado(ordenados, inicios, contagens, quantil):
+    """Quantil de cada grupo a partir dos valores ordenados por grupo (NaN em grupos vazios)"""
+    resultado = np.full(len(contagens), np.nan)
+    tem_dados = contagens > 0
+
+    # Interpolação linear, igual ao padrão do pandas
+    posicao = inicios[tem_dados] + quantil * (contagens[tem_dados] - 1)
+    baixo = np.floor(posicao).astype(np.int64)
+    alto = np.ceil(posicao).astype(np.int64)
+    fracao = posicao - baixo
+    resultado[tem_dados] = ordenados[baixo] + (ordenados[alto] - ordenados[baixo]) * fracao
+    return resultado
+
+def _calcular_medida(operacao, ids, n_grupos, valores, cache_ordem, chave_cache, codigos_valor=None,
+                     nao_nulos=None):
+    """Calcula uma medida para todos os grupos com operações vetorizadas"""
+    validos_grupo = ids >= 0
+    if operacao == 'size':
+        return np.bincount(ids[validos_grupo], minlength=n_grupos)
+
+    if operacao == 'count':
+        # Valores não nulos da coluna original (texto também conta, como no groupby)
+        return np.bincount(ids[validos_grupo & nao_nulos], minlength=n_grupos)
+
+    if operacao == 'nunique':
+        cod, n_valores = codigos_valor
+        mask = validos_grupo & (cod >= 0)
+        pares = pd.unique(ids[mask].astype(np.int64) * n_valores + cod[mask])
+        return np.bincount(pares // n_valores, minlength=n_grupos)
+
+    validos = validos_grupo & ~np.isnan(valores)
+    contagem = np.bincount(ids[validos], minlength=n_grupos)
+    soma = np.bincount(ids[validos], weights=valores[validos], minlength=n_grupos)
+    if operacao == 'sum':
+        return soma
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        media = soma / contagem
+        if operacao == 'mean':
+            return media
+        if operacao == 'std':
+            desvios = (valores[validos] - media[ids[validos]]) ** 2
+            soma_quad = np.bincount(ids[validos], weights=desvios, minlength=n_grupos)
+            return np.where(contagem > 1, np.sqrt(soma_quad / (contagem - 1)), np.nan)
+
+    if chave_cache not in cache_ordem:
+        cache_ordem[chave_cache] = ordenar_por_grupo(ids, valores, n_grupos)
+    ordenados, inicios, contagens = cache_ordem[chave_cache]
+    resultado = np.full(n_grupos, np.nan)
+    tem_dados = contagens > 0
+
+    if operacao == 'min':
+        resultado[tem_dados] = ordenados[inicios[tem_dados]]
+        return resultado
+    if operacao == 'max':
+        resultado[tem_dados] = ordenados[inicios[tem_dados] + contagens[tem_dados] - 1]
+        return resultado
+
+    quantil = _quantil_da_operacao(operacao)
+    if quantil is None:
+        raise ValueError(f"Operação de agregação desconhecida: {operacao}")
+    return quantil_ordenado(ordenados, inicios, contagens, quantil)
+
+def agregar_multiplas_medidas(df, conjuntos_chaves, medidas):
+    """Calcula várias medidas para vários conjuntos de chaves em uma única varredura
+
+    conjuntos_chaves: lista de conjuntos de colunas, ex.: [['Competencia'], ['PA_PROC_ID']]
+    medidas: dict nome -> (coluna, operacao), com operacao em 'size', 'count',
+             'sum', 'mean', 'min', 'max', 'std', 'nunique', 'median' ou quantis
+             ('q90' ou float entre 0 e 1)
+
+    Retorna dict tupla_de_chaves -> DataFrame organizado (uma linha por grupo,
+    ordenado pelas chaves, como no groupby). df também pode ser uma fonte SQL
+    (utils.motor_duckdb.FonteDuckDB): a agregação roda no próprio motor.
+    """
+    if hasattr(df, 'agregar'):
+        return df.agregar(conjuntos_chaves, medidas)
+    conjuntos = _normalizar_conjuntos(conjuntos_chaves)
+
+    # Fatorar cada coluna-chave uma única vez
+    fatores = {}
+    for coluna in dict.fromkeys(c for conjunto in conjuntos for c in conjunto):
+        codigos, valores_unicos = pd.factorize(df[coluna], sort=True)
+        fatores[coluna] = (codigos, valores_unicos)
+
+    # Converter as colunas de medida uma única vez
+    valores_medida = {}
+    colunas_inteiras = set()
+    codigos_medida = {}
+    nao_nulos = {}
+    for coluna, operacao in medidas.values():
+        if operacao == 'count':
+            if coluna not in nao_nulos:
+                nao_nulos[coluna] = df[coluna].notna().to_numpy()
+        elif operacao == 'nunique':
+            if coluna not in codigos_medida:
+                cod, unicos = pd.factorize(df[coluna])
+                codigos_medida[coluna] = (cod.astype(np.int64), max(len(unicos), 1))
+        elif operacao != 'size' and coluna not in valores_medida:
+            serie = pd.to_numeric(df[coluna], errors='coerce')
+            if pd.api.types.is_integer_dtype(serie) or pd.api.types.is_bool_dtype(serie):
+                colunas_inteiras.add(coluna)
+            valores_medida[coluna] = serie.to_numpy(dtype=float)
+
+    resultados = {}
+    for conjunto in conjuntos:
+        codigos = [fatores[c][0] for c in conjunto]
+        tamanhos = [max(len(fatores[c][1]), 1) for c in conjunto]
+        ids, codigos_grupo = combinar_codigos(codigos, tamanhos)
+        n_grupos = len(codigos_grupo[0])
+
+        dados = {}
+        for coluna, cod in zip(conjunto, codigos_grupo):
+            dados[coluna] = fatores[coluna][1].take(cod)
+
+        cache_ordem = {}
+        for nome, (coluna, operacao) in medidas.items():
+            valores = _calcular_medida(
+                operacao, ids, n_grupos,
+                valores_medida.get(coluna),
+                cache_ordem, coluna,
+                codigos_medida.get(coluna),
+                nao_nulos.get(coluna)
+            )
+            # Somas de colunas inteiras voltam a ser inteiras, como no groupby
+            if operacao == 'sum' and coluna in colunas_inteiras:
+                valores = np.rint(valores).astype(np.int64)
+            dados[nome] = valores
+
+        resultados[conjunto] = pd.DataFrame(dados)
+
+    return resultados
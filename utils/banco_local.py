@@ -0,0 +1,97 @@
+"""Banco local (SQLite ou DuckDB) com as tabelas pars e de dimensão, carregado dos CSVs dos dados sintéticos"""
+
+import glob
+import os
+
+import pandas as pd
+
+from .memoria import bytes_por_linha_esquema, linhas_por_bloco
+
+# Tabelas e colunas lidas pela extração e por utils.data_loader, com os tipos do banco DATASUS
+ESQUEMAS = {
+    'pars': {
+        'PA_CODUNI': 'VARCHAR(7)', 'PA_GESTAO': 'VARCHAR(6)', 'PA_UFMUN': 'VARCHAR(6)', 'PA_TPUPS': 'VARCHAR(2)',
+        'PA_MVM': 'VARCHAR(6)', 'PA_CMP': 'VARCHAR(6)', 'PA_PROC_ID': 'VARCHAR(10)', 'PA_CBOCOD': 'VARCHAR(6)',
+        'PA_CIDPRI': 'VARCHAR(4)', 'PA_CATEND': 'VARCHAR(2)', 'PA_IDADE': 'INTEGER', 'PA_SEXO': 'VARCHAR(1)',
+        'PA_RACACOR': 'VARCHAR(2)', 'PA_MUNPCN': 'VARCHAR(6)', 'PA_QTDPRO': 'INTEGER', 'PA_QTDAPR': 'INTEGER',
+        'PA_VALPRO': 'DOUBLE', 'PA_VALAPR': 'DOUBLE', 'PA_INE': 'VARCHAR(10)',
+    },
+    'tb_sigtaw': {'ip_cod': 'VARCHAR(10)', 'ip_dscr': 'VARCHAR(255)'},
+    'tb_municip': {'co_municip': 'VARCHAR(7)', 'ds_nome': 'VARCHAR(100)', 'co_status': 'VARCHAR(10)'},
+    'cadgerrs': {
+        'cnes': 'VARCHAR(7)', 'fantasia': 'VARCHAR(255)', 'raz_soci': 'VARCHAR(255)',
+        'codufmun': 'VARCHAR(6)', 'bairro': 'VARCHAR(100)', 'excluido': 'INTEGER',
+    },
+    's_cid': {'cd_cod': 'VARCHAR(4)', 'cd_descr': 'VARCHAR(255)'},
+    'dimtempo': {
+        'Id': 'INTEGER', 'mes': 'INTEGER', 'mesext': 'VARCHAR(20)', 'ano': 'INTEGER', 'anomes': 'INTEGER',
+        'MAExt': 'VARCHAR(30)', 'trimestre': 'INTEGER', 'triex_t': 'VARCHAR(20)', 'anotri': 'INTEGER',
+    },
+}
+
+# Índices do SQLite para os filtros da extração (o DuckDB dispensa índices nas varreduras)
+INDICES = {'pars': ['PA_UFMUN']}
+
+def _tipos_csv(esquema):
+    """Tipos do pandas para ler cada coluna do CSV sem perder zeros à esquerda"""
+    tipos = {'VARCHAR': str, 'INTEGER': 'Int64', 'DOUBLE': 'float64'}
+    return {coluna: tipos[tipo.split('(')[0]] for coluna, tipo in esquema.items()}
+
+def _arquivos_tabela(pasta, tabela):
+    """CSVs de uma tabela: dimensões em pasta/dimensoes, pars em pasta/dados_pars*.csv (um ou vários)"""
+    if tabela == 'pars':
+        return sorted(glob.glob(os.path.join(pasta, 'dados_pars*.csv')))
+    caminho = os.path.join(pasta, 'dimensoes', f'{tabela}.csv')
+    return [caminho] if os.path.exists(caminho) else []
+
+def _conectar_escrita(backend, arquivo):
+    """Conexão de escrita com um arquivo novo"""
+    if os.path.exists(arquivo):
+        os.remove(arquivo)
+    os.makedirs(os.path.dirname(os.path.abspath(arquivo)), exist_ok=True)
+    if backend == 'sqlite':
+        import sqlite3
+        return sqlite3.connect(arquivo)
+    if backend == 'duckdb':
+        import duckdb
+        return duckdb.connect(arquivo)
+    raise ValueError(f"Backend local desconhecido: {backend} (use sqlite ou duckdb)")
+
+def _inserir(conn, backend, tabela, bloco):
+    """Insere um bloco do CSV na tabela"""
+    if backend == 'sqlite':
+        bloco.to_sql(tabela, conn, if_exists='append', index=False)
+    else:
+        conn.register('bloco_csv', bloco)
+        conn.execute(f"INSERT INTO {tabela} SELECT {', '.join(bloco.columns)} FROM bloco_csv")
+        conn.unregister('bloco_csv')
+
+def criar_banco_local(pasta, arquivo, backend='sqlite', tamanho_bloco=None):
+    """Cria o banco com as tabelas de ESQUEMAS a partir dos CSVs de gerar_dados_sinteticos.py
+
+    Lê pasta/dimensoes/<tabela>.csv e pasta/dados_pars*.csv (inteiro ou
+    particionado) em blocos, com memória constante (sem tamanho_bloco, o bloco
+    segue o orçamento de memória e o esquema da tabela). Colunas ausentes no
+    CSV ficam nulas. Retorna {tabela: linhas}.
+    """
+    conn = _conectar_escrita(backend, arquivo)
+    linhas = {}
+    try:
+        for tabela, esquema in ESQUEMAS.items():
+            colunas = ', '.join(f'{coluna} {tipo}' for coluna, tipo in esquema.items())
+            conn.execute(f"CREATE TABLE {tabela} ({colunas})")
+            linhas[tabela] = 0
+            for caminho in _arquivos_tabela(pasta, tabela):
+                blocos = pd.read_csv(caminho, dtype=_tipos_csv(esquema), usecols=lambda c: c in esquema,
+                                     encoding='utf-8-sig', keep_default_na=False, na_values=[''],
+                                     chunksize=tamanho_bloco or linhas_por_bloco(bytes_por_linha_esquema(esquema)))
+                for bloco in blocos:
+                    _inserir(conn, backend, tabela, bloco.reindex(columns=list(esquema)))
+                    linhas[tabela] += len(bloco)
+            if backend == 'sqlite':
+                for coluna in INDICES.get(tabela, []):
+                    conn.execute(f"CREATE INDEX idx_{tabela}_{coluna.lower()} ON {tabela} ({coluna})")
+        conn.commit()
+    finally:
+        conn.close()
+    return linhas
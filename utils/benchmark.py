@@ -0,0 +1,329 @@
+"""Benchmark das etapas do projeto (carga, limpeza, análise exploratória, processamento e análises) sobre dados sintéticos"""
+
+import json
+import os
+import platform
+import runpy
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import redirect_stdout
+from dataclasses import dataclass
+
+try:
+    import resource
+except ImportError:  # Windows: sem getrusage, o pico de memória fica nulo
+    resource = None
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASTA_BENCHMARKS = os.path.join(RAIZ, 'benchmarks')
+PASTA_DADOS_BENCHMARK = os.path.join(PASTA_BENCHMARKS, 'dados')
+PASTA_RESULTADOS = os.path.join(PASTA_BENCHMARKS, 'resultados')
+ARQUIVO_BASE = os.path.join(PASTA_BENCHMARKS, 'base.json')
+
+# Variação relativa acima da qual um caso é considerado regressão
+LIMITE_REGRESSAO = 0.10
+
+# Diferenças absolutas menores que estas são ruído de medição, mesmo acima do limite
+TOLERANCIA = {'tempo_s': 0.05, 'pico_rss_mb': 5.0}
+
+# Caches gerados pelas análises, apagados antes de cada execução (medição a frio)
+CACHES_ANALISES = ('cubo', 'classificacao', 'graficos')
+
+# Banco local criado com os dados de cada tamanho (None = banco configurado no ambiente)
+BANCO_PADRAO = 'sqlite'
+
+# Partições do gerador -> arquivos esperados pelas etapas de limpeza e pelo script 7
+ARQUIVOS_MUNICIPIOS = {'431020': 'dados_pars.csv', '431720': 'dados_pars_sr.csv', '430610': 'dados_pars_ca.csv'}
+
+@dataclass
+class Caso:
+    """Etapa medida: um script executado como __main__ ou uma função deste módulo"""
+    nome: str
+    alvo: str
+    registros: str = None
+    caches: tuple = ()
+
+    @property
+    def script(self):
+        return self.alvo.endswith('.py')
+
+def _inicializar_pacote():
+    """Importação do pacote utils em um interpretador novo (custo fixo de toda execução)"""
+    inicio = time.perf_counter()
+    subprocess.run([sys.executable, '-c', 'import utils'], check=True, env=_ambiente_filho())
+    tempos = os.times()
+    return {
+        'tempo_s': time.perf_counter() - inicio,
+        'cpu_s': tempos.children_user + tempos.children_system,
+        'pico_rss_mb': _pico_rss_mb(resource.RUSAGE_CHILDREN) if resource else None,
+    }
+
+def _carregar_dados():
+    """Leitura do CSV de dados limpos"""
+    from utils.data_loader import carregar_csv
+    carregar_csv('dados_limpos.csv')
+
+def _carregar_dimensoes():
+    """Leitura das tabelas de dimensão do banco"""
+    from utils import data_loader
+    for carregar in (data_loader.carregar_procedimentos, data_loader.carregar_municipios,
+                     data_loader.carregar_estabelecimentos, data_loader.carregar_cids,
+                     data_loader.carregar_dim_tempo):
+        carregar()
+
+def _processar_dados():
+    """Funções de utils/data_processor.py na sequência usada pelas análises"""
+    from utils.data_loader import carregar_csv, carregar_procedimentos
+    from utils import data_processor as dp
+    df = carregar_csv('dados_limpos.csv')
+    procedimentos = carregar_procedimentos()
+
+    inicio = _inicio_medicao()
+    df = dp.padronizar_codigo(df, 'PA_PROC_ID', tamanho=10)
+    df = dp.padronizar_codigo(df, 'PA_CODUNI', tamanho=7)
+    df = dp.preparar_competencia(df)
+    df = dp.preparar_temporal(df)
+    dp.calcular_estatisticas_basicas(df, 'PA_VALAPR')
+    por_estabelecimento = dp.agrupar_por_categoria(df, 'PA_CODUNI')
+    mensal = dp.agrupar_por_categoria(df, 'anomes').sort_values('anomes')
+    dp.identificar_picos_quedas(mensal, 'PA_VALAPR')
+    dp.calcular_periodos_recentes(df, 'PA_CMP')
+    if not procedimentos.empty:
+        df = dp.adicionar_descricoes(df, procedimentos, 'PA_PROC_ID', 'ip_cod_padrao', 'ip_dscr')
+        df['ip_dscr'].map(dp.truncar_texto)
+    por_estabelecimento['PA_CODUNI'].map(dp.truncar_texto)
+    return inicio
+
+CASOS = [
+    Caso('inicializacao', '_inicializar_pacote'),
+    Caso('extracao', 'extrair_dados_slq_to_csv.py', registros='dados_pars.csv'),
+    Caso('carregar_dados', '_carregar_dados', registros='dados_limpos.csv'),
+    Caso('carregar_dimensoes', '_carregar_dimensoes'),
+    Caso('limpeza', 'limpeza_dados.py', registros='dados_pars.csv'),
+    Caso('analise_exploratoria', 'analise_exploratoria_de_dados.py', registros='dados_limpos.csv'),
+    Caso('processamento', '_processar_dados', registros='dados_limpos.csv'),
+    Caso('analise_1', 'scripts/1_volume_perfil_procedimentos.py', 'dados_limpos.csv', CACHES_ANALISES),
+    Caso('analise_2', 'scripts/2_producao_estabelecimento_saude.py', 'dados_limpos.csv', CACHES_ANALISES),
+    Caso('analise_3', 'scripts/3_perfil_demografico_epidemiologico.py', 'dados_limpos.csv', CACHES_ANALISES),
+    Caso('analise_4', 'scripts/4_fluxos_regionais_acessos.py', 'dados_limpos.csv', CACHES_ANALISES),
+    Caso('analise_5', 'scripts/5_recursos_financeiros.py', 'dados_limpos.csv', CACHES_ANALISES),
+    Caso('analise_6', 'scripts/6_areas_criticas.py', 'dados_limpos.csv', CACHES_ANALISES),
+    Caso('analise_7', 'scripts/7_comparacoes_tendencias.py', 'dados_limpos.csv', CACHES_ANALISES),
+]
+
+def _inicio_medicao():
+    """Relógio de parede e tempo de CPU do processo"""
+    return time.perf_counter(), time.process_time()
+
+def _pico_rss_mb(quem=None):
+    """Maior memória residente do processo (ou dos filhos) até agora (MB), se a plataforma informar"""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF if quem is None else quem).ru_maxrss
+    # Linux informa em KB; macOS, em bytes
+    return pico / (1024 ** 2 if sys.platform == 'darwin' else 1024)
+
+def medir_caso(nome):
+    """Executa um caso no processo atual (diretório = pasta dos dados) e retorna as medidas"""
+    caso = {c.nome: c for c in CASOS}[nome]
+    inicio = _inicio_medicao()
+    if caso.script:
+        caminho = os.path.join(RAIZ, caso.alvo)
+        sys.argv = [caminho]
+        runpy.run_path(caminho, run_name='__main__')
+    else:
+        # Funções com preparação própria devolvem o início do trecho medido (ou as próprias medidas)
+        retorno = globals()[caso.alvo]()
+        if isinstance(retorno, dict):
+            return retorno
+        inicio = retorno or inicio
+    return {
+        'tempo_s': time.perf_counter() - inicio[0],
+        'cpu_s': time.process_time() - inicio[1],
+        'pico_rss_mb': _pico_rss_mb(),
+    }
+
+def _arquivo_banco(pasta, banco):
+    return os.path.join(pasta, f'datasus_db.{banco}')
+
+def _ambiente_filho(pasta=None, banco=None):
+    """Variáveis de ambiente dos processos medidos (com o banco local dos dados, se houver)"""
+    ambiente = dict(os.environ)
+    if banco:
+        ambiente['DB_BACKEND'] = banco
+        ambiente['DB_ARQUIVO'] = _arquivo_banco(pasta, banco)
+    ambiente['PYTHONPATH'] = os.pathsep.join(filter(None, [RAIZ, ambiente.get('PYTHONPATH')]))
+    ambiente['PYTHONIOENCODING'] = 'utf-8'
+    ambiente['MPLBACKEND'] = 'Agg'
+    return ambiente
+
+def _executar_script(pasta, script, log):
+    """Roda um script da raiz com a pasta dos dados como diretório de trabalho"""
+    with open(os.path.join(pasta, log), 'w', encoding='utf-8') as saida:
+        retorno = subprocess.run([sys.executable, os.path.join(RAIZ, script)], cwd=pasta,
+                                 stdout=saida, stderr=subprocess.STDOUT, env=_ambiente_filho())
+    if retorno.returncode != 0:
+        raise RuntimeError(f"{script} falhou (ver {os.path.join(pasta, log)})")
+
+def _contar_linhas(caminho):
+    """Registros de um CSV (linhas menos o cabeçalho)"""
+    with open(caminho, 'rb') as f:
+        return max(sum(bloco.count(b'\n') for bloco in iter(lambda: f.read(1 << 20), b'')) - 1, 0)
+
+def _preparar_banco(pasta, banco):
+    """Cria o banco local da pasta, se ainda não existir"""
+    from .banco_local import criar_banco_local
+    if banco and not os.path.exists(_arquivo_banco(pasta, banco)):
+        criar_banco_local(pasta, _arquivo_banco(pasta, banco), banco)
+
+def preparar_dados(registros, semente=42, banco=BANCO_PADRAO, pasta_base=PASTA_DADOS_BENCHMARK):
+    """Gera (uma única vez) os dados sintéticos de um tamanho e os arquivos limpos usados pelas análises
+
+    Os registros são repartidos entre Ijuí, Santa Rosa e Cruz Alta, nos mesmos
+    arquivos da extração, e carregados em um banco local (sqlite ou duckdb);
+    a limpeza roda aqui para que as análises possam ser medidas isoladamente.
+    Retorna (pasta, {arquivo: registros}).
+    """
+    from .sintetico import GeradorPARS
+
+    pasta = os.path.join(pasta_base, f'{registros}_s{semente}')
+    marcador = os.path.join(pasta, 'preparado.json')
+    if os.path.exists(marcador):
+        _preparar_banco(pasta, banco)
+        with open(marcador, encoding='utf-8') as f:
+            return pasta, json.load(f)
+
+    shutil.rmtree(pasta, ignore_errors=True)
+    GeradorPARS(municipios=len(ARQUIVOS_MUNICIPIOS), semente=semente).gravar(pasta, registros, particionar=True)
+    for codigo, nome in ARQUIVOS_MUNICIPIOS.items():
+        os.replace(os.path.join(pasta, f'dados_pars_{codigo}.csv'), os.path.join(pasta, nome))
+    _preparar_banco(pasta, banco)
+
+    # Santa Rosa é limpa direto (só o script 7 a usa); Cruz Alta e Ijuí pelos scripts de limpeza
+    from limpeza_dados import limpar_dados
+    with open(os.path.join(pasta, 'preparacao_sr.txt'), 'w', encoding='utf-8') as saida, redirect_stdout(saida):
+        limpar_dados(os.path.join(pasta, 'dados_pars_sr.csv'), os.path.join(pasta, 'dados_limpos_sr.csv'))
+    _executar_script(pasta, 'limpeza_dados_outras_cidades.py', 'preparacao_ca.txt')
+    _executar_script(pasta, 'limpeza_dados.py', 'preparacao_ijui.txt')
+
+    contagens = {nome: _contar_linhas(os.path.join(pasta, nome)) for nome in ('dados_pars.csv', 'dados_limpos.csv')}
+    with open(marcador, 'w', encoding='utf-8') as f:
+        json.dump(contagens, f, indent=2)
+    return pasta, contagens
+
+def executar_caso(caso, pasta, contagens, repeticoes=1, banco=BANCO_PADRAO):
+    """Mede um caso em processos novos (um por repetição) e resume pela mediana"""
+    medidas, erro = [], None
+    arquivo_medidas = os.path.join(pasta, f'medidas_{caso.nome}.json')
+    for _ in range(repeticoes):
+        for cache in caso.caches:
+            shutil.rmtree(os.path.join(pasta, cache), ignore_errors=True)
+        with open(os.path.join(pasta, f'log_{caso.nome}.txt'), 'w', encoding='utf-8') as saida:
+            retorno = subprocess.run([sys.executable, '-m', 'utils.benchmark', caso.nome, arquivo_medidas],
+                                     cwd=pasta, stdout=saida, stderr=subprocess.STDOUT, env=_ambiente_filho(pasta, banco))
+        if retorno.returncode != 0:
+            erro = f"código de saída {retorno.returncode} (ver {saida.name})"
+            break
+        with open(arquivo_medidas, encoding='utf-8') as f:
+            medidas.append(json.load(f))
+
+    resultado = {'caso': caso.nome, 'registros': contagens.get(caso.registros), 'repeticoes': len(medidas)}
+    if erro:
+        return {**resultado, 'status': 'erro', 'erro': erro}
+
+    for metrica in ('tempo_s', 'cpu_s'):
+        resultado[metrica] = statistics.median(m[metrica] for m in medidas)
+    picos = [m['pico_rss_mb'] for m in medidas if m['pico_rss_mb'] is not None]
+    resultado['pico_rss_mb'] = max(picos) if picos else None
+    resultado['registros_por_s'] = (resultado['registros'] / resultado['tempo_s']
+                                    if resultado['registros'] and resultado['tempo_s'] > 0 else None)
+    resultado['status'] = 'ok'
+    return resultado
+
+def executar_benchmark(tamanhos, casos=None, repeticoes=1, semente=42, banco=BANCO_PADRAO, ao_concluir=None):
+    """Mede os casos escolhidos em cada tamanho de dados e retorna o relatório completo"""
+    escolhidos = [c for c in CASOS if not casos or c.nome in casos]
+    desconhecidos = set(casos or []) - {c.nome for c in CASOS}
+    if desconhecidos:
+        raise ValueError(f"Casos desconhecidos: {', '.join(sorted(desconhecidos))}")
+
+    resultados = []
+    for tamanho in tamanhos:
+        pasta, contagens = preparar_dados(tamanho, semente, banco)
+        for caso in escolhidos:
+            resultado = {'tamanho': tamanho, **executar_caso(caso, pasta, contagens, repeticoes, banco)}
+            resultados.append(resultado)
+            if ao_concluir:
+                ao_concluir(resultado)
+
+    return {
+        'commit': commit_atual(),
+        'data': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'processadores': os.cpu_count(),
+        'semente': semente,
+        'banco': banco or 'configurado',
+        'repeticoes': repeticoes,
+        'resultados': resultados,
+    }
+
+def commit_atual():
+    """Hash curto do commit atual, marcado quando há alterações não commitadas"""
+    def git(*args):
+        return subprocess.run(['git', *args], cwd=RAIZ, capture_output=True, text=True).stdout.strip()
+    try:
+        commit = git('rev-parse', '--short', 'HEAD')
+        modificado = git('status', '--porcelain', '--untracked-files=no')
+    except OSError:
+        return 'desconhecido'
+    return (commit or 'desconhecido') + ('-modificado' if modificado else '')
+
+def salvar_relatorio(relatorio, caminho=None):
+    """Grava o relatório em benchmarks/resultados/<commit>.json (ou no caminho informado)"""
+    caminho = caminho or os.path.join(PASTA_RESULTADOS, f"{relatorio['commit']}.json")
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump(relatorio, f, indent=2, ensure_ascii=False)
+    return caminho
+
+def carregar_relatorio(caminho):
+    """Lê um relatório salvo; aceita também o hash do commit"""
+    if not os.path.exists(caminho):
+        caminho = os.path.join(PASTA_RESULTADOS, f'{caminho}.json')
+    with open(caminho, encoding='utf-8') as f:
+        return json.load(f)
+
+def comparar(relatorio, base, limite=LIMITE_REGRESSAO, metricas=('tempo_s', 'pico_rss_mb')):
+    """Compara cada (caso, tamanho) com a base; retorna uma linha por métrica com a variação relativa"""
+    anteriores = {(r['caso'], r['tamanho']): r for r in base['resultados'] if r.get('status') == 'ok'}
+    comparacao = []
+    for atual in relatorio['resultados']:
+        anterior = anteriores.get((atual['caso'], atual['tamanho']))
+        if anterior is None or atual.get('status') != 'ok':
+            continue
+        for metrica in metricas:
+            antes, depois = anterior.get(metrica), atual.get(metrica)
+            if not antes or depois is None:
+                continue
+            variacao = depois / antes - 1
+            comparacao.append({
+                'caso': atual['caso'],
+                'tamanho': atual['tamanho'],
+                'metrica': metrica,
+                'base': antes,
+                'atual': depois,
+                'variacao': variacao,
+                'regressao': variacao > limite and depois - antes > TOLERANCIA.get(metrica, 0),
+            })
+    return comparacao
+
+if __name__ == "__main__":
+    # Processo filho: python -m utils.benchmark <caso> <arquivo de medidas>
+    nome, arquivo = sys.argv[1:3]
+    medidas = medir_caso(nome)
+    with open(arquivo, 'w', encoding='utf-8') as f:
+        json.dump(medidas, f)
@@ -0,0 +1,171 @@
+"""Cache de resultados de consultas SQL: memória (LRU limitado por tamanho) e disco (Parquet)
+
+A chave é o SQL normalizado mais a versão da fonte (database_connection.versao_tabela):
+quando a tabela muda, a chave muda e a consulta volta a ser executada.
+"""
+
+import hashlib
+import os
+import re
+import uuid
+from collections import OrderedDict
+
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Pasta do cache em disco (compartilhado pelos scripts e pelos processos do lote)
+PASTA_CACHE_CONSULTAS = os.path.join(RAIZ, 'cache_consultas')
+
+# Limites padrão (MB); CACHE_CONSULTAS=0 desativa o cache
+LIMITE_MEMORIA_MB = 256
+LIMITE_DISCO_MB = 1024
+
+# Literais entre aspas ficam intactos na normalização
+_LITERAIS = re.compile(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\")")
+
+def normalizar_sql(sql):
+    """SQL com espaços normalizados fora dos literais e sem ';' final"""
+    partes = _LITERAIS.split(sql.strip().rstrip(';').strip())
+    for i in range(0, len(partes), 2):
+        texto = re.sub(r'\s+', ' ', partes[i])
+        partes[i] = re.sub(r'\s*([,()=<>])\s*', r'\1', texto)
+    return ''.join(partes).strip()
+
+def _tamanho(df):
+    return int(df.memory_usage(deep=True).sum())
+
+class CacheConsultas:
+    """Resultados de consultas em dois níveis: memória do processo e arquivos Parquet"""
+
+    def __init__(self, limite_memoria_mb=LIMITE_MEMORIA_MB, pasta=PASTA_CACHE_CONSULTAS,
+                 limite_disco_mb=LIMITE_DISCO_MB, ativo=True):
+        self.limite_memoria = int(limite_memoria_mb * 1024 ** 2)
+        self.limite_disco = int(limite_disco_mb * 1024 ** 2)
+        self.pasta = pasta
+        self.ativo = ativo
+        self._memoria = OrderedDict()
+        self._bytes_memoria = 0
+        self.estatisticas = dict.fromkeys(['acertos_memoria', 'acertos_disco', 'falhas', 'gravacoes', 'descartes'], 0)
+
+    @staticmethod
+    def chave(sql, versao):
+        """Chave do resultado: SQL normalizado e versão da fonte"""
+        return hashlib.sha256(f"{versao}\n{normalizar_sql(sql)}".encode('utf-8')).hexdigest()
+
+    def _arquivo(self, chave):
+        return os.path.join(self.pasta, f'{chave}.parquet')
+
+    def _guardar_memoria(self, chave, df):
+        """Insere no LRU (resultados maiores que o limite ficam só no disco)"""
+        tamanho = _tamanho(df)
+        if tamanho > self.limite_memoria:
+            return
+        if chave in self._memoria:
+            self._bytes_memoria -= self._memoria.pop(chave)[1]
+        self._memoria[chave] = (df, tamanho)
+        self._bytes_memoria += tamanho
+        self._descartar_excedente()
+
+    def _descartar_excedente(self):
+        """Descarta os resultados usados há mais tempo até a memória caber no limite"""
+        while self._bytes_memoria > self.limite_memoria:
+            _, (_, removido) = self._memoria.popitem(last=False)
+            self._bytes_memoria -= removido
+            self.estatisticas['descartes'] += 1
+
+    def obter(self, chave):
+        """Cópia do resultado guardado (memória, depois disco) ou None"""
+        if not self.ativo:
+            return None
+        if chave in self._memoria:
+            self._memoria.move_to_end(chave)
+            self.estatisticas['acertos_memoria'] += 1
+            return self._memoria[chave][0].copy()
+        arquivo = self._arquivo(chave)
+        try:
+            df = pd.read_parquet(arquivo)
+            os.utime(arquivo)
+        except (OSError, ValueError):
+            self.estatisticas['falhas'] += 1
+            return None
+        self.estatisticas['acertos_disco'] += 1
+        self._guardar_memoria(chave, df)
+        return df.copy()
+
+    def guardar(self, chave, df):
+        """Guarda uma cópia do resultado na memória e no disco"""
+        if not self.ativo:
+            return
+        df = df.copy()
+        self._guardar_memoria(chave, df)
+        try:
+            os.makedirs(self.pasta, exist_ok=True)
+            # Arquivo temporário + rename: processos paralelos nunca leem um Parquet pela metade
+            temporario = f'{self._arquivo(chave)}.{uuid.uuid4().hex}.tmp'
+            df.to_parquet(temporario, compression='zstd', index=False)
+            os.replace(temporario, self._arquivo(chave))
+        except (OSError, ValueError, TypeError, ImportError) as e:
+            print(f"Aviso: resultado não gravado no cache em disco: {e}")
+            return
+        self.estatisticas['gravacoes'] += 1
+        self._limitar_disco()
+
+    def _limitar_disco(self):
+        """Remove os arquivos usados há mais tempo até o cache em disco caber no limite"""
+        arquivos = [os.path.join(self.pasta, nome) for nome in os.listdir(self.pasta) if nome.endswith('.parquet')]
+        infos = sorted(((os.stat(a), a) for a in arquivos), key=lambda par: par[0].st_mtime)
+        total = sum(info.st_size for info, _ in infos)
+        for info, arquivo in infos:
+            if total <= self.limite_disco:
+                break
+            try:
+                os.remove(arquivo)
+            except OSError:
+                continue
+            total -= info.st_size
+
+    def limpar(self, disco=False):
+        """Esvazia o cache em memória (e o do disco, se disco=True)"""
+        self._memoria.clear()
+        self._bytes_memoria = 0
+        if disco and os.path.isdir(self.pasta):
+            for nome in os.listdir(self.pasta):
+                if nome.endswith('.parquet'):
+                    os.remove(os.path.join(self.pasta, nome))
+
+    def resumo(self):
+        """Linha com acertos, falhas e ocupação da memória"""
+        e = self.estatisticas
+        consultas = e['acertos_memoria'] + e['acertos_disco'] + e['falhas']
+        taxa = (e['acertos_memoria'] + e['acertos_disco']) / consultas if consultas else 0.0
+        return (f"Cache de consultas: {consultas} consultas, {taxa:.0%} de acertos "
+                f"({e['acertos_memoria']} na memória, {e['acertos_disco']} no disco, {e['falhas']} falhas); "
+                f"{len(self._memoria)} resultados ({self._bytes_memoria / 1024 ** 2:.1f} MB) na memória")
+
+CACHE = CacheConsultas(
+    limite_memoria_mb=float(os.getenv('CACHE_CONSULTAS_MB', LIMITE_MEMORIA_MB)),
+    pasta=os.getenv('CACHE_CONSULTAS_PASTA') or PASTA_CACHE_CONSULTAS,
+    limite_disco_mb=float(os.getenv('CACHE_CONSULTAS_DISCO_MB', LIMITE_DISCO_MB)),
+    ativo=os.getenv('CACHE_CONSULTAS', '1') == '1',
+)
+
+def configurar_cache(ativo=None, limite_memoria_mb=None, limite_disco_mb=None, pasta=None):
+    """Altera o cache global (valores None mantêm a configuração atual)"""
+    if ativo is not None:
+        CACHE.ativo = ativo
+    if limite_memoria_mb is not None:
+        CACHE.limite_memoria = int(limite_memoria_mb * 1024 ** 2)
+        CACHE._descartar_excedente()
+    if limite_disco_mb is not None:
+        CACHE.limite_disco = int(limite_disco_mb * 1024 ** 2)
+    if pasta is not None:
+        CACHE.pasta = pasta
+    return CACHE
+
+def estatisticas_cache():
+    """Acertos e falhas do cache global neste processo"""
+    return dict(CACHE.estatisticas)
+
+def resumo_cache():
+    return CACHE.resumo()
@@ -0,0 +1,171 @@
+"""Classificação dos procedimentos SIGTAP em áreas clínicas por palavras-chave"""
+
+import json
+import os
+import uuid
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+# Dicionário de áreas: nome da área -> palavras-chave procuradas na descrição do procedimento
+AREAS_CLINICAS = {
+    'Quimioterapia': ['QUIMIO'],
+    'Radioterapia': ['RADIO'],
+    'Saúde Mental': ['PSICO', 'MENTAL', 'PSIQUIAT', 'CAPS'],
+    'Atenção Básica': ['CONSULTA', 'ATENDIMENTO', 'ACOMPANHAMENTO', 'PREVENTIV'],
+    'Cardiologia': ['CARDIO', 'CORAÇÃO', 'CORONAR', 'VASCULAR'],
+    'Oncologia': ['ONCO', 'CANCER', 'TUMOR', 'QUIMIO', 'RADIO'],
+}
+
+PASTA_CLASSIFICACAO = 'classificacao'
+
+class AutomatoPalavras:
+    """Autômato de Aho–Corasick: procura todas as palavras-chave em uma única passada pelo texto
+
+    Cada palavra carrega uma máscara de bits (uma área por bit); a busca
+    retorna o OU das máscaras das palavras encontradas.
+    """
+
+    def __init__(self, palavras):
+        self.transicoes = [{}]
+        self.saida = [0]
+        for palavra, bits in palavras.items():
+            no = 0
+            for caractere in palavra:
+                if caractere not in self.transicoes[no]:
+                    self.transicoes[no][caractere] = len(self.transicoes)
+                    self.transicoes.append({})
+                    self.saida.append(0)
+                no = self.transicoes[no][caractere]
+            self.saida[no] |= bits
+
+        # Ligações de falha em largura (o nó de falha tem profundidade menor)
+        self.falha = [0] * len(self.transicoes)
+        fila = deque(self.transicoes[0].values())
+        while fila:
+            no = fila.popleft()
+            for caractere, filho in self.transicoes[no].items():
+                fila.append(filho)
+                destino = self.falha[no]
+                while destino and caractere not in self.transicoes[destino]:
+                    destino = self.falha[destino]
+                self.falha[filho] = self.transicoes[destino].get(caractere, 0) if no else 0
+                self.saida[filho] |= self.saida[self.falha[filho]]
+
+    def buscar(self, texto):
+        """Máscara com as áreas de todas as palavras presentes no texto"""
+        transicoes, falha, saida = self.transicoes, self.falha, self.saida
+        no, mascara = 0, 0
+        for caractere in texto:
+            while no and caractere not in transicoes[no]:
+                no = falha[no]
+            no = transicoes[no].get(caractere, 0)
+            mascara |= saida[no]
+        return mascara
+
+def _codigo_inteiro(codigos):
+    """Código de procedimento como inteiro (-1 quando não numérico)"""
+    return pd.to_numeric(pd.Series(codigos), errors='coerce').fillna(-1).to_numpy(dtype=np.int64)
+
+class ClassificadorAreas:
+    """Tabela procedimento -> áreas (máscara de bits) com consulta por chave inteira"""
+
+    def __init__(self, areas, codigos, mascaras):
+        self.areas = list(areas)
+        codigos = np.asarray(codigos, dtype=np.int64)
+        mascaras = np.asarray(mascaras, dtype=np.int64)
+        ordem = np.argsort(codigos, kind='stable')
+        self.codigos, inicios = np.unique(codigos[ordem], return_index=True)
+        # Código repetido no SIGTAP (várias descrições): OU das máscaras de todas as linhas
+        self.tabela = (np.bitwise_or.reduceat(mascaras[ordem], inicios) if len(inicios)
+                       else np.zeros(0, dtype=np.int64))
+
+    @classmethod
+    def construir(cls, df_proc, areas=AREAS_CLINICAS):
+        """Classifica todas as descrições do SIGTAP em uma passada por descrição"""
+        if len(areas) > 63:
+            raise ValueError("O classificador comporta no máximo 63 áreas")
+        palavras = {}
+        for bit, palavras_area in enumerate(areas.values()):
+            for palavra in palavras_area:
+                palavras[palavra.upper()] = palavras.get(palavra.upper(), 0) | (1 << bit)
+        automato = AutomatoPalavras(palavras)
+
+        df_proc = df_proc.reindex(columns=['ip_cod_padrao', 'ip_dscr'])
+        descricoes = df_proc['ip_dscr'].fillna('').astype(str).str.upper()
+        mascaras = [automato.buscar(texto) for texto in descricoes]
+        return cls(areas, _codigo_inteiro(df_proc['ip_cod_padrao']), mascaras)
+
+    def mascaras(self, codigos):
+        """Máscara de áreas de cada registro, por busca binária no código inteiro"""
+        # A conversão e a busca são feitas uma vez por código distinto
+        indices, unicos = pd.factorize(pd.Series(codigos))
+        chaves = _codigo_inteiro(unicos)
+        if len(self.codigos) == 0:
+            return np.zeros(len(indices), dtype=np.int64)
+        posicao = np.searchsorted(self.codigos, chaves).clip(max=len(self.codigos) - 1)
+        mascara_unicos = np.append(np.where(self.codigos[posicao] == chaves, self.tabela[posicao], 0), 0)
+        return mascara_unicos[indices]
+
+    def bit(self, area):
+        """Bit da área na máscara"""
+        return 1 << self.areas.index(area)
+
+    def filtro(self, mascaras, area):
+        """Indica os registros que pertencem à área"""
+        return (mascaras & self.bit(area)) != 0
+
+    def rotular(self, mascaras, prioridade, padrao='Outros'):
+        """Um único rótulo por registro: a primeira área de prioridade presente na máscara"""
+        rotulos = np.full(len(mascaras), padrao, dtype=object)
+        for area in reversed(prioridade):
+            rotulos[self.filtro(mascaras, area)] = area
+        return rotulos
+
+    def salvar(self, pasta, assinatura):
+        """Grava a tabela de classificação e, por último, a assinatura (áreas e descrições de origem)
+
+        Cada arquivo é escrito em um temporário e renomeado: análises paralelas
+        nunca leem a tabela pela metade, e a assinatura só muda com a tabela pronta.
+        """
+        os.makedirs(pasta, exist_ok=True)
+        caminho = os.path.join(pasta, 'procedimentos_areas.parquet')
+        temporario = f'{caminho}.{uuid.uuid4().hex}.tmp'
+        pd.DataFrame({'codigo': self.codigos, 'mascara': self.tabela}).to_parquet(temporario, index=False)
+        os.replace(temporario, caminho)
+        caminho = os.path.join(pasta, 'areas.json')
+        temporario = f'{caminho}.{uuid.uuid4().hex}.tmp'
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump({'areas': self.areas, 'assinatura': assinatura}, f, indent=2, ensure_ascii=False)
+        os.replace(temporario, caminho)
+
+    @classmethod
+    def carregar(cls, pasta, assinatura):
+        """Lê a tabela gravada; retorna None se não existir ou tiver outra assinatura"""
+        caminho_areas = os.path.join(pasta, 'areas.json')
+        if not os.path.exists(caminho_areas):
+            return None
+        with open(caminho_areas, encoding='utf-8') as f:
+            manifesto = json.load(f)
+        if manifesto.get('assinatura') != assinatura:
+            return None
+        tabela = pd.read_parquet(os.path.join(pasta, 'procedimentos_areas.parquet'))
+        return cls(manifesto['areas'], tabela['codigo'].to_numpy(), tabela['mascara'].to_numpy())
+
+def assinatura_classificacao(df_proc, areas=AREAS_CLINICAS):
+    """Identifica o dicionário de áreas e as descrições usadas na classificação"""
+    descricoes = df_proc.reindex(columns=['ip_cod_padrao', 'ip_dscr'])
+    return {
+        'areas': areas,
+        'descricoes': str(int(pd.util.hash_pandas_object(descricoes, index=False).sum())),
+    }
+
+def carregar_classificador(df_proc, areas=AREAS_CLINICAS, pasta=PASTA_CLASSIFICACAO):
+    """Classificador de áreas persistido: reutiliza a tabela gravada ou a reconstrói"""
+    assinatura = json.loads(json.dumps(assinatura_classificacao(df_proc, areas), ensure_ascii=False))
+    classificador = ClassificadorAreas.carregar(pasta, assinatura)
+    if classificador is None:
+        classificador = ClassificadorAreas.construir(df_proc, areas)
+        classificador.salvar(pasta, assinatura)
+    return classificador
@@ -1,16 +1,33 @@
 """Funções utilitárias comuns para análises"""
 
-import matplotlib.pyplot as plt
-import seaborn as sns
 import os
+from .renderizacao import caminho_saida, opcoes_savefig
+from .instrumentacao import instrumentar, iniciar_secao, fechar_secoes
 
 def criar_diretorio(caminho):
     """Cria diretório se não existir"""
     os.makedirs(caminho, exist_ok=True)
     return caminho
 
+# Estilo pedido por configurar_estilo_graficos e ainda não aplicado (o matplotlib só é importado no primeiro gráfico)
+_estilo_pendente = False
+
+def pyplot():
+    """Importa o matplotlib.pyplot no primeiro uso, já com o estilo padrão pendente aplicado"""
+    global _estilo_pendente
+    import matplotlib.pyplot as plt
+    if _estilo_pendente:
+        _estilo_pendente = False
+        _aplicar_estilo(plt)
+    return plt
+
 def configurar_estilo_graficos():
-    """Configura estilo padrão dos gráficos"""
+    """Configura estilo padrão dos gráficos (aplicado no primeiro gráfico, ver pyplot)"""
+    global _estilo_pendente
+    _estilo_pendente = True
+
+def _aplicar_estilo(plt):
+    import seaborn as sns
     sns.set_style("whitegrid")
     plt.rcParams['figure.dpi'] = 100
     plt.rcParams['savefig.dpi'] = 300
@@ -19,21 +36,26 @@ def configurar_estilo_graficos():
     plt.rcParams['axes.titlesize'] = 14
     plt.rcParams['legend.fontsize'] = 10
 
+@instrumentar('grafico')
 def salvar_grafico(caminho, dpi=300):
-    """Salva gráfico com configurações padrão"""
+    """Salva gráfico com configurações padrão (ou de rascunho, se ativado)"""
+    caminho = caminho_saida(caminho)
+    plt = pyplot()
     plt.tight_layout()
-    plt.savefig(caminho, dpi=dpi, bbox_inches='tight')
+    plt.savefig(caminho, **opcoes_savefig(dpi))
     print(f"✓ Gráfico salvo: {caminho}")
     plt.close()
 
 def imprimir_cabecalho(titulo, largura=80):
-    """Imprime cabeçalho formatado"""
+    """Imprime cabeçalho formatado (encerra a seção instrumentada em aberto)"""
+    fechar_secoes()
     print("\n" + "=" * largura)
     print(titulo)
     print("=" * largura)
 
 def imprimir_subcabecalho(titulo, largura=80):
-    """Imprime subcabeçalho formatado"""
+    """Imprime subcabeçalho formatado (inicia uma seção instrumentada)"""
+    iniciar_secao(titulo)
     print("\n" + "-" * largura)
     print(titulo)
     print("-" * largura)
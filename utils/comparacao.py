@@ -0,0 +1,238 @@
+"""Comparação entre municípios por agregados parciais acumulados partição a partição"""
+
+import numpy as np
+import pandas as pd
+
+from .banco_local import ESQUEMAS
+from .data_processor import preparar_competencia
+from .dicionarios import COLUNAS_DOMINIO, DOMINIOS, DicionarioCodigos, codificar_particao
+from .hierarquia import codigo_nivel, nome_grupo
+from .memoria import bytes_por_linha_esquema, linhas_por_bloco
+from .ranking import RankingTopK
+
+# Colunas lidas de cada partição (um CSV limpo por município)
+COLUNAS_COMPARACAO = ['PA_CMP', 'PA_PROC_ID', 'PA_IDADE', 'PA_VALAPR', 'PA_VALPRO']
+
+# Colunas de código contadas por município em vetores indexados pelo id do dicionário global
+COLUNAS_CODIGOS = ['PA_PROC_ID', 'PA_CIDPRI', 'PA_CODUNI', 'PA_MUNPCN']
+
+# Rankings do valor aprovado somado em todos os municípios, por código
+COLUNAS_RANKING = ['PA_PROC_ID', 'PA_CODUNI']
+
+# Contadores mantidos por ranking; com mais códigos distintos o ranking fica aproximado (com limite de erro)
+CAPACIDADE_RANKING = 10_000
+
+IDADE_IDOSO = 60
+
+def _somar(acumulado, parcial):
+    """Soma agregados indexados pelas mesmas chaves (chaves novas entram com zero)"""
+    return parcial if acumulado is None else acumulado.add(parcial, fill_value=0)
+
+def _somar_histogramas(acumulado, parcial):
+    """Soma histogramas de tamanhos diferentes"""
+    if acumulado is None:
+        return parcial
+    tamanho = max(len(acumulado), len(parcial))
+    return np.pad(acumulado, (0, tamanho - len(acumulado))) + np.pad(parcial, (0, tamanho - len(parcial)))
+
+def _somar_por_id(ids, pesos=None):
+    """Soma dos pesos (ou contagem, sem pesos) por id: Series esparsa, só com os ids presentes"""
+    if pesos is None:
+        itens, contagens = np.unique(ids, return_counts=True)
+        return pd.Series(contagens.astype(np.int64), index=itens)
+    itens, posicoes = np.unique(ids, return_inverse=True)
+    return pd.Series(np.bincount(posicoes, weights=pesos, minlength=len(itens)), index=itens)
+
+def _mediana_histograma(histograma):
+    """Mediana exata a partir do histograma de valores inteiros"""
+    n = histograma.sum()
+    if n == 0:
+        return np.nan
+    acumulado = np.cumsum(histograma)
+    inferior = np.searchsorted(acumulado, (n - 1) // 2 + 1)
+    superior = np.searchsorted(acumulado, n // 2 + 1)
+    return (inferior + superior) / 2
+
+class ComparacaoMunicipios:
+    """Agregados por município acumulados bloco a bloco (os dados nunca são concatenados)
+
+    Guarda contagens e somas por competência, o histograma de idades (média,
+    mediana e desvio padrão exatos) e, para cada coluna de código, as contagens
+    por id do dicionário global do domínio (utils.dicionarios), só dos ids
+    presentes no município: a memória acompanha os códigos usados, não o tamanho
+    do dicionário. Áreas clínicas e grupos SIGTAP são calculados uma vez por
+    código do dicionário. Os
+    rankings regionais (RankingTopK) recebem o valor aprovado de cada bloco
+    com memória limitada a capacidade_ranking contadores.
+    """
+
+    def __init__(self, municipios, classificador=None, prioridade_areas=('Oncologia', 'Cardiologia'),
+                 dicionarios=None, k_ranking=10, capacidade_ranking=CAPACIDADE_RANKING):
+        self.tipo_municipio = pd.CategoricalDtype(list(municipios), ordered=True)
+        self.classificador = classificador
+        self.prioridade_areas = list(prioridade_areas)
+        self.dicionarios = dicionarios or {dominio: DicionarioCodigos(dominio) for dominio in DOMINIOS}
+        self._competencias = {}
+        self._idades = {}
+        self._codigos = {}
+        self._sem_procedimento = {}
+        self.rankings = {coluna: RankingTopK(k_ranking, capacidade_ranking) for coluna in COLUNAS_RANKING}
+
+    @property
+    def municipios(self):
+        """Municípios com dados, na ordem informada"""
+        return [m for m in self.tipo_municipio.categories if m in self._competencias]
+
+    def acumular(self, municipio, bloco):
+        """Soma os agregados de um bloco de registros do município"""
+        idades = pd.to_numeric(bloco['PA_IDADE'], errors='coerce')
+        parcial = pd.DataFrame({
+            'PA_CMP': bloco['PA_CMP'],
+            'quantidade': 1,
+            'Valor_Aprovado': bloco['PA_VALAPR'],
+            'Valor_Produzido': bloco['PA_VALPRO'],
+            'Idosos': (idades >= IDADE_IDOSO).astype(np.int64),
+        }).groupby('PA_CMP').sum()
+        self._competencias[municipio] = _somar(self._competencias.get(municipio), parcial)
+
+        # Idades em anos inteiros: o histograma tem no máximo ~130 posições
+        validas = idades[idades >= 0].to_numpy(dtype=np.int64)
+        self._idades[municipio] = _somar_histogramas(self._idades.get(municipio), np.bincount(validas))
+
+        colunas = [c for c in COLUNAS_CODIGOS if c in bloco.columns]
+        codificado = codificar_particao(bloco[colunas], self.dicionarios, colunas)
+        contagens = self._codigos.setdefault(municipio, {})
+        for coluna in colunas:
+            ids = codificado[coluna].to_numpy()
+            # A soma com ids novos passa por float: as contagens voltam a ser inteiras
+            contagens[coluna] = _somar(contagens.get(coluna), _somar_por_id(ids[ids >= 0])).astype(np.int64)
+        # Sem a coluna de procedimento, todos os registros do bloco ficam sem procedimento
+        sem_procedimento = (int((codificado['PA_PROC_ID'] < 0).sum()) if 'PA_PROC_ID' in colunas
+                            else len(bloco))
+        self._sem_procedimento[municipio] = self._sem_procedimento.get(municipio, 0) + sem_procedimento
+
+        valores = pd.to_numeric(bloco['PA_VALAPR'], errors='coerce').to_numpy(dtype=float)
+        for coluna in COLUNAS_RANKING:
+            if coluna in colunas:
+                ids = codificado[coluna].to_numpy()
+                validos = (ids >= 0) & ~np.isnan(valores)
+                self.rankings[coluna].adicionar(_somar_por_id(ids[validos], valores[validos]))
+        return self
+
+    def processar(self, particoes, tamanho_bloco=None):
+        """Lê as partições {município: caminho do CSV} em blocos e acumula os agregados
+
+        Sem tamanho_bloco, o bloco segue o orçamento de memória (utils.memoria).
+        """
+        if tamanho_bloco is None:
+            esquema = {c: ESQUEMAS['pars'][c] for c in COLUNAS_COMPARACAO + COLUNAS_CODIGOS}
+            tamanho_bloco = linhas_por_bloco(bytes_por_linha_esquema(esquema))
+        colunas = set(COLUNAS_COMPARACAO + COLUNAS_CODIGOS)
+        for municipio, caminho in particoes.items():
+            blocos = pd.read_csv(caminho, usecols=lambda c: c in colunas,
+                                 chunksize=tamanho_bloco, low_memory=False)
+            for bloco in blocos:
+                self.acumular(municipio, bloco)
+        return self
+
+    def _com_municipio(self, partes, nome_indice):
+        """Empilha os resultados por município com a chave categórica"""
+        resultado = pd.concat(
+            [parte.rename_axis(nome_indice).reset_index().assign(Municipio=m) for m, parte in partes],
+            ignore_index=True
+        )
+        resultado['Municipio'] = resultado['Municipio'].astype(self.tipo_municipio)
+        return resultado
+
+    def por_competencia(self):
+        """Volume, valores e idosos por competência e município"""
+        resultado = self._com_municipio(((m, self._competencias[m]) for m in self.municipios), 'PA_CMP')
+        resultado['quantidade'] = resultado['quantidade'].astype(np.int64)
+        resultado['Idosos'] = resultado['Idosos'].astype(np.int64)
+        resultado = resultado.sort_values(['PA_CMP', 'Municipio'], ignore_index=True)
+        return preparar_competencia(resultado)
+
+    def por_municipio(self):
+        """Volume, valores e estatísticas de idade por município"""
+        linhas = []
+        for municipio in self.municipios:
+            totais = self._competencias[municipio].sum()
+            histograma = self._idades[municipio]
+            idades = np.arange(len(histograma))
+            n = histograma.sum()
+            media = (histograma * idades).sum() / n if n else np.nan
+            variancia = (histograma * (idades - media) ** 2).sum() / (n - 1) if n > 1 else np.nan
+            linhas.append({
+                'Municipio': municipio,
+                'quantidade': int(totais['quantidade']),
+                'Valor_Aprovado': totais['Valor_Aprovado'],
+                'Valor_Produzido': totais['Valor_Produzido'],
+                'Idade_Media': media,
+                'Idade_Mediana': _mediana_histograma(histograma),
+                'Desvio_Padrao': np.sqrt(variancia),
+            })
+        resultado = pd.DataFrame(linhas)
+        resultado['Municipio'] = resultado['Municipio'].astype(self.tipo_municipio)
+        return resultado
+
+    def faixas_etarias(self, bins, labels):
+        """Quantidade por faixa etária (mesmos intervalos de pd.cut) e município"""
+        partes = []
+        for municipio in self.municipios:
+            histograma = self._idades[municipio]
+            faixas = pd.cut(np.arange(len(histograma)), bins=bins, labels=labels)
+            contagem = pd.Series(histograma).groupby(faixas, observed=True).sum()
+            partes.append((municipio, contagem[contagem > 0].rename('quantidade')))
+        return self._com_municipio(partes, 'Faixa_Etaria')[['Municipio', 'Faixa_Etaria', 'quantidade']]
+
+    def _por_rotulo(self, municipio, rotulos):
+        """Soma as contagens de procedimento do município pelo rótulo de cada id (rótulo nulo fica de fora)"""
+        contagem = self._codigos.get(municipio, {}).get('PA_PROC_ID', pd.Series(dtype=np.int64))
+        resultado = pd.Series(contagem.to_numpy(), index=rotulos[contagem.index.to_numpy(dtype=np.int64)])
+        resultado = resultado.groupby(level=0).sum()
+        return resultado[resultado > 0]
+
+    def areas(self):
+        """Quantidade por área clínica e município"""
+        if self.classificador is None:
+            return pd.DataFrame(columns=['Municipio', 'Area', 'quantidade'])
+        dicionario = self.dicionarios['procedimento']
+        rotulos = self.classificador.rotular(self.classificador.mascaras(dicionario.codigos), self.prioridade_areas)
+        # Registros sem procedimento recebem o rótulo de um código vazio
+        rotulo_vazio = self.classificador.rotular(self.classificador.mascaras([None]), self.prioridade_areas)[0]
+        partes = []
+        for municipio in self.municipios:
+            contagem = self._por_rotulo(municipio, rotulos)
+            if self._sem_procedimento[municipio]:
+                contagem = _somar(contagem, pd.Series({rotulo_vazio: self._sem_procedimento[municipio]}))
+            partes.append((municipio, contagem.sort_index().rename('quantidade').astype(np.int64)))
+        return self._com_municipio(partes, 'Area')[['Municipio', 'Area', 'quantidade']]
+
+    def grupos_sigtap(self):
+        """Quantidade por grupo SIGTAP e município"""
+        grupos = self.dicionarios['procedimento'].mapear(lambda codigos: codigo_nivel(codigos, 'grupo'))
+        partes = [(m, self._por_rotulo(m, grupos).sort_index().rename('quantidade').astype(np.int64))
+                  for m in self.municipios]
+        resultado = self._com_municipio(partes, 'PROC_GRUPO')
+        resultado['Grupo'] = resultado['PROC_GRUPO'].map(nome_grupo)
+        return resultado[['Municipio', 'PROC_GRUPO', 'Grupo', 'quantidade']]
+
+    def por_codigo(self, coluna='PA_PROC_ID'):
+        """Quantidade por código (decodificado do dicionário) e município, das colunas de COLUNAS_CODIGOS"""
+        dicionario = self.dicionarios[COLUNAS_DOMINIO[coluna]]
+        partes = []
+        for municipio in self.municipios:
+            contagem = self._codigos.get(municipio, {}).get(coluna, pd.Series(dtype=np.int64))
+            contagem = contagem[contagem > 0]
+            partes.append((municipio, pd.Series(contagem.to_numpy(dtype=np.int64),
+                                                index=dicionario.decodificar(contagem.index.to_numpy(dtype=np.int64)),
+                                                name='quantidade')))
+        resultado = self._com_municipio(partes, coluna)
+        return resultado.sort_values([coluna, 'Municipio'], ignore_index=True)[['Municipio', coluna, 'quantidade']]
+
+    def ranking(self, coluna='PA_PROC_ID'):
+        """Maiores valores aprovados por código somando todos os municípios (valor_maximo se aproximado)"""
+        tabela = self.rankings[coluna].resultado()
+        codigos = self.dicionarios[COLUNAS_DOMINIO[coluna]].decodificar(tabela.pop('item').to_numpy(dtype=np.int64))
+        tabela.insert(0, coluna, codigos)
+        return tabela
@@ -0,0 +1,260 @@
+"""Cubo OLAP pré-calculado com as medidas da PARS (contagens e somas de valores e quantidades)"""
+
+import json
+import os
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from .agregacao import agregar_multiplas_medidas
+from .demografia import indice_faixa_etaria
+from .hierarquia import adicionar_niveis
+
+# Dimensões do cubo (colunas originais, mais a faixa etária derivada de PA_IDADE
+# e os níveis SIGTAP derivados de PA_PROC_ID)
+DIMENSOES_CUBO = ['PA_UFMUN', 'PA_CMP', 'PROC_GRUPO', 'PROC_SUBGRUPO', 'PROC_FORMA', 'PA_PROC_ID',
+                  'PA_CODUNI', 'PA_MUNPCN', 'FAIXA_ETARIA', 'PA_SEXO', 'PA_CIDPRI']
+
+# Medidas somáveis (registros = quantidade de linhas da PARS; _CENT = valores em centavos)
+MEDIDAS_CUBO = ['registros', 'PA_VALAPR', 'PA_VALPRO', 'PA_VALAPR_CENT', 'PA_VALPRO_CENT',
+                'PA_QTDAPR', 'PA_QTDPRO']
+
+# Reticulado de agregações materializadas; todas mantêm a competência para
+# permitir a atualização incremental por competência
+AGREGACOES_PADRAO = [
+    ('PA_UFMUN', 'PA_CMP'),
+    ('PA_UFMUN', 'PA_CMP', 'PROC_GRUPO', 'PROC_SUBGRUPO', 'PROC_FORMA'),
+    ('PA_UFMUN', 'PA_CMP', 'PROC_GRUPO', 'PROC_SUBGRUPO', 'PROC_FORMA', 'PA_PROC_ID'),
+    ('PA_UFMUN', 'PA_CMP', 'PA_CODUNI'),
+    ('PA_UFMUN', 'PA_CMP', 'PA_MUNPCN'),
+    ('PA_UFMUN', 'PA_CMP', 'PA_CODUNI', 'PA_MUNPCN'),
+    ('PA_UFMUN', 'PA_CMP', 'FAIXA_ETARIA', 'PA_SEXO'),
+    ('PA_UFMUN', 'PA_CMP', 'PA_CIDPRI'),
+]
+
+ARQUIVO_MANIFESTO_CUBO = 'cubo.json'
+
+# Versão do layout dos cuboides; cubos gravados com outra versão são reconstruídos
+VERSAO_CUBO = 3
+
+# Valor das dimensões ausentes no cuboide base (código inválido, idade fora das faixas...):
+# os registros continuam no cubo e os totais batem com os dados brutos
+AUSENTE_NUMERICO = -1
+AUSENTE_TEXTO = 'NI'
+
+def calcular_faixa_etaria(idades, largura=5, ultima=100):
+    """Índice da faixa etária (0 = 0-4, 1 = 5-9, ..., 20 = 100+), nulo fora das faixas"""
+    indice = indice_faixa_etaria(idades, largura, ultima)
+    return pd.arrays.IntegerArray(np.where(indice >= 0, indice, 0).astype(np.int8), mask=indice < 0)
+
+def valores_ausentes(df, dimensoes):
+    """Valor que substitui os nulos de cada dimensão (numérica -> -1, texto -> 'NI')"""
+    if hasattr(df, 'agregar'):
+        numericas = {d for d in dimensoes if df.numerica(d)}
+    else:
+        numericas = {d for d in dimensoes if pd.api.types.is_numeric_dtype(df[d])}
+    return {d: AUSENTE_NUMERICO if d in numericas else AUSENTE_TEXTO for d in dimensoes}
+
+def _preencher_ausentes(df, ausentes):
+    """Substitui os nulos das dimensões pelo valor de ausente"""
+    for coluna, valor in ausentes.items():
+        serie = df[coluna]
+        if not serie.hasnans:
+            continue
+        if isinstance(serie.dtype, pd.CategoricalDtype) and valor not in serie.cat.categories:
+            serie = serie.cat.add_categories([valor])
+        df[coluna] = serie.fillna(valor)
+    return df
+
+def _nome_arquivo(dimensoes):
+    return 'cuboide__' + '__'.join(dimensoes) + '.parquet'
+
+class CuboPARS:
+    """Reticulado de agregações da PARS: cuboide base e agregações materializadas"""
+
+    def __init__(self, cuboides, origem=None, versao=VERSAO_CUBO):
+        self.cuboides = cuboides
+        self.origem = origem or {}
+        self.versao = versao
+
+    @property
+    def base(self):
+        """Cuboide mais detalhado (contém todas as dimensões disponíveis)"""
+        return max(self.cuboides, key=len)
+
+    @staticmethod
+    def _agregar_base(df):
+        """Agrega os registros brutos no cuboide base (uma varredura)
+
+        Dimensões nulas entram com o valor de ausente (AUSENTE_NUMERICO ou
+        AUSENTE_TEXTO) em vez de descartar o registro.
+        """
+        sql = hasattr(df, 'agregar')
+        if sql:
+            # Fonte SQL: faixa etária e níveis SIGTAP já vêm como colunas da visão
+            colunas = df.colunas
+        else:
+            df = df.copy(deep=False)
+            df['FAIXA_ETARIA'] = calcular_faixa_etaria(df['PA_IDADE'])
+            if 'PA_PROC_ID' in df.columns:
+                adicionar_niveis(df)
+            colunas = df.columns
+        dimensoes = tuple(d for d in DIMENSOES_CUBO if d in colunas)
+        medidas = {'registros': (dimensoes[0], 'size')}
+        medidas.update({m: (m, 'sum') for m in MEDIDAS_CUBO[1:] if m in colunas})
+        ausentes = valores_ausentes(df, dimensoes)
+        if sql:
+            return dimensoes, df.agregar([dimensoes], medidas, ausentes=ausentes)[dimensoes]
+        df = _preencher_ausentes(df, ausentes)
+        return dimensoes, agregar_multiplas_medidas(df, [dimensoes], medidas)[dimensoes]
+
+    @staticmethod
+    def _derivar(base, dimensoes_base, agregacoes):
+        """Calcula as agregações materializadas a partir do cuboide base"""
+        # Dimensões ausentes nos dados são ignoradas em cada agregação
+        agregacoes = dict.fromkeys(tuple(d for d in a if d in dimensoes_base) for a in agregacoes)
+        agregacoes = [a for a in agregacoes if a and a != dimensoes_base]
+        if not agregacoes:
+            return {}
+        medidas = {m: (m, 'sum') for m in MEDIDAS_CUBO if m in base.columns}
+        return agregar_multiplas_medidas(base, agregacoes, medidas)
+
+    @classmethod
+    def construir(cls, df, agregacoes=AGREGACOES_PADRAO, origem=None):
+        """Constrói o cubo a partir dos dados limpos"""
+        return cls.construir_em_blocos([df], agregacoes, origem)
+
+    @classmethod
+    def construir_em_blocos(cls, blocos, agregacoes=AGREGACOES_PADRAO, origem=None):
+        """Constrói o cubo bloco a bloco: o cuboide base de cada bloco é somado ao acumulado"""
+        dimensoes_base, base = None, None
+        for bloco in blocos:
+            dimensoes, parcial = cls._agregar_base(bloco)
+            if base is None:
+                dimensoes_base, base = dimensoes, parcial
+                continue
+            combinado = pd.concat([base, parcial], ignore_index=True)
+            medidas = {m: (m, 'sum') for m in MEDIDAS_CUBO if m in combinado.columns}
+            base = agregar_multiplas_medidas(combinado, [dimensoes_base], medidas)[dimensoes_base]
+        if base is None:
+            raise ValueError("Sem dados para construir o cubo")
+        cuboides = {dimensoes_base: base}
+        cuboides.update(cls._derivar(base, dimensoes_base, agregacoes))
+        return cls({d: _compactar(c) for d, c in cuboides.items()}, origem)
+
+    def atualizar(self, df_novo, origem_nova=None):
+        """Substitui as competências presentes em df_novo (atualização incremental)
+
+        origem_nova (assinatura do arquivo de df_novo) entra na lista
+        origem['atualizacoes']: o cubo deixa de equivaler só ao arquivo base.
+        """
+        if self.versao != VERSAO_CUBO:
+            raise ValueError("Cubo gravado com outro layout; reconstrua-o sem --nova-competencia")
+        novo = CuboPARS.construir(df_novo, agregacoes=[d for d in self.cuboides if d != self.base])
+        # Competências do cuboide novo (com o valor de ausente no lugar de competências nulas)
+        competencias = set(pd.unique(novo.cuboides[novo.base]['PA_CMP']))
+        for dimensoes, cuboide in self.cuboides.items():
+            mantidos = cuboide[~cuboide['PA_CMP'].isin(competencias)]
+            combinado = pd.concat([mantidos, novo.cuboides[dimensoes]], ignore_index=True)
+            self.cuboides[dimensoes] = _compactar(combinado.sort_values(list(dimensoes), ignore_index=True))
+        if origem_nova is not None:
+            self.origem = {**self.origem, 'atualizacoes': self.origem.get('atualizacoes', []) + [origem_nova]}
+        return self
+
+    def corresponde(self, origem):
+        """Se o cubo equivale ao arquivo base (assinatura origem) e a cada atualização, todos inalterados no disco"""
+        base = {k: v for k, v in self.origem.items() if k != 'atualizacoes'}
+        if base != origem:
+            return False
+        for atualizacao in self.origem.get('atualizacoes', []):
+            caminho = atualizacao.get('caminho')
+            if not caminho or not os.path.exists(caminho) or assinatura_arquivo(caminho) != atualizacao:
+                return False
+        return True
+
+    def escolher_cuboide(self, dimensoes):
+        """Menor cuboide materializado que contém as dimensões pedidas"""
+        candidatos = [d for d in self.cuboides if set(dimensoes) <= set(d)]
+        if not candidatos:
+            raise ValueError(f"Dimensões fora do cubo: {sorted(set(dimensoes) - set(self.base))}")
+        return min(candidatos, key=lambda d: len(self.cuboides[d]))
+
+    def consultar(self, dimensoes, medidas=None, filtros=None):
+        """Agrega as medidas pelas dimensões pedidas, aplicando filtros {dimensao: valor(es)}
+
+        Retorna DataFrame organizado com uma linha por combinação, ordenado pelas dimensões.
+        """
+        dimensoes = [dimensoes] if isinstance(dimensoes, str) else list(dimensoes)
+        filtros = filtros or {}
+        cuboide = self.cuboides[self.escolher_cuboide(dimensoes + list(filtros))]
+        medidas = medidas or [m for m in MEDIDAS_CUBO if m in cuboide.columns]
+
+        if filtros:
+            mascara = np.ones(len(cuboide), dtype=bool)
+            for coluna, valores in filtros.items():
+                valores = valores if isinstance(valores, (list, tuple, set)) else [valores]
+                mascara &= cuboide[coluna].isin(valores).to_numpy()
+            cuboide = cuboide[mascara]
+
+        if not dimensoes:
+            return cuboide[medidas].sum().to_frame().T
+
+        resultado = cuboide.groupby(dimensoes, observed=True, sort=True)[medidas].sum().reset_index()
+        # Dimensões voltam ao tipo original (o armazenamento usa categorias)
+        for coluna in dimensoes:
+            if isinstance(resultado[coluna].dtype, pd.CategoricalDtype):
+                resultado[coluna] = resultado[coluna].astype(resultado[coluna].cat.categories.dtype)
+        return resultado
+
+    def salvar(self, pasta):
+        """Grava os cuboides em Parquet comprimido e, por último, o manifesto do cubo
+
+        Cada arquivo é escrito em um temporário e renomeado: processos paralelos
+        nunca leem um cuboide pela metade, e o manifesto só muda com os cuboides prontos.
+        """
+        os.makedirs(pasta, exist_ok=True)
+        for dimensoes, cuboide in self.cuboides.items():
+            caminho = os.path.join(pasta, _nome_arquivo(dimensoes))
+            temporario = f'{caminho}.{uuid.uuid4().hex}.tmp'
+            cuboide.to_parquet(temporario, compression='zstd', index=False)
+            os.replace(temporario, caminho)
+        manifesto = {
+            'cuboides': [list(d) for d in self.cuboides],
+            'competencias': sorted(int(c) for c in pd.unique(self.cuboides[self.base]['PA_CMP'])),
+            'origem': self.origem,
+            'versao': self.versao,
+        }
+        caminho = os.path.join(pasta, ARQUIVO_MANIFESTO_CUBO)
+        temporario = f'{caminho}.{uuid.uuid4().hex}.tmp'
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(manifesto, f, indent=2, ensure_ascii=False)
+        os.replace(temporario, caminho)
+
+    @classmethod
+    def carregar(cls, pasta):
+        """Lê um cubo gravado com salvar()"""
+        with open(os.path.join(pasta, ARQUIVO_MANIFESTO_CUBO), encoding='utf-8') as f:
+            manifesto = json.load(f)
+        cuboides = {
+            tuple(d): pd.read_parquet(os.path.join(pasta, _nome_arquivo(d)))
+            for d in manifesto['cuboides']
+        }
+        return cls(cuboides, manifesto.get('origem'), manifesto.get('versao', 1))
+
+def _compactar(cuboide):
+    """Dimensões como categorias (armazenamento e agrupamento mais compactos)"""
+    cuboide = cuboide.copy()
+    for coluna in cuboide.columns:
+        if coluna in DIMENSOES_CUBO and coluna != 'PA_CMP' and not isinstance(cuboide[coluna].dtype, pd.CategoricalDtype):
+            cuboide[coluna] = cuboide[coluna].astype('category')
+    return cuboide
+
+def assinatura_arquivo(caminho):
+    """Identifica a versão de um arquivo de dados (tamanho e data de modificação)"""
+    info = os.stat(caminho)
+    return {'caminho': os.path.abspath(caminho), 'tamanho': info.st_size, 'modificado': info.st_mtime_ns}
+
+def pasta_cubo(caminho_dados):
+    """Pasta padrão do cubo de um arquivo de dados limpos"""
+    return os.path.join('cubo', os.path.splitext(os.path.basename(caminho_dados))[0])
@@ -7,15 +7,35 @@ import os
 # Adicionar o diretório pai ao path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from database_connection import get_database_connection
+from .cache_consultas import CACHE
+from .instrumentacao import etapa, instrumentar
+from .memoria import inferir_tipos_csv
 
+@instrumentar('carga')
 def carregar_csv(caminho='dados_limpos.csv'):
     """Carrega dados do CSV"""
     df = pd.read_csv(caminho, low_memory=False)
     return df
 
+def carregar_csv_em_blocos(caminho='dados_limpos.csv', linhas=500_000):
+    """Carrega o CSV em blocos, com os tipos que a leitura do arquivo inteiro daria"""
+    return pd.read_csv(caminho, low_memory=False, chunksize=linhas, dtype=inferir_tipos_csv(caminho, linhas))
+
+def _chave_cache(conn, nome_tabela, query):
+    """Chave da consulta no cache (None com o cache desativado ou sem a versão da tabela)"""
+    if not CACHE.ativo:
+        return None
+    from database_connection import versao_tabela
+    try:
+        return CACHE.chave(query, versao_tabela(conn, nome_tabela))
+    except Exception as e:
+        print(f"Aviso: cache de consultas ignorado para {nome_tabela}: {e}")
+        return None
+
 def carregar_tabela_db(nome_tabela, colunas='*', condicao=''):
-    """Carrega tabela do banco de dados"""
+    """Carrega tabela do banco de dados (resultado reaproveitado do cache enquanto a tabela não mudar)"""
+    # Importado só aqui: execuções sem banco não carregam .env nem drivers
+    from database_connection import get_database_connection
     conn = get_database_connection()
     if not conn:
         return pd.DataFrame()
@@ -25,7 +45,19 @@ def carregar_tabela_db(nome_tabela, colunas='*', condicao=''):
         if condicao:
             query += f" WHERE {condicao}"
         
-        df = pd.read_sql_query(query, conn)
+        chave = _chave_cache(conn, nome_tabela, query)
+        if chave:
+            with etapa(f"cache {nome_tabela}", 'cache') as consulta:
+                df = CACHE.obter(chave)
+                if df is not None:
+                    consulta.linhas = len(df)
+                    return df
+        
+        with etapa(f"SELECT {nome_tabela}", 'banco') as consulta:
+            df = pd.read_sql_query(query, conn)
+            consulta.linhas = len(df)
+        if chave:
+            CACHE.guardar(chave, df)
         return df
     except Exception as e:
         print(f"Erro ao carregar {nome_tabela}: {e}")
@@ -33,6 +65,7 @@ def carregar_tabela_db(nome_tabela, colunas='*', condicao=''):
     finally:
         conn.close()
 
+@instrumentar('carga')
 def carregar_procedimentos():
     """Carrega tabela de procedimentos (tb_sigtaw)"""
     df = carregar_tabela_db('tb_sigtaw', 'ip_cod, ip_dscr')
@@ -41,6 +74,7 @@ def carregar_procedimentos():
         df['ip_cod_padrao'] = df['ip_cod'].str.zfill(10).str.upper()
     return df
 
+@instrumentar('carga')
 def carregar_municipios():
     """Carrega tabela de municípios"""
     df = carregar_tabela_db('tb_municip', 'co_municip, ds_nome', "co_status = 'ATIVO'")
@@ -48,6 +82,7 @@ def carregar_municipios():
         df['co_municip'] = df['co_municip'].astype(str).str.strip()
     return df
 
+@instrumentar('carga')
 def carregar_estabelecimentos():
     """Carrega tabela de estabelecimentos (CNES)"""
     df = carregar_tabela_db('cadgerrs', 'cnes, fantasia, raz_soci, codufmun, bairro', 'excluido = 0')
@@ -55,6 +90,7 @@ def carregar_estabelecimentos():
         df['cnes'] = df['cnes'].astype(str).str.strip()
     return df
 
+@instrumentar('carga')
 def carregar_cids():
     """Carrega tabela de CIDs"""
     df = carregar_tabela_db('s_cid', 'cd_cod, cd_descr')
@@ -62,9 +98,23 @@ def carregar_cids():
         df['cd_cod'] = df['cd_cod'].astype(str).str.strip().str.upper()
     return df
 
+@instrumentar('carga')
 def carregar_dim_tempo():
     """Carrega dimensão tempo"""
     df = carregar_tabela_db('dimtempo', 'Id, mes, mesext, ano, anomes, MAExt, trimestre, triex_t, anotri')
     if not df.empty:
         df['anomes'] = df['anomes'].astype(int)
-    return df
\ No newline at end of file
+    return df
+
+# Tabelas de dimensão lidas pelas análises e a função que monta a consulta de cada uma
+CARREGADORES_DIMENSOES = {
+    'tb_sigtaw': carregar_procedimentos,
+    'tb_municip': carregar_municipios,
+    'cadgerrs': carregar_estabelecimentos,
+    's_cid': carregar_cids,
+    'dimtempo': carregar_dim_tempo,
+}
+
+def aquecer_cache_dimensoes():
+    """Executa as consultas das dimensões para que os próximos scripts as leiam do cache; retorna {tabela: linhas}"""
+    return {tabela: len(carregar()) for tabela, carregar in CARREGADORES_DIMENSOES.items()}
\ No newline at end of file
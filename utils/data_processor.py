@@ -2,13 +2,17 @@
 
 import pandas as pd
 from datetime import timedelta
+from .agregacao import agregar_multiplas_medidas
+from .instrumentacao import instrumentar
 
+@instrumentar('processamento')
 def padronizar_codigo(df, coluna, tamanho=10):
     """Padroniza código com zeros à esquerda"""
     df = df.copy()
     df[coluna] = df[coluna].astype(str).str.strip().str.zfill(tamanho).str.upper()
     return df
 
+@instrumentar('processamento')
 def adicionar_descricoes(df, df_ref, col_codigo, col_ref, col_descricao):
     """Adiciona descrições através de merge"""
     return df.merge(
@@ -18,12 +22,14 @@ def adicionar_descricoes(df, df_ref, col_codigo, col_ref, col_descricao):
         how='left'
     )
 
+@instrumentar('processamento')
 def preparar_competencia(df, coluna='PA_CMP'):
     """Prepara coluna de competência (AAAAMM)"""
     df = df.copy()
     df['Competencia'] = df[coluna].astype(str).str[:4] + '-' + df[coluna].astype(str).str[4:6]
     return df
 
+@instrumentar('processamento')
 def preparar_temporal(df, coluna='PA_CMP'):
     """Prepara colunas temporais"""
     df = df.copy()
@@ -34,8 +40,11 @@ def preparar_temporal(df, coluna='PA_CMP'):
     df['anomes'] = (df['ano'] * 100 + df['mes']).astype(int)
     return df
 
+@instrumentar('processamento')
 def calcular_estatisticas_basicas(df, coluna_valor):
     """Calcula estatísticas básicas de uma coluna"""
+    if hasattr(df, 'estatisticas'):
+        return df.estatisticas(coluna_valor)
     return {
         'total': df[coluna_valor].sum(),
         'media': df[coluna_valor].mean(),
@@ -45,15 +54,17 @@ def calcular_estatisticas_basicas(df, coluna_valor):
         'max': df[coluna_valor].max()
     }
 
+@instrumentar('processamento')
 def agrupar_por_categoria(df, coluna_categoria, coluna_valor='PA_VALAPR', incluir_contagem=True):
     """Agrupa dados por categoria"""
-    agg_dict = {coluna_valor: 'sum'}
+    medidas = {coluna_valor: (coluna_valor, 'sum')}
     if incluir_contagem:
-        agg_dict['quantidade'] = (coluna_categoria, 'count')
+        medidas['quantidade'] = (coluna_categoria, 'count')
     
-    resultado = df.groupby(coluna_categoria).agg(**agg_dict).reset_index()
+    resultado = agregar_multiplas_medidas(df, [[coluna_categoria]], medidas)[(coluna_categoria,)]
     return resultado.sort_values(coluna_valor, ascending=False)
 
+@instrumentar('processamento')
 def identificar_picos_quedas(df, coluna_valor, num_desvios=1):
     """Identifica picos e quedas em uma série temporal"""
     media = df[coluna_valor].mean()
@@ -74,6 +85,7 @@ def identificar_picos_quedas(df, coluna_valor, num_desvios=1):
         'quedas': quedas
     }
 
+@instrumentar('processamento')
 def calcular_periodos_recentes(df, coluna_data):
     """Calcula subconjuntos de dados para períodos recentes"""
     data_recente = df[coluna_data].max()
@@ -0,0 +1,120 @@
+"""Histogramas demográficos (faixa etária × sexo, por município e competência) em uma única contagem"""
+
+import numpy as np
+import pandas as pd
+
+ROTULOS_SEXO = ['Masculino', 'Feminino', 'Não Informado']
+
+# Valores de PA_SEXO aceitos e o índice do rótulo correspondente
+CODIGOS_SEXO = {'M': 0, 'F': 1, 0: 2, '0': 2}
+
+def indice_faixa_etaria(idades, largura=5, ultima=100, maxima=150):
+    """Índice da faixa etária por aritmética inteira (0 = 0-4, ..., 20 = 100+; -1 fora de [0, maxima))"""
+    idades = pd.to_numeric(pd.Series(idades), errors='coerce').to_numpy(dtype=float)
+    validas = (idades >= 0) & (idades < maxima)
+    indice = np.minimum(np.where(validas, idades, 0) // largura, ultima // largura).astype(np.int64)
+    return np.where(validas, indice, -1)
+
+def rotulos_faixas_etarias(largura=5, ultima=100):
+    """Rótulos das faixas etárias ('0-4', ..., '100+')"""
+    return [f'{i}-{i + largura - 1}' for i in range(0, ultima, largura)] + [f'{ultima}+']
+
+def indice_sexo(sexos):
+    """Índice do sexo em ROTULOS_SEXO (-1 para valores não reconhecidos)"""
+    codigos, unicos = pd.factorize(pd.Series(sexos))
+    tabela = np.append(pd.Series(unicos).map(CODIGOS_SEXO).fillna(-1).to_numpy(dtype=np.int64), -1)
+    return tabela[codigos]
+
+class HistogramaDemografico:
+    """Contagens por chaves (município, competência...) × faixa etária × sexo
+
+    Calculado com um único np.bincount sobre o índice combinado. A última
+    posição dos eixos de faixa e de sexo guarda os registros com idade ou
+    sexo fora das categorias, para que os totais marginais fiquem exatos.
+    """
+
+    def __init__(self, chaves, valores_chaves, contagens, soma_idades, n_idades, rotulos_faixas):
+        self.chaves = list(chaves)
+        self.valores_chaves = valores_chaves
+        self.contagens = contagens
+        self.soma_idades = soma_idades
+        self.n_idades = n_idades
+        self.rotulos_faixas = rotulos_faixas
+
+    @classmethod
+    def construir(cls, df, chaves=(), largura=5, ultima=100):
+        """Histograma de todos os registros em uma varredura (chaves nulas ficam de fora)"""
+        rotulos_faixas = rotulos_faixas_etarias(largura, ultima)
+        n_faixas, n_sexos = len(rotulos_faixas) + 1, len(ROTULOS_SEXO) + 1
+
+        faixa = indice_faixa_etaria(df['PA_IDADE'], largura, ultima)
+        sexo = indice_sexo(df['PA_SEXO'])
+        combinado = np.zeros(len(df), dtype=np.int64)
+        validos = np.ones(len(df), dtype=bool)
+        valores_chaves, forma = [], []
+        for chave in chaves:
+            codigos, unicos = pd.factorize(df[chave], sort=True)
+            validos &= codigos >= 0
+            combinado = combinado * len(unicos) + codigos
+            valores_chaves.append(np.asarray(unicos))
+            forma.append(len(unicos))
+        combinado = (combinado * n_faixas + np.where(faixa >= 0, faixa, n_faixas - 1)) * n_sexos
+        combinado = (combinado + np.where(sexo >= 0, sexo, n_sexos - 1))[validos]
+
+        idades = pd.to_numeric(df['PA_IDADE'], errors='coerce').to_numpy(dtype=float)[validos]
+        com_idade = ~np.isnan(idades)
+        forma += [n_faixas, n_sexos]
+        tamanho = int(np.prod(forma))
+        contagens = np.bincount(combinado, minlength=tamanho).reshape(forma)
+        soma_idades = np.bincount(combinado[com_idade], weights=idades[com_idade], minlength=tamanho).reshape(forma)
+        n_idades = np.bincount(combinado[com_idade], minlength=tamanho).reshape(forma)
+        return cls(chaves, valores_chaves, contagens, soma_idades, n_idades, rotulos_faixas)
+
+    def _total(self, matriz):
+        """Soma sobre os eixos das chaves (resta faixa × sexo)"""
+        return matriz.sum(axis=tuple(range(len(self.chaves)))) if self.chaves else matriz
+
+    def selecionar(self, **filtros):
+        """Histograma restrito a valores das chaves (ex.: PA_UFMUN='431020')"""
+        fatia = [slice(None)] * self.contagens.ndim
+        valores_chaves = list(self.valores_chaves)
+        for chave, valor in filtros.items():
+            eixo = self.chaves.index(chave)
+            posicoes = np.flatnonzero(np.isin(self.valores_chaves[eixo], np.atleast_1d(valor)))
+            fatia[eixo] = posicoes
+            valores_chaves[eixo] = self.valores_chaves[eixo][posicoes]
+        fatia = np.ix_(*[np.arange(n) if isinstance(f, slice) else f for f, n in zip(fatia, self.contagens.shape)])
+        return HistogramaDemografico(self.chaves, valores_chaves, self.contagens[fatia],
+                                     self.soma_idades[fatia], self.n_idades[fatia], self.rotulos_faixas)
+
+    def por_sexo(self):
+        """Registros por sexo (idade qualquer), em ordem decrescente"""
+        contagem = pd.Series(self._total(self.contagens)[:, :-1].sum(axis=0), index=ROTULOS_SEXO)
+        return contagem[contagem > 0].sort_values(ascending=False, kind='stable')
+
+    def por_faixa(self):
+        """Registros por faixa etária (sexo qualquer), na ordem das faixas"""
+        return pd.Series(self._total(self.contagens)[:-1, :].sum(axis=1), index=self.rotulos_faixas)
+
+    def faixa_sexo(self):
+        """Tabela faixa etária × sexo (pirâmide), apenas faixas com registros"""
+        tabela = pd.DataFrame(self._total(self.contagens)[:-1, :-1],
+                              index=self.rotulos_faixas, columns=ROTULOS_SEXO)
+        return tabela.loc[tabela.sum(axis=1) > 0, tabela.sum(axis=0) > 0]
+
+    def idade_media_por_sexo(self):
+        """Idade média por sexo (inclui idades fora das faixas)"""
+        soma = self._total(self.soma_idades)[:, :-1].sum(axis=0)
+        n = self._total(self.n_idades)[:, :-1].sum(axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return pd.Series(soma / n, index=ROTULOS_SEXO)[n > 0]
+
+    def piramides(self):
+        """Tabela longa chaves × faixa × sexo com as contagens não nulas (todas as pirâmides)"""
+        celulas = self.contagens[..., :-1, :-1]
+        posicoes = np.nonzero(celulas)
+        colunas = {chave: self.valores_chaves[i][posicoes[i]] for i, chave in enumerate(self.chaves)}
+        colunas['Faixa_Etaria'] = np.asarray(self.rotulos_faixas)[posicoes[-2]]
+        colunas['Sexo'] = np.asarray(ROTULOS_SEXO)[posicoes[-1]]
+        colunas['quantidade'] = celulas[posicoes]
+        return pd.DataFrame(colunas)
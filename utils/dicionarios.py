@@ -0,0 +1,143 @@
+"""Dicionários globais de códigos (procedimento, CID, CNES, município) construídos das tabelas de dimensão
+
+Cada domínio tem um dicionário persistido código -> id inteiro, só com acréscimos:
+um id nunca muda de código, então partições de qualquer município codificadas com
+o mesmo dicionário concatenam e agregam como vetores de inteiros, sem recodificar
+nem comparar textos.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PASTA_DICIONARIOS = os.path.join(RAIZ, 'dicionarios')
+
+# Domínio -> (tabela de dimensão, coluna do código, tamanho padronizado; None = sem zeros à esquerda)
+DOMINIOS = {
+    'procedimento': ('tb_sigtaw', 'ip_cod', 10),
+    'cid': ('s_cid', 'cd_cod', None),
+    'cnes': ('cadgerrs', 'cnes', 7),
+    'municipio': ('tb_municip', 'co_municip', 6),
+}
+
+# Colunas da PARS codificadas e o domínio de cada uma
+COLUNAS_DOMINIO = {
+    'PA_PROC_ID': 'procedimento',
+    'PA_CIDPRI': 'cid',
+    'PA_CODUNI': 'cnes',
+    'PA_UFMUN': 'municipio',
+    'PA_MUNPCN': 'municipio',
+}
+
+def padronizar_codigos(valores, dominio):
+    """Códigos como texto padronizado do domínio (mesmo padrão de SessaoAnalise); nulos ficam nulos"""
+    tamanho = DOMINIOS[dominio][2]
+    serie = pd.Series(valores, dtype=object)
+    nulos = serie.isna()
+    # Decimais inteiros (301010072.0, de colunas com nulos) viram 301010072
+    serie = pd.Series([int(v) if isinstance(v, float) and v.is_integer() else v for v in serie], dtype=object)
+    texto = serie.astype(str).str.strip().str.upper()
+    if dominio == 'municipio':
+        # Código IBGE de 7 dígitos perde o dígito verificador
+        texto = texto.str[:6]
+    if tamanho:
+        texto = texto.str.zfill(tamanho)
+    return np.where(nulos, None, texto.to_numpy(dtype=object))
+
+class DicionarioCodigos:
+    """Códigos de um domínio e seus ids (posição no dicionário)
+
+    Os primeiros tamanho_dimensao códigos vêm da tabela de dimensão e são
+    persistidos; códigos que aparecem nos dados e não existem na dimensão
+    (CIDs inválidos, 'Não informado') ganham ids seguintes, válidos só neste
+    processo. Nulos recebem o id -1.
+    """
+
+    def __init__(self, dominio, codigos=()):
+        self.dominio = dominio
+        self.codigos = np.asarray(list(codigos), dtype=object)
+        self.tamanho_dimensao = len(self.codigos)
+        self._indice = pd.Index(self.codigos)
+
+    def __len__(self):
+        return len(self.codigos)
+
+    def estender(self, codigos):
+        """Acrescenta ao final os códigos ainda ausentes (os ids existentes não mudam)"""
+        novos = [c for c in pd.unique(pd.Series(codigos, dtype=object)) if pd.notna(c) and c not in self._indice]
+        if novos:
+            self.codigos = np.concatenate([self.codigos, np.asarray(novos, dtype=object)])
+            self._indice = pd.Index(self.codigos)
+        return len(novos)
+
+    def codificar(self, valores):
+        """Ids (int32) dos valores; o cálculo é feito só nos valores distintos"""
+        posicoes, unicos = pd.factorize(pd.Series(valores))
+        codigos = padronizar_codigos(unicos, self.dominio)
+        ids = self._indice.get_indexer(codigos)
+        if (ids[pd.notna(codigos)] < 0).any():
+            self.estender(codigos)
+            ids = self._indice.get_indexer(codigos)
+        ids = np.append(np.where(pd.notna(codigos), ids, -1), -1).astype(np.int32)
+        return ids[posicoes]
+
+    def decodificar(self, ids):
+        """Códigos dos ids (nulo para -1)"""
+        ids = np.asarray(ids)
+        codigos = np.append(self.codigos, None)
+        return codigos[np.where(ids >= 0, ids, len(self.codigos))]
+
+    def categorias(self, ids):
+        """Categorical com as categorias do dicionário inteiro (compatível entre partições)"""
+        return pd.Categorical.from_codes(np.asarray(ids), categories=pd.Index(self.codigos, dtype=object))
+
+    def mapear(self, funcao):
+        """Aplica funcao aos códigos do dicionário uma vez; retorna um vetor indexado pelo id"""
+        return np.asarray(funcao(pd.Series(self.codigos, dtype=object)), dtype=object)
+
+    def salvar(self, pasta):
+        """Grava os códigos da dimensão (as extensões do processo não são gravadas)"""
+        os.makedirs(pasta, exist_ok=True)
+        caminho = os.path.join(pasta, f'{self.dominio}.parquet')
+        temporario = f'{caminho}.{os.getpid()}.tmp'
+        pd.DataFrame({'codigo': self.codigos[:self.tamanho_dimensao].astype(str)}).to_parquet(temporario, index=False)
+        os.replace(temporario, caminho)
+
+    @classmethod
+    def carregar(cls, dominio, pasta):
+        """Lê o dicionário gravado (vazio se não existir)"""
+        caminho = os.path.join(pasta, f'{dominio}.parquet')
+        if not os.path.exists(caminho):
+            return cls(dominio)
+        return cls(dominio, pd.read_parquet(caminho)['codigo'].to_numpy(dtype=object))
+
+def _codigos_dimensao(dominio):
+    """Códigos padronizados da tabela de dimensão do domínio, ordenados"""
+    from .data_loader import carregar_tabela_db
+    tabela, coluna, _ = DOMINIOS[dominio]
+    df = carregar_tabela_db(tabela, coluna)
+    if df.empty:
+        return []
+    return sorted(c for c in pd.unique(padronizar_codigos(df[coluna], dominio)) if pd.notna(c) and c)
+
+def carregar_dicionarios(pasta=PASTA_DICIONARIOS, dominios=tuple(DOMINIOS)):
+    """Dicionários gravados, acrescidos dos códigos novos das dimensões (e gravados de novo se mudaram)"""
+    dicionarios = {}
+    for dominio in dominios:
+        dicionario = DicionarioCodigos.carregar(dominio, pasta)
+        if dicionario.estender(_codigos_dimensao(dominio)):
+            dicionario.tamanho_dimensao = len(dicionario)
+            dicionario.salvar(pasta)
+        dicionarios[dominio] = dicionario
+    return dicionarios
+
+def codificar_particao(df, dicionarios, colunas=tuple(COLUNAS_DOMINIO)):
+    """Cópia rasa do DataFrame com as colunas de código trocadas pelos ids (int32) dos dicionários"""
+    df = df.copy(deep=False)
+    for coluna in colunas:
+        if coluna in df.columns:
+            df[coluna] = dicionarios[COLUNAS_DOMINIO[coluna]].codificar(df[coluna])
+    return df
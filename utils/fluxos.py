@@ -0,0 +1,177 @@
+"""Matriz de fluxos origem × destino (município de residência → município ou estabelecimento de atendimento)"""
+
+import numpy as np
+import pandas as pd
+
+from .agregacao import combinar_codigos
+
+def _somar_por_indice(indices, pesos, tamanho):
+    """Soma os pesos por índice, mantendo inteiros como inteiros"""
+    soma = np.bincount(indices, weights=pesos, minlength=tamanho)
+    return soma.round().astype(np.int64) if np.issubdtype(pesos.dtype, np.integer) else soma
+
+class MatrizFluxos:
+    """Matriz esparsa (formato coordenado) de fluxos origem × destino × período
+
+    Guarda apenas as células com atendimentos: os índices de origem, destino e
+    período de cada célula e as medidas (registros e somas de valores).
+    """
+
+    def __init__(self, origens, destinos, periodos, celulas, medidas):
+        self.origens = origens
+        self.destinos = destinos
+        self.periodos = periodos
+        self.i_origem, self.i_destino, self.i_periodo = celulas
+        self.medidas = medidas
+
+    @classmethod
+    def construir(cls, df, origem='PA_MUNPCN', destino='PA_UFMUN', periodo='PA_CMP', valores=('PA_VALAPR',)):
+        """Constrói a matriz a partir dos registros em uma única varredura
+
+        Sem periodo, todos os registros ficam no período 0.
+        """
+        colunas = [origem, destino] + ([periodo] if periodo else [])
+        fatorados = [pd.factorize(df[c], sort=True) for c in colunas]
+        ids, codigos = combinar_codigos([f[0] for f in fatorados], [len(f[1]) for f in fatorados])
+
+        validos = ids >= 0
+        ids = ids[validos]
+        n_celulas = len(codigos[0])
+        medidas = {'registros': np.bincount(ids, minlength=n_celulas).astype(np.int64)}
+        for coluna in valores:
+            if coluna in df.columns:
+                pesos = pd.to_numeric(df[coluna], errors='coerce').to_numpy(dtype=float)[validos]
+                medidas[coluna] = np.bincount(ids, weights=np.nan_to_num(pesos), minlength=n_celulas)
+
+        if periodo:
+            periodos, i_periodo = np.asarray(fatorados[2][1]), codigos[2]
+        else:
+            periodos, i_periodo = np.array([0]), np.zeros(n_celulas, dtype=np.int64)
+        return cls(np.asarray(fatorados[0][1]), np.asarray(fatorados[1][1]), periodos,
+                   (codigos[0], codigos[1], i_periodo), medidas)
+
+    @classmethod
+    def combinar(cls, matrizes):
+        """Soma matrizes construídas por partição (por exemplo, um arquivo por município)"""
+        matrizes = list(matrizes)
+        eixos, indices = [], []
+        for eixo, indice in (('origens', 'i_origem'), ('destinos', 'i_destino'), ('periodos', 'i_periodo')):
+            unicos = np.unique(np.concatenate([getattr(m, eixo) for m in matrizes]))
+            eixos.append(unicos)
+            # Traduz os índices locais de cada matriz para o eixo unificado
+            indices.append(np.concatenate([
+                np.searchsorted(unicos, getattr(m, eixo))[getattr(m, indice)] for m in matrizes
+            ]))
+
+        ids, codigos = combinar_codigos(indices, [len(e) for e in eixos])
+        nomes = [nome for nome in matrizes[0].medidas if all(nome in m.medidas for m in matrizes)]
+        medidas = {
+            nome: _somar_por_indice(ids, np.concatenate([m.medidas[nome] for m in matrizes]), len(codigos[0]))
+            for nome in nomes
+        }
+        return cls(*eixos, tuple(codigos), medidas)
+
+    def filtrar(self, origens=None, destinos=None, periodos=None):
+        """Restringe a matriz a um subconjunto de origens, destinos e/ou períodos"""
+        mascara = np.ones(len(self.i_origem), dtype=bool)
+        for valores, eixo, indice in ((origens, self.origens, self.i_origem),
+                                      (destinos, self.destinos, self.i_destino),
+                                      (periodos, self.periodos, self.i_periodo)):
+            if valores is not None:
+                mascara &= np.isin(eixo, list(valores))[indice]
+        celulas = (self.i_origem[mascara], self.i_destino[mascara], self.i_periodo[mascara])
+        medidas = {nome: valores[mascara] for nome, valores in self.medidas.items()}
+        return MatrizFluxos(self.origens, self.destinos, self.periodos, celulas, medidas)
+
+    def _totais(self, eixo, indice, medida):
+        """Total da medida por código de um eixo (somente códigos com atendimentos)"""
+        totais = _somar_por_indice(indice, self.medidas[medida], len(eixo))
+        presentes = np.bincount(indice, minlength=len(eixo)) > 0
+        return pd.Series(totais[presentes], index=eixo[presentes], name=medida)
+
+    def saidas(self, medida='registros'):
+        """Total que sai de cada origem, em ordem decrescente"""
+        totais = self._totais(self.origens, self.i_origem, medida)
+        return totais.iloc[np.argsort(-totais.to_numpy(), kind='stable')]
+
+    def entradas(self, medida='registros'):
+        """Total que chega a cada destino, em ordem decrescente"""
+        totais = self._totais(self.destinos, self.i_destino, medida)
+        return totais.iloc[np.argsort(-totais.to_numpy(), kind='stable')]
+
+    def _celulas_locais(self):
+        """Indica as células cuja origem é o próprio destino (mesmo código)"""
+        if len(self.origens) == 0:
+            return np.zeros(len(self.i_origem), dtype=bool)
+        posicao = np.searchsorted(self.origens, self.destinos).clip(max=len(self.origens) - 1)
+        origem_do_destino = np.where(self.origens[posicao] == self.destinos, posicao, -1)
+        return origem_do_destino[self.i_destino] == self.i_origem
+
+    def participacao_local(self, medida='registros'):
+        """Por destino: total recebido, parte de moradores locais e de outras origens"""
+        pesos = self.medidas[medida]
+        locais = self._celulas_locais()
+        total = _somar_por_indice(self.i_destino, pesos, len(self.destinos))
+        local = _somar_por_indice(self.i_destino[locais], pesos[locais], len(self.destinos))
+        presentes = np.bincount(self.i_destino, minlength=len(self.destinos)) > 0
+        resultado = pd.DataFrame({
+            'destino': self.destinos,
+            'total': total,
+            'locais': local,
+            'externos': total - local,
+        })[presentes].reset_index(drop=True)
+        resultado['perc_locais'] = resultado['locais'] / resultado['total'] * 100
+        resultado['perc_externos'] = 100 - resultado['perc_locais']
+        return resultado
+
+    def principais_origens(self, n=10, medida='registros', excluir_local=False):
+        """As n maiores origens de cada destino, com a participação no total recebido
+
+        Com excluir_local, os moradores do próprio destino ficam fora (inclusive do total).
+        """
+        mascara = ~self._celulas_locais() if excluir_local else np.ones(len(self.i_origem), dtype=bool)
+        ids, (destino, origem) = combinar_codigos(
+            [self.i_destino[mascara], self.i_origem[mascara]], [len(self.destinos), len(self.origens)]
+        )
+        valores = _somar_por_indice(ids, self.medidas[medida][mascara], len(destino))
+        total_destino = _somar_por_indice(destino, valores, len(self.destinos))
+
+        # Ordena por destino e valor decrescente; a posição é contada dentro de cada destino
+        ordem = np.lexsort((-valores, destino))
+        destino, origem, valores = destino[ordem], origem[ordem], valores[ordem]
+        inicios = np.flatnonzero(np.r_[True, destino[1:] != destino[:-1]]) if len(destino) else np.array([], dtype=np.int64)
+        posicao = np.arange(len(destino)) - np.repeat(inicios, np.diff(np.r_[inicios, len(destino)]))
+        manter = posicao < n
+
+        return pd.DataFrame({
+            'destino': self.destinos[destino[manter]],
+            'origem': self.origens[origem[manter]],
+            'posicao': posicao[manter] + 1,
+            medida: valores[manter],
+            'participacao': valores[manter] / total_destino[destino[manter]] * 100,
+        })
+
+    def tabular_origens(self, classes, padrao='Outros', medida='registros', por_periodo=False):
+        """Tabela cruzada destino (× período) × classe de origem, para todos os destinos de uma vez
+
+        classes mapeia código de origem -> rótulo; as demais origens recebem o rótulo padrao.
+        Retorna DataFrame com uma coluna por classe e a coluna 'Total'.
+        """
+        rotulos = list(dict.fromkeys(classes.values())) + [padrao]
+        rotulo_origem = pd.Series(self.origens).map(classes).fillna(padrao)
+        classe = pd.Categorical(rotulo_origem, categories=rotulos).codes[self.i_origem]
+
+        n_linhas = len(self.destinos) * (len(self.periodos) if por_periodo else 1)
+        linha = self.i_destino * len(self.periodos) + self.i_periodo if por_periodo else self.i_destino
+        pesos = self.medidas[medida]
+        tabela = _somar_por_indice(linha * len(rotulos) + classe, pesos, n_linhas * len(rotulos))
+        tabela = tabela.reshape(n_linhas, len(rotulos))
+
+        if por_periodo:
+            indice = pd.MultiIndex.from_product([self.destinos, self.periodos], names=['destino', 'periodo'])
+        else:
+            indice = pd.Index(self.destinos, name='destino')
+        resultado = pd.DataFrame(tabela, index=indice, columns=rotulos)
+        resultado['Total'] = resultado.sum(axis=1)
+        presentes = np.bincount(linha, minlength=n_linhas) > 0
+        return resultado[presentes]
@@ -0,0 +1,50 @@
+"""Hierarquia da tabela SIGTAP (grupo, subgrupo, forma de organização) a partir dos dígitos do código"""
+
+import numpy as np
+import pandas as pd
+
+# Nível -> (coluna derivada, dígitos do código de 10 posições)
+NIVEIS_SIGTAP = {
+    'grupo': ('PROC_GRUPO', 2),
+    'subgrupo': ('PROC_SUBGRUPO', 4),
+    'forma': ('PROC_FORMA', 6),
+}
+
+COLUNAS_NIVEIS = [coluna for coluna, _ in NIVEIS_SIGTAP.values()]
+
+GRUPOS_SIGTAP = {
+    '01': 'Ações de promoção e prevenção em saúde',
+    '02': 'Procedimentos com finalidade diagnóstica',
+    '03': 'Procedimentos clínicos',
+    '04': 'Procedimentos cirúrgicos',
+    '05': 'Transplantes de órgãos, tecidos e células',
+    '06': 'Medicamentos',
+    '07': 'Órteses, próteses e materiais especiais',
+    '08': 'Ações complementares da atenção à saúde',
+}
+
+def codigo_nivel(codigos, nivel):
+    """Código do nível ('03', '0301', '030101') por divisão inteira do código do procedimento
+
+    Aceita códigos como texto ('0301010072') ou número (301010072, sem o zero
+    à esquerda); o cálculo é feito só nos valores distintos. Códigos inválidos
+    ficam nulos.
+    """
+    digitos = NIVEIS_SIGTAP[nivel][1]
+    posicoes, unicos = pd.factorize(pd.Series(codigos))
+    numeros = pd.to_numeric(pd.Series(unicos), errors='coerce').to_numpy(dtype=float)
+    validos = (numeros >= 0) & (numeros < 10 ** 10)
+    prefixos = np.where(validos, numeros, 0).astype(np.int64) // 10 ** (10 - digitos)
+    rotulos = np.array([str(p).zfill(digitos) for p in prefixos] + [None], dtype=object)
+    rotulos[np.flatnonzero(~validos)] = None
+    return rotulos[posicoes]
+
+def adicionar_niveis(df, coluna='PA_PROC_ID', niveis=tuple(NIVEIS_SIGTAP)):
+    """Adiciona as colunas de grupo, subgrupo e forma de organização"""
+    for nivel in niveis:
+        df[NIVEIS_SIGTAP[nivel][0]] = codigo_nivel(df[coluna], nivel)
+    return df
+
+def nome_grupo(codigo):
+    """Nome do grupo SIGTAP ('03' -> 'Procedimentos clínicos')"""
+    return GRUPOS_SIGTAP.get(codigo, 'Grupo não identificado')
@@ -0,0 +1,268 @@
+"""Instrumentação das etapas: tempo, memória e linhas de carregadores, processamento, gráficos e seções das análises"""
+
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows: sem getrusage, a memória só é medida no modo tracemalloc
+    resource = None
+
+from .cache_consultas import estatisticas_cache, resumo_cache
+from .memoria import resumo_memoria
+
+# Configuração global (pode ser definida por variáveis de ambiente)
+CONFIG = {
+    'ativa': os.getenv('INSTRUMENTACAO', '1') == '1',
+    # 'rss': aumento do pico de memória do processo (barato); 'tracemalloc': pico alocado em cada etapa (preciso, mais lento)
+    'memoria': os.getenv('INSTRUMENTACAO_MEMORIA', 'rss'),
+    # Pasta onde o resumo de cada script é exportado em JSON e no formato de trace do Chrome
+    'saida': os.getenv('INSTRUMENTACAO_SAIDA') or None,
+}
+
+_inicio_ns = time.perf_counter_ns()
+_eventos = []
+_local = threading.local()
+
+class Etapa:
+    """Trecho medido; linhas pode ser definido dentro do bloco"""
+
+    __slots__ = ('nome', 'categoria', 'linhas', 'implicita', 'inicio_ns', 'filhos_ns',
+                 'memoria_inicial', 'pico_filhos')
+
+    def __init__(self, nome, categoria, linhas=None, implicita=False):
+        self.nome = nome
+        self.categoria = categoria
+        self.linhas = linhas
+        self.implicita = implicita
+        self.filhos_ns = 0
+        self.pico_filhos = 0
+
+def _pilha():
+    if not hasattr(_local, 'pilha'):
+        _local.pilha = []
+    return _local.pilha
+
+def _memoria_atual():
+    """Referência de memória no início de uma etapa (bytes)"""
+    if CONFIG['memoria'] == 'tracemalloc':
+        return tracemalloc.get_traced_memory()[0]
+    if resource is None:
+        return None
+    # Linux informa ru_maxrss em KB; macOS, em bytes
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+
+def _abrir(etapa):
+    pilha = _pilha()
+    if CONFIG['memoria'] == 'tracemalloc':
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        # O pico da etapa anterior é repassado à etapa pai antes de zerar
+        if pilha:
+            pilha[-1].pico_filhos = max(pilha[-1].pico_filhos, tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+    etapa.memoria_inicial = _memoria_atual()
+    etapa.inicio_ns = time.perf_counter_ns()
+    pilha.append(etapa)
+    return etapa
+
+def _fechar(etapa):
+    fim_ns = time.perf_counter_ns()
+    pilha = _pilha()
+    pilha.pop()
+    duracao_ns = fim_ns - etapa.inicio_ns
+
+    if CONFIG['memoria'] == 'tracemalloc':
+        pico = max(tracemalloc.get_traced_memory()[1], etapa.pico_filhos)
+        memoria = pico - etapa.memoria_inicial
+        if pilha:
+            pilha[-1].pico_filhos = max(pilha[-1].pico_filhos, pico)
+        tracemalloc.reset_peak()
+    elif etapa.memoria_inicial is not None:
+        memoria = _memoria_atual() - etapa.memoria_inicial
+    else:
+        memoria = None
+
+    if pilha:
+        pilha[-1].filhos_ns += duracao_ns
+    _eventos.append({
+        'nome': etapa.nome,
+        'categoria': etapa.categoria,
+        'inicio_s': (etapa.inicio_ns - _inicio_ns) / 1e9,
+        'duracao_s': duracao_ns / 1e9,
+        'proprio_s': (duracao_ns - etapa.filhos_ns) / 1e9,
+        'memoria_mb': memoria / 1024 ** 2 if memoria is not None else None,
+        'linhas': etapa.linhas,
+        'profundidade': len(pilha),
+        'pid': os.getpid(),
+        'tid': threading.get_ident(),
+    })
+
+def _fechar_implicitas():
+    """Fecha as seções abertas por iniciar_secao no topo da pilha"""
+    pilha = _pilha()
+    while pilha and pilha[-1].implicita:
+        _fechar(pilha[-1])
+
+@contextmanager
+def etapa(nome, categoria='etapa', linhas=None):
+    """Mede o bloco: with etapa('merge') as e: ...; e.linhas = len(df)"""
+    if not CONFIG['ativa']:
+        yield Etapa(nome, categoria, linhas)
+        return
+    atual = _abrir(Etapa(nome, categoria, linhas))
+    try:
+        yield atual
+    finally:
+        # Seções iniciadas dentro do bloco terminam junto com ele
+        while _pilha() and _pilha()[-1] is not atual:
+            _fechar(_pilha()[-1])
+        _fechar(atual)
+
+def _contar_linhas(resultado, args):
+    """Linhas do DataFrame retornado ou, se não houver, do primeiro DataFrame recebido"""
+    for valor in (resultado, *args):
+        if hasattr(valor, 'shape') and hasattr(valor, '__len__') and not isinstance(valor, type):
+            return len(valor)
+    return None
+
+def instrumentar(categoria='funcao', nome=None):
+    """Decorador: mede cada chamada e registra as linhas do resultado"""
+    def decorador(funcao):
+        rotulo = nome or funcao.__name__
+
+        @functools.wraps(funcao)
+        def wrapper(*args, **kwargs):
+            if not CONFIG['ativa']:
+                return funcao(*args, **kwargs)
+            atual = _abrir(Etapa(rotulo, categoria))
+            try:
+                resultado = funcao(*args, **kwargs)
+                atual.linhas = _contar_linhas(resultado, args)
+                return resultado
+            finally:
+                _fechar(atual)
+
+        return wrapper
+    return decorador
+
+def iniciar_secao(titulo):
+    """Encerra a seção anterior e abre outra, que vai até a próxima seção ou o fim da etapa que a contém"""
+    if not CONFIG['ativa']:
+        return
+    _fechar_implicitas()
+    _abrir(Etapa(' '.join(titulo.split()), 'secao', implicita=True))
+
+def fechar_secoes():
+    """Encerra a seção aberta (cabeçalhos e o fim do script delimitam as seções)"""
+    if CONFIG['ativa']:
+        _fechar_implicitas()
+
+def configurar_instrumentacao(ativa=None, memoria=None, saida=None):
+    """Altera a configuração (ativa, modo de memória 'rss' ou 'tracemalloc', pasta de exportação)"""
+    if memoria not in (None, 'rss', 'tracemalloc'):
+        raise ValueError(f"Modo de memória desconhecido: {memoria}")
+    novos = {'ativa': ativa, 'memoria': memoria, 'saida': saida}
+    CONFIG.update({k: v for k, v in novos.items() if v is not None})
+    return dict(CONFIG)
+
+def eventos():
+    """Etapas concluídas, na ordem em que terminaram"""
+    return list(_eventos)
+
+def limpar_rastro():
+    """Descarta as etapas registradas e reinicia o relógio do rastro"""
+    global _inicio_ns
+    _eventos.clear()
+    _inicio_ns = time.perf_counter_ns()
+
+def tempo_decorrido():
+    """Segundos desde o início do rastro (importação do módulo ou último limpar_rastro)"""
+    return (time.perf_counter_ns() - _inicio_ns) / 1e9
+
+def resumo_rastro():
+    """Uma linha por (categoria, nome): chamadas, tempo total e próprio, % do tempo decorrido, linhas e memória"""
+    total = tempo_decorrido()
+    grupos = {}
+    for e in _eventos:
+        linha = grupos.setdefault((e['categoria'], e['nome']), {
+            'categoria': e['categoria'], 'nome': e['nome'], 'chamadas': 0, 'total_s': 0.0,
+            'proprio_s': 0.0, 'linhas': None, 'memoria_mb': None,
+        })
+        linha['chamadas'] += 1
+        linha['total_s'] += e['duracao_s']
+        linha['proprio_s'] += e['proprio_s']
+        if e['linhas'] is not None:
+            linha['linhas'] = (linha['linhas'] or 0) + e['linhas']
+        if e['memoria_mb'] is not None:
+            linha['memoria_mb'] = max(linha['memoria_mb'] or 0.0, e['memoria_mb'])
+    resumo = sorted(grupos.values(), key=lambda l: l['proprio_s'], reverse=True)
+    for linha in resumo:
+        linha['perc_proprio'] = linha['proprio_s'] / total * 100 if total else 0.0
+    return resumo
+
+def imprimir_resumo_rastro(limite=20, largura=103):
+    """Tabela das etapas com maior tempo próprio (sem o tempo das etapas internas)"""
+    resumo = resumo_rastro()
+    if not resumo:
+        return
+    print("\n" + "=" * largura)
+    print("ONDE O TEMPO FOI GASTO (tempo próprio, sem as etapas internas)")
+    print("=" * largura)
+    print(f"{'Categoria':<13} {'Etapa':<44} {'Chamadas':>8} {'Total':>9} {'Próprio':>9} {'%':>6} "
+          f"{'Linhas':>12} {'Memória':>10}")
+    for linha in resumo[:limite]:
+        linhas = f"{linha['linhas']:>12,}" if linha['linhas'] is not None else f"{'-':>12}"
+        memoria = f"{linha['memoria_mb']:>7.1f} MB" if linha['memoria_mb'] is not None else f"{'-':>10}"
+        print(f"{linha['categoria']:<13} {linha['nome'][:44]:<44} {linha['chamadas']:>8,} "
+              f"{linha['total_s']:>8.2f}s {linha['proprio_s']:>8.2f}s {linha['perc_proprio']:>5.1f}% "
+              f"{linhas} {memoria}")
+    if len(resumo) > limite:
+        print(f"... e mais {len(resumo) - limite} etapas")
+    total = tempo_decorrido()
+    medido = sum(e['duracao_s'] for e in _eventos if e['profundidade'] == 0)
+    print(f"\nTempo decorrido: {total:.2f}s (fora das etapas medidas: {max(total - medido, 0):.2f}s)")
+    print(resumo_memoria())
+    if any(estatisticas_cache()[k] for k in ('acertos_memoria', 'acertos_disco', 'falhas')):
+        print(resumo_cache())
+
+def exportar_json(caminho):
+    """Grava as etapas e o resumo em JSON"""
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump({'memoria': CONFIG['memoria'], 'eventos': eventos(), 'resumo': resumo_rastro()},
+                  f, indent=2, ensure_ascii=False)
+    return caminho
+
+def exportar_chrome_trace(caminho):
+    """Grava as etapas no formato de trace do Chrome (chrome://tracing, Perfetto)"""
+    trace = [{
+        'name': e['nome'],
+        'cat': e['categoria'],
+        'ph': 'X',
+        'ts': e['inicio_s'] * 1e6,
+        'dur': e['duracao_s'] * 1e6,
+        'pid': e['pid'],
+        'tid': e['tid'],
+        'args': {'linhas': e['linhas'], 'memoria_mb': e['memoria_mb']},
+    } for e in _eventos]
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': trace, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+    return caminho
+
+def finalizar_instrumentacao(nome):
+    """Fecha as seções abertas, imprime o resumo e exporta JSON e trace se houver pasta de saída"""
+    if not CONFIG['ativa']:
+        return
+    fechar_secoes()
+    imprimir_resumo_rastro()
+    if CONFIG['saida']:
+        os.makedirs(CONFIG['saida'], exist_ok=True)
+        exportar_json(os.path.join(CONFIG['saida'], f'{nome}.json'))
+        caminho = exportar_chrome_trace(os.path.join(CONFIG['saida'], f'{nome}.trace.json'))
+        print(f"\n✓ Instrumentação exportada em: {caminho}")
@@ -0,0 +1,210 @@
+"""Execução em lote das etapas (extração, limpeza, perfil, análises) para vários municípios em processos paralelos"""
+
+import contextlib
+import os
+import re
+import runpy
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+
+from .memoria import pico_rss_mb
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Etapas por município, na ordem de execução (cada uma depende da anterior)
+ETAPAS = ('extrair', 'limpar', 'perfil', 'analisar')
+
+# Análises por município; a 7 compara municípios e roda uma vez para o lote inteiro
+ANALISES_MUNICIPIO = (1, 2, 3, 4, 5, 6)
+ANALISE_COMPARACAO = 7
+
+# Pasta (dentro da saída) da comparação entre os municípios do lote
+PASTA_COMPARACAO = 'comparacao'
+
+@dataclass
+class ResultadoEtapa:
+    """Tempo, pico de memória e erro de uma etapa de um município"""
+    municipio: str
+    etapa: str
+    segundos: float
+    erro: str = None
+    log: str = None
+    pico_rss_mb: float = None
+
+@contextlib.contextmanager
+def _redirecionar_saida(arquivo):
+    """Envia stdout e stderr ao arquivo, também nos descritores 1 e 2
+
+    Os processos filhos (ex.: renderização de gráficos em paralelo) escrevem
+    nos descritores herdados, que redirect_stdout sozinho não altera.
+    """
+    sys.stdout.flush()
+    sys.stderr.flush()
+    originais = [os.dup(1), os.dup(2)]
+    try:
+        os.dup2(arquivo.fileno(), 1)
+        os.dup2(arquivo.fileno(), 2)
+        with contextlib.redirect_stdout(arquivo), contextlib.redirect_stderr(arquivo):
+            yield
+    finally:
+        arquivo.flush()
+        os.dup2(originais[0], 1)
+        os.dup2(originais[1], 2)
+        for descritor in originais:
+            os.close(descritor)
+
+def normalizar_municipio(codigo):
+    """Código do município com 6 dígitos (o código IBGE de 7 dígitos perde o dígito verificador)"""
+    codigo = str(codigo).strip()
+    if not re.fullmatch(r'\d{6,7}', codigo):
+        raise ValueError(f"Código de município inválido: {codigo} (use 6 ou 7 dígitos)")
+    return codigo[:6]
+
+def ler_periodo(texto):
+    """Período de competências: 'AAAAMM-AAAAMM', 'AAAAMM' ou 'AAAA' -> (inicio, fim) em AAAAMM"""
+    if texto is None:
+        return None
+    partes = str(texto).strip().split('-')
+    if len(partes) > 2 or not all(re.fullmatch(r'\d{4}|\d{6}', p) for p in partes):
+        raise ValueError(f"Período inválido: {texto} (use AAAAMM-AAAAMM, AAAAMM ou AAAA)")
+    inicio, fim = partes[0], partes[-1]
+    inicio = inicio if len(inicio) == 6 else inicio + '01'
+    fim = fim if len(fim) == 6 else fim + '12'
+    if inicio > fim:
+        raise ValueError(f"Período inválido: {texto} (início depois do fim)")
+    return inicio, fim
+
+def nomes_municipios(codigos):
+    """Nome de cada município pela tabela tb_municip (o código, se não encontrado)"""
+    from .data_loader import carregar_municipios
+    df = carregar_municipios()
+    nomes = {}
+    if not df.empty:
+        nomes = dict(zip(df['co_municip'].astype(str).str[:6], df['ds_nome']))
+    return {codigo: nomes.get(codigo, codigo) for codigo in codigos}
+
+def _executar_etapa(etapa, codigo, nome, periodo, analises, processos):
+    """Executa uma etapa no diretório do município (arquivos com os nomes padrão dos scripts)"""
+    if etapa == 'extrair':
+        from extrair_dados_slq_to_csv import extrair_municipio
+        extrair_municipio(codigo, 'dados_pars.csv', periodo)
+    elif etapa == 'limpar':
+        from limpeza_dados import PERIODO_PADRAO, limpar_dados
+        limpar_dados('dados_pars.csv', 'dados_limpos.csv', periodo or PERIODO_PADRAO)
+    elif etapa == 'perfil':
+        runpy.run_path(os.path.join(RAIZ, 'analise_exploratoria_de_dados.py'), run_name='__main__')
+    elif etapa == 'analisar':
+        from executar_analises import executar_analises
+        from .renderizacao import configurar_renderizacao
+        from .sessao import SessaoAnalise
+        configurar_renderizacao(trabalhadores=processos)
+        tempos = executar_analises(list(analises), SessaoAnalise('dados_limpos.csv', codigo, nome))
+        erros = [f"{analise}: {erro}" for analise, _, erro in tempos if erro]
+        if erros:
+            raise RuntimeError('; '.join(erros))
+    else:
+        raise ValueError(f"Etapa desconhecida: {etapa}")
+
+def processar_municipio(codigo, nome, etapas, saida, periodo=None, analises=ANALISES_MUNICIPIO, processos=1):
+    """Executa as etapas de um município em saida/<codigo>/; para na primeira falha
+
+    A saída de cada etapa vai para saida/<codigo>/logs/<etapa>.txt.
+    Retorna uma lista de ResultadoEtapa.
+    """
+    pasta = os.path.abspath(os.path.join(saida, codigo))
+    os.makedirs(os.path.join(pasta, 'logs'), exist_ok=True)
+    for caminho in (RAIZ, os.path.join(RAIZ, 'scripts')):
+        if caminho not in sys.path:
+            sys.path.insert(0, caminho)
+    anterior = os.getcwd()
+    resultados = []
+    try:
+        os.chdir(pasta)
+        for etapa in etapas:
+            log = os.path.join(pasta, 'logs', f'{etapa}.txt')
+            inicio = time.perf_counter()
+            erro = None
+            with open(log, 'w', encoding='utf-8') as arquivo, _redirecionar_saida(arquivo):
+                try:
+                    _executar_etapa(etapa, codigo, nome, periodo, analises, processos)
+                except BaseException as e:
+                    traceback.print_exc()
+                    erro = f"{type(e).__name__}: {e}"
+            resultados.append(ResultadoEtapa(codigo, etapa, time.perf_counter() - inicio, erro, log, pico_rss_mb()))
+            if erro:
+                break
+    finally:
+        os.chdir(anterior)
+    return resultados
+
+def comparar_municipios(nomes, saida):
+    """Análise 7 (comparação e tendências) sobre os dados limpos de todos os municípios do lote"""
+    pasta = os.path.abspath(os.path.join(saida, PASTA_COMPARACAO))
+    os.makedirs(os.path.join(pasta, 'logs'), exist_ok=True)
+    municipios = {nome: os.path.abspath(os.path.join(saida, codigo, 'dados_limpos.csv'))
+                  for codigo, nome in nomes.items()}
+    log = os.path.join(pasta, 'logs', 'comparacao.txt')
+    anterior = os.getcwd()
+    inicio = time.perf_counter()
+    erro = None
+    try:
+        os.chdir(pasta)
+        with open(log, 'w', encoding='utf-8') as arquivo, _redirecionar_saida(arquivo):
+            try:
+                from executar_analises import importar_analise, listar_analises
+                from .sessao import SessaoAnalise
+                primeiro = next(iter(nomes))
+                sessao = SessaoAnalise(municipios[nomes[primeiro]], primeiro, nomes[primeiro])
+                importar_analise(listar_analises()[ANALISE_COMPARACAO]).main(sessao, municipios)
+            except BaseException as e:
+                traceback.print_exc()
+                erro = f"{type(e).__name__}: {e}"
+    finally:
+        os.chdir(anterior)
+    return ResultadoEtapa(PASTA_COMPARACAO, 'comparar', time.perf_counter() - inicio, erro, log, pico_rss_mb())
+
+def executar_lote(municipios, etapas, saida, periodo=None, analises=ANALISES_MUNICIPIO,
+                  trabalhadores=None, processos=1, comparar=False, ao_concluir=None):
+    """Executa as etapas para cada município em processos paralelos (um município por processo)
+
+    municipios: dict código -> nome. Com comparar=True, roda ao final a
+    análise comparativa com os municípios que concluíram todas as etapas.
+    Retorna a lista de ResultadoEtapa de todos os municípios.
+    """
+    if comparar or {'perfil', 'analisar'} & set(etapas):
+        # Dimensões consultadas uma vez aqui: os processos dos municípios as leem do cache em disco
+        from .data_loader import aquecer_cache_dimensoes
+        aquecer_cache_dimensoes()
+    trabalhadores = max(1, min(trabalhadores or os.cpu_count() or 1, len(municipios)))
+    # Um processo novo por município: o pico de memória medido é só o dele
+    opcoes = {'max_tasks_per_child': 1} if sys.version_info >= (3, 11) else {}
+    resultados = []
+    with ProcessPoolExecutor(max_workers=trabalhadores, **opcoes) as executor:
+        futuros = {
+            executor.submit(processar_municipio, codigo, nome, etapas, saida, periodo, analises, processos): codigo
+            for codigo, nome in municipios.items()
+        }
+        for futuro in as_completed(futuros):
+            codigo = futuros[futuro]
+            try:
+                concluidos = futuro.result()
+            except Exception as e:
+                # Falha do processo (ex.: sem memória): registrada como erro do município
+                concluidos = [ResultadoEtapa(codigo, etapas[0], 0.0, f"{type(e).__name__}: {e}")]
+            resultados += concluidos
+            if ao_concluir:
+                for resultado in concluidos:
+                    ao_concluir(resultado)
+
+    if comparar:
+        falhos = {r.municipio for r in resultados if r.erro}
+        validos = {c: n for c, n in municipios.items() if c not in falhos}
+        if len(validos) >= 2:
+            resultado = comparar_municipios(validos, saida)
+            resultados.append(resultado)
+            if ao_concluir:
+                ao_concluir(resultado)
+    return resultados
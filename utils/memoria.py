@@ -0,0 +1,170 @@
+"""Orçamento de memória: estimativa de bytes por linha, tamanho dos blocos e decisão pelo processamento fora da memória"""
+
+import os
+import re
+import sys
+
+try:
+    import resource
+except ImportError:  # Windows: sem getrusage, o pico de memória fica desconhecido
+    resource = None
+
+# Orçamento global em bytes (None = sem limite); ORCAMENTO_MEMORIA aceita 512M, 2G, 1.5GB...
+CONFIG = {'orcamento': None}
+
+# Parte do orçamento ocupada por um bloco lido (o resto fica para cópias, agregados e o próprio Python)
+FRACAO_BLOCO = 0.25
+
+# Cópias do conjunto de dados que o processamento em memória costuma manter ao mesmo tempo
+FATOR_TRABALHO = 3
+
+# Limites do tamanho de bloco (linhas)
+BLOCO_MINIMO = 1_000
+BLOCO_PADRAO = 500_000
+
+# Bytes por valor em memória de cada tipo SQL (texto: objeto str do Python + caracteres)
+BYTES_TIPO_SQL = {'INTEGER': 8, 'BIGINT': 8, 'DOUBLE': 8, 'FLOAT': 8}
+BYTES_TEXTO_BASE = 57
+
+UNIDADES = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+
+def ler_tamanho(texto):
+    """Converte '512M', '2G', '1.5GB' ou bytes em número de bytes (vazio = None)"""
+    if texto is None or str(texto).strip() == '':
+        return None
+    correspondencia = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([KMGT]?)B?\s*', str(texto).upper())
+    if not correspondencia:
+        raise ValueError(f"Tamanho de memória inválido: {texto} (ex.: 512M, 2G)")
+    numero, unidade = correspondencia.groups()
+    return int(float(numero) * UNIDADES[unidade])
+
+def configurar_orcamento(orcamento):
+    """Define o orçamento (bytes ou texto como '2G'; None remove) também para os processos filhos"""
+    CONFIG['orcamento'] = ler_tamanho(orcamento) if isinstance(orcamento, str) else orcamento
+    if CONFIG['orcamento']:
+        os.environ['ORCAMENTO_MEMORIA'] = str(CONFIG['orcamento'])
+    else:
+        os.environ.pop('ORCAMENTO_MEMORIA', None)
+    return CONFIG['orcamento']
+
+def orcamento_bytes():
+    return CONFIG['orcamento']
+
+def bytes_por_linha_esquema(esquema):
+    """Bytes por linha em memória estimados pelos tipos SQL ({coluna: 'VARCHAR(6)', ...})"""
+    total = 0
+    for tipo in esquema.values():
+        nome = tipo.split('(')[0].upper()
+        if nome in BYTES_TIPO_SQL:
+            total += BYTES_TIPO_SQL[nome]
+        else:
+            tamanho = re.search(r'\((\d+)\)', tipo)
+            total += BYTES_TEXTO_BASE + min(int(tamanho.group(1)) if tamanho else 32, 64)
+    return total
+
+def estimar_csv(caminho, amostra=2_000):
+    """(linhas estimadas, bytes por linha em memória) a partir de uma amostra do início do CSV"""
+    import pandas as pd
+    tamanho_arquivo = os.path.getsize(caminho)
+    with open(caminho, 'rb') as f:
+        cabecalho = f.readline()
+        bytes_amostra = sum(len(linha) for _, linha in zip(range(amostra), f))
+    df = pd.read_csv(caminho, nrows=amostra, low_memory=False)
+    if df.empty or bytes_amostra == 0:
+        return 0, 0
+    linhas = int((tamanho_arquivo - len(cabecalho)) / (bytes_amostra / len(df)))
+    return linhas, df.memory_usage(deep=True, index=False).sum() / len(df)
+
+def linhas_por_bloco(bytes_linha, fracao=FRACAO_BLOCO, padrao=BLOCO_PADRAO):
+    """Linhas por bloco para que cada bloco ocupe no máximo a fração do orçamento (padrão sem orçamento)"""
+    if not CONFIG['orcamento'] or not bytes_linha:
+        return padrao
+    return max(BLOCO_MINIMO, int(CONFIG['orcamento'] * fracao / bytes_linha))
+
+def cabe_no_orcamento(bytes_necessarios):
+    """Indica se o conjunto de trabalho cabe no que resta do orçamento (sempre, sem orçamento)"""
+    if not CONFIG['orcamento']:
+        return True
+    return bytes_necessarios + (rss_atual_mb() or 0) * 1024 ** 2 <= CONFIG['orcamento']
+
+def csv_cabe_no_orcamento(caminho, fator=FATOR_TRABALHO):
+    """Indica se o CSV inteiro pode ser processado em memória; retorna (cabe, bytes por linha)"""
+    if not CONFIG['orcamento']:
+        return True, None
+    linhas, bytes_linha = estimar_csv(caminho)
+    return cabe_no_orcamento(linhas * bytes_linha * fator), bytes_linha
+
+def _combinar_tipos(tipos):
+    """Tipo que a leitura do arquivo inteiro daria a uma coluna lida em blocos com estes tipos"""
+    import numpy as np
+    import pandas as pd
+    tipos = list(dict.fromkeys(tipos))
+    if len(tipos) == 1:
+        return tipos[0]
+    if all(pd.api.types.is_numeric_dtype(t) and not pd.api.types.is_bool_dtype(t) for t in tipos):
+        return np.dtype('float64')
+    # Texto em algum bloco: a coluna inteira fica como texto (valores como no arquivo)
+    textos = [t for t in tipos if pd.api.types.is_string_dtype(t)]
+    return textos[0] if textos else np.dtype('object')
+
+def inferir_tipos_csv(caminho, linhas, **opcoes):
+    """Tipos das colunas de um CSV lido em blocos, iguais aos de uma leitura inteira
+
+    Blocos diferentes podem inferir tipos diferentes (inteiro em um, decimal ou
+    texto em outro); passe o resultado como dtype= na leitura em blocos.
+    """
+    import pandas as pd
+    tipos = {}
+    for bloco in pd.read_csv(caminho, chunksize=linhas, low_memory=False, **opcoes):
+        for coluna, tipo in bloco.dtypes.items():
+            tipos.setdefault(coluna, []).append(tipo)
+    return {coluna: _combinar_tipos(lista) for coluna, lista in tipos.items()}
+
+def carregar_csv_compacto(caminho, linhas):
+    """Lê o CSV em blocos com as colunas de texto como categorias (bem menos memória que texto)"""
+    import pandas as pd
+    from pandas.api.types import union_categoricals
+    tipos = inferir_tipos_csv(caminho, linhas)
+    colunas_texto = [c for c, t in tipos.items() if pd.api.types.is_string_dtype(t)]
+    blocos = []
+    for bloco in pd.read_csv(caminho, chunksize=linhas, dtype=tipos, low_memory=False):
+        for coluna in colunas_texto:
+            bloco[coluna] = bloco[coluna].astype('category')
+        blocos.append(bloco)
+    if not blocos:
+        return pd.read_csv(caminho)
+    # Mesmas categorias em todos os blocos: a concatenação mantém o tipo categoria
+    for coluna in colunas_texto:
+        categorias = union_categoricals([b[coluna] for b in blocos], sort_categories=True).categories
+        for bloco in blocos:
+            bloco[coluna] = bloco[coluna].cat.set_categories(categorias)
+    return pd.concat(blocos, ignore_index=True)
+
+def rss_atual_mb():
+    """Memória residente atual do processo (MB), se a plataforma informar"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+    except (OSError, ValueError, AttributeError):
+        return pico_rss_mb()
+
+def pico_rss_mb():
+    """Maior memória residente do processo até agora (MB), se a plataforma informar"""
+    if resource is None:
+        return None
+    # Linux informa ru_maxrss em KB; macOS, em bytes
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 ** 2 if sys.platform == 'darwin' else 1024)
+
+def resumo_memoria(pico_mb=None):
+    """Linha com o pico de memória do processo e a fração do orçamento usada"""
+    pico_mb = pico_rss_mb() if pico_mb is None else pico_mb
+    if pico_mb is None:
+        return "Pico de memória (RSS): indisponível nesta plataforma"
+    if not CONFIG['orcamento']:
+        return f"Pico de memória (RSS): {pico_mb:,.0f} MB (sem orçamento)"
+    orcamento_mb = CONFIG['orcamento'] / 1024 ** 2
+    marca = "  ACIMA DO ORÇAMENTO" if pico_mb > orcamento_mb else ""
+    return (f"Pico de memória (RSS): {pico_mb:,.0f} MB de {orcamento_mb:,.0f} MB do orçamento "
+            f"({pico_mb / orcamento_mb:.0%}){marca}")
+
+configurar_orcamento(os.getenv('ORCAMENTO_MEMORIA'))
@@ -0,0 +1,49 @@
+"""Valores monetários em centavos inteiros (int64): somas exatas e formatação só na apresentação"""
+
+import numpy as np
+import pandas as pd
+
+# Colunas monetárias da PARS e o sufixo da coluna em centavos
+COLUNAS_MONETARIAS = ['PA_VALAPR', 'PA_VALPRO']
+SUFIXO_CENTAVOS = '_CENT'
+
+def coluna_centavos(coluna):
+    """Nome da coluna em centavos ('PA_VALAPR' -> 'PA_VALAPR_CENT')"""
+    return coluna + SUFIXO_CENTAVOS
+
+def para_centavos(valores):
+    """Converte valores em reais para centavos int64 (nulos viram zero)"""
+    reais = pd.to_numeric(pd.Series(valores), errors='coerce').to_numpy(dtype=float)
+    return np.rint(np.nan_to_num(reais) * 100).astype(np.int64)
+
+def de_centavos(centavos):
+    """Converte centavos para reais (float), para gráficos e razões"""
+    return np.asarray(centavos, dtype=float) / 100
+
+def adicionar_centavos(df, colunas=COLUNAS_MONETARIAS):
+    """Cria as colunas em centavos que ainda não existem (CSVs limpos antes da conversão)"""
+    for coluna in colunas:
+        if coluna in df.columns and coluna_centavos(coluna) not in df.columns:
+            df[coluna_centavos(coluna)] = para_centavos(df[coluna])
+    return df
+
+def formatar_centavos(centavos, prefixo='R$ '):
+    """Formata centavos como formatar_valor_monetario ('R$ 1,234.56') usando apenas inteiros"""
+    centavos = int(centavos)
+    sinal = '-' if centavos < 0 else ''
+    reais, resto = divmod(abs(centavos), 100)
+    return f"{prefixo}{sinal}{reais:,}.{resto:02d}"
+
+def somar_por_faixa(centavos, limites_reais):
+    """Quantidade e soma (centavos) por faixa de valor [limite_i, limite_i+1)
+
+    Os limites são convertidos para centavos e a faixa de cada valor é obtida
+    por busca binária nos inteiros; valores abaixo do primeiro limite ficam de fora.
+    """
+    limites = np.array([np.inf if np.isinf(l) else round(l * 100) for l in limites_reais])
+    faixa = np.searchsorted(limites, centavos, side='right') - 1
+    validos = (faixa >= 0) & (faixa < len(limites) - 1)
+    n_faixas = len(limites) - 1
+    quantidade = np.bincount(faixa[validos], minlength=n_faixas)
+    soma = np.bincount(faixa[validos], weights=np.asarray(centavos)[validos], minlength=n_faixas)
+    return quantidade, np.rint(soma).astype(np.int64)
@@ -0,0 +1,270 @@
+"""Motor SQL opcional (DuckDB) sobre os dados limpos em CSV ou Parquet particionado: só o resultado agregado vem para o pandas"""
+
+import glob
+import os
+import shutil
+import uuid
+
+from .agregacao import _normalizar_conjuntos, _quantil_da_operacao
+from .hierarquia import NIVEIS_SIGTAP
+from .memoria import orcamento_bytes
+from .monetario import COLUNAS_MONETARIAS, coluna_centavos
+from .sessao import CODIGOS_PADRONIZADOS
+
+# Partições padrão: filtros por município e competência leem só os arquivos necessários
+PARTICOES_PADRAO = ('PA_UFMUN', 'PA_CMP')
+
+# Operação de agregar_multiplas_medidas -> expressão SQL ({c} = coluna)
+OPERACOES_SQL = {
+    'size': 'COUNT(*)',
+    'count': 'COUNT({c})',
+    'sum': 'COALESCE(SUM({c}), 0)',
+    'mean': 'AVG({c})',
+    'min': 'MIN({c})',
+    'max': 'MAX({c})',
+    'std': 'STDDEV_SAMP({c})',
+    'nunique': 'COUNT(DISTINCT {c})',
+}
+
+TIPOS_INTEIROS = ('TINYINT', 'SMALLINT', 'INTEGER', 'BIGINT', 'HUGEINT', 'UTINYINT', 'USMALLINT', 'UINTEGER', 'UBIGINT')
+TIPOS_REAIS = ('FLOAT', 'DOUBLE', 'REAL')
+
+def _identificador(nome):
+    return '"' + str(nome).replace('"', '""') + '"'
+
+def _texto(valor):
+    return "'" + str(valor).replace("'", "''") + "'"
+
+def _arquivos(origem):
+    """Arquivos de uma origem: CSV ou Parquet, padrão glob, pasta de partições ou lista desses"""
+    origens = [origem] if isinstance(origem, (str, os.PathLike)) else list(origem)
+    arquivos = []
+    for item in map(str, origens):
+        if os.path.isdir(item):
+            encontrados = glob.glob(os.path.join(item, '**', '*.parquet'), recursive=True)
+            arquivos += sorted(encontrados or glob.glob(os.path.join(item, '*.csv')))
+        else:
+            arquivos += sorted(glob.glob(item)) or [item]
+    if not arquivos:
+        raise FileNotFoundError(f"Nenhum arquivo de dados em: {origem}")
+    return arquivos
+
+def _literal(valor):
+    return str(valor) if isinstance(valor, (int, float)) else _texto(valor)
+
+def _conectar(threads=None):
+    try:
+        import duckdb
+    except ImportError as e:
+        raise ImportError("O motor DuckDB requer o pacote duckdb (pip install duckdb)") from e
+    conn = duckdb.connect()
+    conn.execute(f"SET threads = {int(threads or os.cpu_count() or 1)}")
+    if orcamento_bytes():
+        # Acima do orçamento o DuckDB grava os resultados intermediários em disco
+        conn.execute(f"SET memory_limit = '{orcamento_bytes() // 1024 ** 2}MB'")
+    return conn
+
+def _colunas_hive(arquivos):
+    """Colunas de partição (pasta/COLUNA=valor/...) presentes nos caminhos"""
+    return {parte.split('=', 1)[0] for a in arquivos for parte in os.path.normpath(a).split(os.sep) if '=' in parte}
+
+def _leitura(arquivos):
+    """Função de leitura do DuckDB para os arquivos (projeções e filtros são empurrados para a varredura)"""
+    lista = '[' + ', '.join(_texto(a) for a in arquivos) + ']'
+    if all(a.endswith('.parquet') for a in arquivos):
+        # Códigos usados como partição já foram gravados padronizados: lidos como texto, sem conversão
+        codigos = sorted(_colunas_hive(arquivos) & set(CODIGOS_PADRONIZADOS))
+        tipos = ', '.join(f"{_texto(c)}: 'VARCHAR'" for c in codigos)
+        return (f"read_parquet({lista}, hive_partitioning = true, union_by_name = true"
+                + (f", hive_types = {{{tipos}}})" if codigos else ")"))
+    return f"read_csv({lista}, header = true, union_by_name = true)"
+
+def _expressoes(colunas, padronizadas=(), derivadas=True):
+    """Colunas da visão: códigos padronizados e as derivadas usadas pelo cubo, como no caminho pandas"""
+    expressoes, codigos = [], {}
+    for coluna in colunas:
+        if coluna in padronizadas:
+            # Comparação direta com a coluna de partição: o filtro poda os arquivos lidos
+            codigos[coluna] = _identificador(coluna)
+            expressoes.append(codigos[coluna])
+        elif coluna in CODIGOS_PADRONIZADOS:
+            texto = f"upper(trim(CAST({_identificador(coluna)} AS VARCHAR)))"
+            tamanho = CODIGOS_PADRONIZADOS[coluna]
+            codigos[coluna] = f"CASE WHEN length({texto}) < {tamanho} THEN lpad({texto}, {tamanho}, '0') ELSE {texto} END"
+            expressoes.append(f"{codigos[coluna]} AS {_identificador(coluna)}")
+        else:
+            expressoes.append(_identificador(coluna))
+    if not derivadas:
+        return expressoes
+
+    # Níveis SIGTAP (prefixos do código de 10 dígitos), como utils.hierarquia.codigo_nivel
+    if 'PA_PROC_ID' in codigos:
+        for derivada, digitos in NIVEIS_SIGTAP.values():
+            if derivada not in colunas:
+                expressoes.append(f"CASE WHEN regexp_full_match({codigos['PA_PROC_ID']}, '[0-9]{{10}}') "
+                                  f"THEN substr({codigos['PA_PROC_ID']}, 1, {digitos}) END AS {derivada}")
+
+    # Faixa etária de 5 anos (0-4 ... 100+, nula fora de [0, 150)), como utils.cubo.calcular_faixa_etaria
+    if 'PA_IDADE' in colunas and 'FAIXA_ETARIA' not in colunas:
+        idade = "TRY_CAST(PA_IDADE AS DOUBLE)"
+        expressoes.append(f"CASE WHEN {idade} >= 0 AND {idade} < 150 "
+                          f"THEN CAST(least(floor({idade} / 5), 20) AS TINYINT) END AS FAIXA_ETARIA")
+
+    # Centavos inteiros para CSVs limpos antes da conversão, como utils.monetario.para_centavos
+    for coluna in COLUNAS_MONETARIAS:
+        if coluna in colunas and coluna_centavos(coluna) not in colunas:
+            expressoes.append(f"CAST(round_even(COALESCE(TRY_CAST({coluna} AS DOUBLE), 0) * 100, 0) AS BIGINT) "
+                              f"AS {coluna_centavos(coluna)}")
+    return expressoes
+
+class FonteDuckDB:
+    """Dados limpos como a visão 'dados' do DuckDB
+
+    Pode substituir o DataFrame em agregar_multiplas_medidas, agrupar_por_categoria,
+    calcular_estatisticas_basicas e CuboPARS.construir: a agregação roda em SQL,
+    com várias threads e lendo só as colunas e partições necessárias.
+    """
+
+    def __init__(self, origem, threads=None):
+        self.arquivos = _arquivos(origem)
+        self.conn = _conectar(threads)
+        self.conn.execute(f"CREATE VIEW brutos AS SELECT * FROM {_leitura(self.arquivos)}")
+        self.brutas = [linha[0] for linha in self.conn.execute("DESCRIBE brutos").fetchall()]
+        padronizadas = _colunas_hive(self.arquivos) & set(CODIGOS_PADRONIZADOS)
+        self.conn.execute(f"CREATE VIEW dados AS SELECT {', '.join(_expressoes(self.brutas, padronizadas))} FROM brutos")
+        self.tipos = {linha[0]: linha[1] for linha in self.conn.execute("DESCRIBE dados").fetchall()}
+        self.colunas = list(self.tipos)
+        self._registros = None
+
+    def __len__(self):
+        if self._registros is None:
+            self._registros = self.conn.execute("SELECT COUNT(*) FROM dados").fetchone()[0]
+        return self._registros
+
+    def consultar(self, sql, parametros=None):
+        """Executa SQL sobre a visão 'dados' e retorna um DataFrame"""
+        return self.conn.execute(sql, parametros or []).df()
+
+    def _filtro(self, filtros):
+        """Cláusula WHERE e parâmetros de {coluna: valor(es)}"""
+        condicoes, parametros = [], []
+        for coluna, valores in (filtros or {}).items():
+            valores = list(valores) if isinstance(valores, (list, tuple, set)) else [valores]
+            condicoes.append(f"{_identificador(coluna)} IN ({', '.join('?' * len(valores))})")
+            parametros += valores
+        return (' WHERE ' + ' AND '.join(condicoes) if condicoes else ''), parametros
+
+    def _inteira(self, coluna):
+        return self.tipos[coluna].upper() in TIPOS_INTEIROS
+
+    def numerica(self, coluna):
+        """Se a coluna da visão é numérica (inteira, real ou decimal)"""
+        tipo = self.tipos[coluna].upper()
+        return tipo in TIPOS_INTEIROS or tipo in TIPOS_REAIS or tipo.startswith('DECIMAL')
+
+    def _valor(self, coluna):
+        """Coluna como número (texto não numérico vira nulo, como pd.to_numeric(errors='coerce'))"""
+        return _identificador(coluna) if self._inteira(coluna) else f"TRY_CAST({_identificador(coluna)} AS DOUBLE)"
+
+    def _medida(self, coluna, operacao):
+        """Expressão SQL de uma medida de agregar_multiplas_medidas"""
+        if operacao == 'size':
+            return OPERACOES_SQL['size']
+        if operacao == 'nunique':
+            return OPERACOES_SQL['nunique'].format(c=_identificador(coluna))
+
+        inteira = self._inteira(coluna)
+        valor = self._valor(coluna)
+        quantil = _quantil_da_operacao(operacao)
+        if quantil is not None:
+            return f"quantile_cont({valor}, {quantil})"
+        if operacao not in OPERACOES_SQL:
+            raise ValueError(f"Operação de agregação desconhecida: {operacao}")
+        expressao = OPERACOES_SQL[operacao].format(c=valor)
+        # Somas de colunas inteiras continuam inteiras, como no caminho pandas
+        return f"CAST({expressao} AS BIGINT)" if operacao == 'sum' and inteira else expressao
+
+    def agregar(self, conjuntos_chaves, medidas, filtros=None, ausentes=None):
+        """Mesmo contrato de agregar_multiplas_medidas, em uma consulta com GROUPING SETS (uma varredura)
+
+        ausentes ({coluna: valor}) substitui os nulos dessas chaves pelo valor em
+        vez de descartar as linhas (usado pelo cuboide base do cubo).
+        """
+        conjuntos = _normalizar_conjuntos(conjuntos_chaves)
+        chaves = list(dict.fromkeys(c for conjunto in conjuntos for c in conjunto))
+        selecao = [_identificador(c) for c in chaves]
+        selecao.append(f"GROUPING({', '.join(selecao)}) AS __conjunto")
+        selecao += [f"{self._medida(coluna, operacao)} AS {_identificador(nome)}"
+                    for nome, (coluna, operacao) in medidas.items()]
+        grupos = ', '.join('(' + ', '.join(_identificador(c) for c in conjunto) + ')' for conjunto in conjuntos)
+        tabela = 'dados'
+        if ausentes:
+            substituicoes = ', '.join(f"COALESCE({_identificador(c)}, {_literal(v)}) AS {_identificador(c)}"
+                                      for c, v in ausentes.items())
+            tabela = f"(SELECT * REPLACE ({substituicoes}) FROM dados)"
+        where, parametros = self._filtro(filtros)
+        resultado = self.consultar(
+            f"SELECT {', '.join(selecao)} FROM {tabela}{where} GROUP BY GROUPING SETS ({grupos})", parametros
+        )
+
+        agregados = {}
+        for conjunto in conjuntos:
+            # Bit ligado em GROUPING() = chave fora do conjunto
+            mascara = sum(1 << (len(chaves) - 1 - i) for i, c in enumerate(chaves) if c not in conjunto)
+            parte = resultado[resultado['__conjunto'] == mascara]
+            # Chaves nulas ficam fora, como no groupby
+            parte = parte.dropna(subset=list(conjunto))[list(conjunto) + list(medidas)]
+            agregados[conjunto] = parte.sort_values(list(conjunto), ignore_index=True)
+        return agregados
+
+    def estatisticas(self, coluna):
+        """Total, média, mediana, desvio, mínimo e máximo (contrato de calcular_estatisticas_basicas)"""
+        valor = self._valor(coluna)
+        linha = self.conn.execute(
+            f"SELECT SUM({valor}), AVG({valor}), MEDIAN({valor}), STDDEV_SAMP({valor}), MIN({valor}), MAX({valor}) "
+            f"FROM dados"
+        ).fetchone()
+        return dict(zip(['total', 'media', 'mediana', 'desvio', 'min', 'max'], linha))
+
+    def fechar(self):
+        self.conn.close()
+
+def particionar_parquet(origem, destino, particoes=PARTICOES_PADRAO):
+    """Grava os dados limpos em Parquet particionado (destino/PA_UFMUN=.../PA_CMP=.../*.parquet)
+
+    Os códigos saem padronizados; as colunas derivadas não são gravadas (a
+    visão as recalcula na leitura). As partições são gravadas em uma pasta
+    temporária que substitui o destino inteiro: partições de uma gravação
+    anterior não sobram misturadas às novas. Retorna o número de registros.
+    """
+    destino = os.path.normpath(destino)
+    temporario = f'{destino}.{uuid.uuid4().hex}.tmp'
+    os.makedirs(os.path.dirname(destino) or '.', exist_ok=True)
+    fonte = FonteDuckDB(origem)
+    try:
+        selecao = ', '.join(_expressoes(fonte.brutas, derivadas=False))
+        colunas = ', '.join(_identificador(p) for p in particoes)
+        fonte.conn.execute(
+            f"COPY (SELECT {selecao} FROM brutos) TO {_texto(temporario)} "
+            f"(FORMAT PARQUET, PARTITION_BY ({colunas}), COMPRESSION ZSTD)"
+        )
+        registros = len(fonte)
+    except BaseException:
+        shutil.rmtree(temporario, ignore_errors=True)
+        raise
+    finally:
+        fonte.fechar()
+
+    antigo = f'{destino}.{uuid.uuid4().hex}.old'
+    try:
+        if os.path.exists(destino):
+            os.replace(destino, antigo)
+        os.replace(temporario, destino)
+    except BaseException:
+        # Sem a troca, o destino anterior volta e a pasta temporária é apagada
+        if os.path.exists(antigo) and not os.path.exists(destino):
+            os.replace(antigo, destino)
+        shutil.rmtree(temporario, ignore_errors=True)
+        raise
+    shutil.rmtree(antigo, ignore_errors=True)
+    return registros
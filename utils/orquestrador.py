@@ -0,0 +1,265 @@
+"""Orquestrador de tarefas em DAG com cache de artefatos (extração → limpeza → análises)"""
+
+import ast
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+
+ARQUIVO_ESTADO = '.pipeline_estado.json'
+PASTA_RELATORIOS = 'relatorios'
+
+@dataclass
+class Tarefa:
+    """Etapa do pipeline: um comando com entradas, saídas, código e parâmetros declarados"""
+    nome: str
+    comando: list
+    entradas: list = field(default_factory=list)
+    saidas: list = field(default_factory=list)
+    codigo: list = field(default_factory=list)
+    parametros: dict = field(default_factory=dict)
+    # Função que identifica a versão dos dados de origem (ex.: tabela do banco lida pela extração)
+    fonte: object = None
+
+    @property
+    def relatorio(self):
+        """Arquivo que recebe a saída padrão da tarefa"""
+        return os.path.join(PASTA_RELATORIOS, f'{self.nome}.txt')
+
+def _hash_arquivo(caminho, cache_hashes):
+    """Hash do conteúdo de um arquivo, reaproveitado enquanto tamanho e data não mudarem"""
+    info = os.stat(caminho)
+    assinatura = [info.st_size, info.st_mtime_ns]
+    anterior = cache_hashes.get(caminho)
+    if anterior and anterior['assinatura'] == assinatura:
+        return anterior['hash']
+
+    h = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(1 << 20), b''):
+            h.update(bloco)
+    cache_hashes[caminho] = {'assinatura': assinatura, 'hash': h.hexdigest()}
+    return h.hexdigest()
+
+def _hash_caminho(caminho, cache_hashes):
+    """Hash de um arquivo ou de todos os .py de um diretório"""
+    if os.path.isdir(caminho):
+        arquivos = sorted(
+            os.path.join(raiz, nome)
+            for raiz, _, nomes in os.walk(caminho)
+            for nome in nomes if nome.endswith('.py')
+        )
+        return hashlib.sha256(''.join(_hash_arquivo(a, cache_hashes) for a in arquivos).encode()).hexdigest()
+    return _hash_arquivo(caminho, cache_hashes)
+
+def _arquivos_modulo(partes, raiz):
+    """Arquivos do projeto de um módulo pontuado (pacotes pelo __init__.py); vazio se for externo"""
+    arquivos = []
+    for i in range(1, len(partes) + 1):
+        caminho = os.path.join(raiz, *partes[:i])
+        if os.path.exists(os.path.join(caminho, '__init__.py')):
+            arquivos.append(os.path.join(caminho, '__init__.py'))
+        elif os.path.exists(caminho + '.py'):
+            arquivos.append(caminho + '.py')
+        else:
+            break
+    return arquivos
+
+def dependencias_codigo(*scripts, raiz='.'):
+    """Os scripts e todos os arquivos .py do projeto que eles importam, direta ou indiretamente
+
+    Inclui importações dentro de funções, que o projeto usa para adiar módulos pesados.
+    """
+    pendentes = [os.path.normpath(s) for s in scripts]
+    vistos = set()
+    while pendentes:
+        arquivo = pendentes.pop()
+        if arquivo in vistos or not os.path.exists(arquivo):
+            continue
+        vistos.add(arquivo)
+        with open(arquivo, encoding='utf-8') as f:
+            arvore = ast.parse(f.read(), arquivo)
+        pacote = [p for p in os.path.relpath(os.path.dirname(arquivo) or '.', raiz).split(os.sep) if p != '.']
+        for no in ast.walk(arvore):
+            if isinstance(no, ast.Import):
+                modulos = [alias.name.split('.') for alias in no.names]
+            elif isinstance(no, ast.ImportFrom):
+                base = pacote[:len(pacote) - no.level + 1] if no.level else []
+                modulo = base + (no.module.split('.') if no.module else [])
+                # "from pacote import nome" também pode importar o submódulo nome
+                modulos = [modulo] + [modulo + [alias.name] for alias in no.names]
+            else:
+                continue
+            for partes in modulos:
+                pendentes += [os.path.normpath(a) for a in _arquivos_modulo(partes, raiz)]
+    return sorted(vistos)
+
+class Pipeline:
+    """Conjunto de tarefas ligadas pelas entradas e saídas que declaram"""
+
+    def __init__(self, tarefas, arquivo_estado=ARQUIVO_ESTADO):
+        self.tarefas = {t.nome: t for t in tarefas}
+        self.arquivo_estado = arquivo_estado
+        self.estado = self._ler_estado()
+        # Versão da origem de cada tarefa, consultada uma vez por execução
+        self._fontes = {}
+
+        produtores = {s: t.nome for t in tarefas for s in t.saidas}
+        self.dependencias = {
+            t.nome: sorted({produtores[e] for e in t.entradas if e in produtores})
+            for t in tarefas
+        }
+
+    def _ler_estado(self):
+        """Lê as impressões digitais da última execução"""
+        if os.path.exists(self.arquivo_estado):
+            with open(self.arquivo_estado, encoding='utf-8') as f:
+                return json.load(f)
+        return {'tarefas': {}, 'hashes': {}}
+
+    def _salvar_estado(self):
+        """Grava as impressões digitais das tarefas concluídas"""
+        with open(self.arquivo_estado, 'w', encoding='utf-8') as f:
+            json.dump(self.estado, f, indent=2, ensure_ascii=False)
+
+    def impressao_digital(self, nome):
+        """Hash de entradas, versão do código e parâmetros; None se faltar entrada"""
+        tarefa = self.tarefas[nome]
+        cache = self.estado['hashes']
+        partes = {'comando': tarefa.comando, 'parametros': tarefa.parametros, 'entradas': {}, 'codigo': {}}
+        for caminho in tarefa.entradas:
+            if not os.path.exists(caminho):
+                return None
+            partes['entradas'][caminho] = _hash_caminho(caminho, cache)
+        for caminho in tarefa.codigo:
+            partes['codigo'][caminho] = _hash_caminho(caminho, cache)
+        if tarefa.fonte is not None:
+            if nome not in self._fontes:
+                try:
+                    self._fontes[nome] = tarefa.fonte()
+                except Exception as e:
+                    print(f"Aviso: versão da origem de {nome} indisponível: {e}")
+                    self._fontes[nome] = None
+            if self._fontes[nome] is None:
+                return None
+            partes['fonte'] = self._fontes[nome]
+        return hashlib.sha256(json.dumps(partes, sort_keys=True).encode()).hexdigest()
+
+    def atualizada(self, nome):
+        """Indica se a tarefa pode ser pulada"""
+        tarefa = self.tarefas[nome]
+        if not all(os.path.exists(s) for s in tarefa.saidas + [tarefa.relatorio]):
+            return False
+        digital = self.impressao_digital(nome)
+        return digital is not None and self.estado['tarefas'].get(nome) == digital
+
+    def selecionar(self, alvos=None):
+        """Tarefas necessárias para os alvos (com dependências), em ordem topológica"""
+        pendentes = list(alvos or self.tarefas)
+        escolhidas = set()
+        while pendentes:
+            nome = pendentes.pop()
+            if nome not in self.tarefas:
+                raise ValueError(f"Tarefa desconhecida: {nome}")
+            if nome not in escolhidas:
+                escolhidas.add(nome)
+                pendentes.extend(self.dependencias[nome])
+
+        ordem, visitadas = [], set()
+        def visitar(nome):
+            if nome in visitadas:
+                return
+            visitadas.add(nome)
+            for dep in self.dependencias[nome]:
+                visitar(dep)
+            ordem.append(nome)
+        for nome in sorted(escolhidas):
+            visitar(nome)
+        return ordem
+
+    def planejar(self, alvos=None, forcar=False):
+        """Retorna dict tarefa -> motivo da execução (ou None se estiver atualizada)"""
+        plano = {}
+        for nome in self.selecionar(alvos):
+            if forcar:
+                plano[nome] = 'execução forçada'
+            elif any(plano.get(dep) for dep in self.dependencias[nome]):
+                plano[nome] = 'dependência será recalculada'
+            elif self.impressao_digital(nome) is None:
+                faltando = [e for e in self.tarefas[nome].entradas if not os.path.exists(e)]
+                plano[nome] = f"entrada ausente: {', '.join(faltando)}" if faltando else 'versão da origem indisponível'
+            elif not self.atualizada(nome):
+                plano[nome] = 'entradas, origem, código, parâmetros ou saídas mudaram'
+            else:
+                plano[nome] = None
+        return plano
+
+    def _executar_tarefa(self, nome):
+        """Roda o comando da tarefa gravando a saída padrão no relatório"""
+        tarefa = self.tarefas[nome]
+        os.makedirs(PASTA_RELATORIOS, exist_ok=True)
+        inicio = time.perf_counter()
+        with open(tarefa.relatorio, 'w', encoding='utf-8') as saida:
+            retorno = subprocess.run(tarefa.comando, stdout=saida, stderr=subprocess.STDOUT,
+                                     env={**os.environ, 'PYTHONIOENCODING': 'utf-8'})
+        return retorno.returncode, time.perf_counter() - inicio
+
+    def executar(self, alvos=None, forcar=False, trabalhadores=4, simular=False):
+        """Executa as tarefas desatualizadas, em paralelo quando independentes"""
+        plano = self.planejar(alvos, forcar)
+
+        if simular:
+            for nome, motivo in plano.items():
+                marcador = '↻' if motivo else '✓'
+                print(f"  {marcador} {nome:<30} {motivo or 'atualizada'}")
+            return plano
+
+        resultados = {}
+        pendentes = [n for n in plano if plano[n]]
+        for nome in plano:
+            if not plano[nome]:
+                resultados[nome] = ('atualizada', 0.0)
+                print(f"✓ {nome}: atualizada, pulando")
+
+        with ThreadPoolExecutor(max_workers=trabalhadores) as executor:
+            em_execucao = {}
+            while pendentes or em_execucao:
+                for nome in list(pendentes):
+                    deps = self.dependencias[nome]
+                    if any(resultados.get(d, ('',))[0] in ('erro', 'pulada') for d in deps):
+                        pendentes.remove(nome)
+                        resultados[nome] = ('pulada', 0.0)
+                        print(f"✗ {nome}: pulada (dependência falhou)")
+                    elif all(d in resultados for d in deps):
+                        pendentes.remove(nome)
+                        print(f"→ {nome}: executando")
+                        em_execucao[executor.submit(self._executar_tarefa, nome)] = nome
+
+                if not em_execucao:
+                    break
+                concluidas, _ = wait(em_execucao, return_when=FIRST_COMPLETED)
+                for futuro in concluidas:
+                    nome = em_execucao.pop(futuro)
+                    codigo, segundos = futuro.result()
+                    if codigo == 0:
+                        resultados[nome] = ('executada', segundos)
+                        digital = self.impressao_digital(nome)
+                        if digital:
+                            self.estado['tarefas'][nome] = digital
+                        print(f"✓ {nome}: concluída em {segundos:.1f} s")
+                    else:
+                        resultados[nome] = ('erro', segundos)
+                        self.estado['tarefas'].pop(nome, None)
+                        print(f"✗ {nome}: falhou (veja {self.tarefas[nome].relatorio})")
+                self._salvar_estado()
+
+        self._salvar_estado()
+        return resultados
+
+def comando_python(script, *argumentos):
+    """Comando para rodar um script com o mesmo interpretador"""
+    return [sys.executable, script, *argumentos]
@@ -0,0 +1,100 @@
+"""Valores atípicos por grupo (procedimento, estabelecimento) com estatísticas robustas vetorizadas"""
+
+import numpy as np
+import pandas as pd
+
+from .agregacao import combinar_codigos, ordenar_por_grupo, quantil_ordenado
+
+# Escore robusto acima do qual o registro é atípico (critério de Iglewicz e Hoaglin)
+LIMITE_ESCORE = 3.5
+
+# Grupos com menos registros não têm estatística confiável e não são pontuados
+MINIMO_REGISTROS = 5
+
+def _ids_grupos(df, grupos):
+    """Id compacto do grupo de cada linha e os valores das chaves de cada grupo"""
+    fatorados = [pd.factorize(df[g], sort=True) for g in grupos]
+    ids, codigos = combinar_codigos([f[0] for f in fatorados], [len(f[1]) for f in fatorados])
+    chaves = pd.DataFrame({g: np.asarray(f[1])[c] for g, f, c in zip(grupos, fatorados, codigos)})
+    return ids, chaves
+
+def _estatisticas(ids, valores, n_grupos):
+    """Registros, mediana, quartis e MAD de cada grupo (uma ordenação para os valores e outra para os desvios)"""
+    ordenados, inicios, contagens = ordenar_por_grupo(ids, valores, n_grupos)
+    mediana = quantil_ordenado(ordenados, inicios, contagens, 0.5)
+    q1 = quantil_ordenado(ordenados, inicios, contagens, 0.25)
+    q3 = quantil_ordenado(ordenados, inicios, contagens, 0.75)
+
+    validos = (ids >= 0) & ~np.isnan(valores)
+    desvios = np.full(len(valores), np.nan)
+    desvios[validos] = np.abs(valores[validos] - mediana[ids[validos]])
+    mad = quantil_ordenado(*ordenar_por_grupo(ids, desvios, n_grupos), 0.5)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        desvio_medio = np.bincount(ids[validos], weights=desvios[validos], minlength=n_grupos) / contagens
+    return {'registros': contagens, 'mediana': mediana, 'q1': q1, 'q3': q3,
+            'mad': mad, 'desvio_medio': desvio_medio}
+
+def _escala_robusta(estatisticas):
+    """Escala comparável ao desvio padrão: MAD, ou IQR e desvio médio quando o MAD é zero"""
+    escala = 1.4826 * estatisticas['mad']
+    escala = np.where(escala > 0, escala, (estatisticas['q3'] - estatisticas['q1']) / 1.349)
+    return np.where(escala > 0, escala, 1.2533 * estatisticas['desvio_medio'])
+
+def estatisticas_por_grupo(df, valor, grupos=('PA_PROC_ID',)):
+    """Tabela por grupo com registros, mediana, quartis, MAD e escala robusta do valor"""
+    grupos = [grupos] if isinstance(grupos, str) else list(grupos)
+    ids, chaves = _ids_grupos(df, grupos)
+    valores = pd.to_numeric(df[valor], errors='coerce').to_numpy(dtype=float)
+    estatisticas = _estatisticas(ids, valores, len(chaves))
+    estatisticas['escala'] = _escala_robusta(estatisticas)
+    del estatisticas['desvio_medio']
+    return chaves.assign(**estatisticas)
+
+def pontuar_outliers(df, valor, grupos=('PA_PROC_ID',), limite=LIMITE_ESCORE, minimo=MINIMO_REGISTROS):
+    """Escore robusto de cada registro em relação ao seu grupo
+
+    escore = (valor - mediana do grupo) / escala robusta do grupo. Retorna um
+    DataFrame com o mesmo índice de df e as colunas mediana, escore e outlier;
+    registros de grupos com menos de minimo registros ficam com escore nulo.
+    """
+    grupos = [grupos] if isinstance(grupos, str) else list(grupos)
+    ids, chaves = _ids_grupos(df, grupos)
+    valores = pd.to_numeric(df[valor], errors='coerce').to_numpy(dtype=float)
+    estatisticas = _estatisticas(ids, valores, len(chaves))
+    escala = _escala_robusta(estatisticas)
+
+    # Grupos pequenos ou sem variação não são pontuados
+    pontuavel = (estatisticas['registros'] >= minimo) & (escala > 0)
+    grupo_valido = ids >= 0
+    mediana = np.full(len(df), np.nan)
+    mediana[grupo_valido] = estatisticas['mediana'][ids[grupo_valido]]
+    escore = np.full(len(df), np.nan)
+    linhas = grupo_valido.copy()
+    linhas[grupo_valido] = pontuavel[ids[grupo_valido]]
+    escore[linhas] = (valores[linhas] - mediana[linhas]) / escala[ids[linhas]]
+    return pd.DataFrame({
+        'mediana': mediana,
+        'escore': escore,
+        'outlier': np.abs(np.nan_to_num(escore)) > limite,
+    }, index=df.index)
+
+def resumo_outliers(df, pontuacao, valor, estabelecimento='PA_CODUNI'):
+    """Resumo por estabelecimento: registros pontuados, atípicos, % atípicos, valor atípico e maior escore"""
+    pontuado = pontuacao['escore'].notna()
+    outlier = pontuacao['outlier']
+    valores = pd.to_numeric(df[valor], errors='coerce')
+    resumo = pd.DataFrame({
+        estabelecimento: df[estabelecimento],
+        'registros': pontuado.astype(np.int64),
+        'outliers': outlier.astype(np.int64),
+        'valor_outliers': valores.where(outlier, 0),
+        'escore_maximo': pontuacao['escore'].abs(),
+    }).groupby(estabelecimento, sort=True).agg(
+        registros=('registros', 'sum'),
+        outliers=('outliers', 'sum'),
+        valor_outliers=('valor_outliers', 'sum'),
+        escore_maximo=('escore_maximo', 'max'),
+    ).reset_index()
+    resumo = resumo[resumo['registros'] > 0]
+    resumo.insert(3, 'perc_outliers', resumo['outliers'] / resumo['registros'] * 100)
+    return resumo.reset_index(drop=True)
@@ -0,0 +1,68 @@
+"""Rankings top-k: seleção parcial exata e resumo de itens mais frequentes com memória limitada"""
+
+import numpy as np
+import pandas as pd
+
+def top_k(df, coluna, k):
+    """As k linhas com maior valor na coluna, em ordem decrescente
+
+    Usa seleção parcial (np.argpartition) e ordena apenas as candidatas; empates
+    mantêm a ordem original e valores nulos só entram se faltarem linhas.
+    """
+    valores = pd.to_numeric(df[coluna], errors='coerce').to_numpy(dtype=float)
+    validos = np.flatnonzero(~np.isnan(valores))
+    if k < len(validos):
+        # Limiar do k-ésimo maior; as linhas empatadas no limiar também são candidatas
+        limiar = -np.partition(-valores[validos], k - 1)[k - 1]
+        validos = validos[valores[validos] >= limiar]
+    ordem = validos[np.argsort(-valores[validos], kind='stable')][:k]
+    if len(ordem) < k:
+        ordem = np.concatenate([ordem, np.flatnonzero(np.isnan(valores))[:k - len(ordem)]])
+    return df.iloc[ordem]
+
+class RankingTopK:
+    """Ranking dos k maiores itens sobre uma sequência de agregados parciais (por partição)
+
+    Sem capacidade, os parciais de todos os itens são somados e o resultado é
+    exato. Com capacidade, o resumo guarda no máximo esse número de contadores
+    (resumo mergeável do tipo space-saving / Misra–Gries): cada valor estimado
+    fica entre o valor real menos erro_maximo e o valor real, com
+    erro_maximo <= total / (capacidade + 1).
+    """
+
+    def __init__(self, k, capacidade=None):
+        if capacidade is not None and capacidade < k:
+            raise ValueError("A capacidade deve ser maior ou igual a k")
+        self.k = k
+        self.capacidade = capacidade
+        self.contadores = pd.Series(dtype=float)
+        self.total = 0.0
+        self.erro_maximo = 0.0
+
+    @property
+    def aproximado(self):
+        """Indica se algum contador já foi descontado (resultado aproximado)"""
+        return self.erro_maximo > 0
+
+    def adicionar(self, parcial):
+        """Acrescenta um agregado parcial (Series item -> valor não negativo)"""
+        parcial = parcial[parcial > 0]
+        self.total += float(parcial.sum())
+        self.contadores = self.contadores.add(parcial, fill_value=0)
+
+        excesso = len(self.contadores) - self.capacidade if self.capacidade is not None else 0
+        if excesso > 0:
+            # Desconta de todos o (capacidade + 1)-ésimo maior valor e descarta os que zeram
+            corte = np.partition(self.contadores.to_numpy(), excesso - 1)[excesso - 1]
+            self.contadores = self.contadores - corte
+            self.contadores = self.contadores[self.contadores > 0]
+            self.erro_maximo += corte
+        return self
+
+    def resultado(self):
+        """DataFrame dos k maiores: item, valor e, se aproximado, o limite superior do valor"""
+        tabela = self.contadores.rename('valor').rename_axis('item').reset_index()
+        top = top_k(tabela, 'valor', self.k).reset_index(drop=True)
+        if self.aproximado:
+            top['valor_maximo'] = top['valor'] + self.erro_maximo
+        return top
@@ -0,0 +1,189 @@
+"""Renderização de gráficos em paralelo, com cache por hash da especificação e modo rascunho"""
+
+import functools
+import hashlib
+import importlib
+import inspect
+import json
+import os
+import pickle
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+
+ARQUIVO_MANIFESTO = '.graficos_cache.json'
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Configuração global (pode ser definida por variáveis de ambiente)
+CONFIG = {
+    'rascunho': os.getenv('GRAFICOS_RASCUNHO', '0') == '1',
+    'formato_rascunho': os.getenv('GRAFICOS_FORMATO', 'png'),
+    'dpi_rascunho': int(os.getenv('GRAFICOS_DPI_RASCUNHO', '72')),
+    'trabalhadores': int(os.getenv('GRAFICOS_TRABALHADORES', '0')) or None,
+}
+
+# Fila ativa (None = renderização imediata)
+_fila = None
+
+def configurar_renderizacao(rascunho=None, formato_rascunho=None, dpi_rascunho=None, trabalhadores=None):
+    """Altera a configuração de renderização (modo rascunho, formato, DPI, processos)"""
+    novos = {
+        'rascunho': rascunho,
+        'formato_rascunho': formato_rascunho,
+        'dpi_rascunho': dpi_rascunho,
+        'trabalhadores': trabalhadores,
+    }
+    CONFIG.update({k: v for k, v in novos.items() if v is not None})
+    return dict(CONFIG)
+
+def caminho_saida(caminho):
+    """Caminho final do gráfico (troca a extensão no rascunho em SVG)"""
+    if CONFIG['rascunho'] and CONFIG['formato_rascunho'] != 'png':
+        return os.path.splitext(caminho)[0] + '.' + CONFIG['formato_rascunho']
+    return caminho
+
+def opcoes_savefig(dpi):
+    """Argumentos de savefig conforme o modo (final ou rascunho)"""
+    if CONFIG['rascunho']:
+        return {'dpi': CONFIG['dpi_rascunho']}
+    return {'dpi': dpi, 'bbox_inches': 'tight'}
+
+def _assinatura_config():
+    """Parte da configuração que altera o arquivo gerado"""
+    if CONFIG['rascunho']:
+        return ('rascunho', CONFIG['formato_rascunho'], CONFIG['dpi_rascunho'])
+    return ('final',)
+
+@functools.lru_cache(maxsize=None)
+def _versao_codigo(nome_modulo):
+    """Hash do código-fonte do módulo das funções de gráfico e dos módulos do projeto que ele usa
+
+    Entra no hash da especificação: editar a função de gráfico ou um auxiliar
+    (ex.: salvar_grafico em utils/common.py) invalida os gráficos em cache.
+    """
+    modulo = sys.modules[nome_modulo]
+    pacote = nome_modulo.split('.')[0]
+    nomes = {nome_modulo} | {
+        getattr(objeto, '__module__', None) or getattr(objeto, '__name__', '')
+        for objeto in vars(modulo).values()
+    }
+    digest = hashlib.sha256()
+    for nome in sorted(n for n in nomes if isinstance(n, str) and n.split('.')[0] == pacote):
+        arquivo = getattr(sys.modules.get(nome), '__file__', None)
+        if arquivo and os.path.exists(arquivo):
+            with open(arquivo, 'rb') as f:
+                digest.update(nome.encode() + f.read())
+    return digest.hexdigest()
+
+def _ler_manifesto(pasta):
+    caminho = os.path.join(pasta, ARQUIVO_MANIFESTO)
+    if os.path.exists(caminho):
+        with open(caminho, encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+def _gravar_manifesto(pasta, atualizacoes):
+    manifesto = _ler_manifesto(pasta)
+    manifesto.update(atualizacoes)
+    with open(os.path.join(pasta, ARQUIVO_MANIFESTO), 'w', encoding='utf-8') as f:
+        json.dump(manifesto, f, indent=2, sort_keys=True)
+
+def _em_cache(caminho, hash_espec):
+    """Indica se o arquivo existe e foi gerado a partir da mesma especificação"""
+    pasta, nome = os.path.split(caminho)
+    return os.path.exists(caminho) and _ler_manifesto(pasta or '.').get(nome) == hash_espec
+
+def _registrar(caminho, hash_espec):
+    pasta, nome = os.path.split(caminho)
+    _gravar_manifesto(pasta or '.', {nome: hash_espec})
+
+def _inicializar_trabalhador(raiz, config):
+    """Prepara um processo de renderização: backend Agg e estilo padrão"""
+    import matplotlib
+    matplotlib.use('Agg')
+    if raiz not in sys.path:
+        sys.path.insert(0, raiz)
+    from .common import configurar_estilo_graficos
+    configurar_estilo_graficos()
+    CONFIG.update(config)
+
+def _renderizar_espec(modulo, nome, carga):
+    """Executa a função original de gráfico a partir da especificação serializada"""
+    funcao = getattr(importlib.import_module(modulo), nome).__wrapped__
+    args, kwargs = pickle.loads(carga)
+    funcao(*args, **kwargs)
+
+class FilaGraficos:
+    """Acumula especificações de gráficos para renderizá-las em um pool de processos"""
+
+    def __init__(self, trabalhadores=None):
+        self.trabalhadores = trabalhadores or CONFIG['trabalhadores']
+        self.pendentes = {}
+        self.em_cache = 0
+        self.renderizados = 0
+
+    def adicionar(self, caminho, hash_espec, modulo, nome, carga):
+        # A última especificação para o mesmo arquivo prevalece
+        self.pendentes[caminho] = (hash_espec, modulo, nome, carga)
+
+    def renderizar(self):
+        """Renderiza os gráficos pendentes e retorna o total gerado pela fila"""
+        if not self.pendentes:
+            return self.renderizados
+        pendentes, self.pendentes = self.pendentes, {}
+        with ProcessPoolExecutor(max_workers=self.trabalhadores,
+                                 initializer=_inicializar_trabalhador,
+                                 initargs=(RAIZ, dict(CONFIG))) as executor:
+            futuros = {
+                executor.submit(_renderizar_espec, modulo, nome, carga): (caminho, hash_espec)
+                for caminho, (hash_espec, modulo, nome, carga) in pendentes.items()
+            }
+            for futuro in as_completed(futuros):
+                caminho, hash_espec = futuros[futuro]
+                try:
+                    futuro.result()
+                    _registrar(caminho_saida(caminho), hash_espec)
+                    self.renderizados += 1
+                except Exception as e:
+                    print(f"✗ Erro ao renderizar {caminho}: {e}")
+        return self.renderizados
+
+@contextmanager
+def fila_de_renderizacao(trabalhadores=None):
+    """Enfileira os gráficos criados no bloco e os renderiza em paralelo ao final"""
+    global _fila
+    anterior, _fila = _fila, FilaGraficos(trabalhadores)
+    try:
+        yield _fila
+        _fila.renderizar()
+        print(f"✓ {_fila.renderizados} gráficos renderizados em paralelo, {_fila.em_cache} reaproveitados do cache")
+    finally:
+        _fila = anterior
+
+def renderizavel(funcao):
+    """Decorador das funções criar_grafico_*: cache por especificação e suporte à fila"""
+    assinatura = inspect.signature(funcao)
+
+    @functools.wraps(funcao)
+    def wrapper(*args, **kwargs):
+        caminho = assinatura.bind(*args, **kwargs).arguments['output_path']
+        carga = pickle.dumps((args, kwargs), protocol=pickle.HIGHEST_PROTOCOL)
+        hash_espec = hashlib.sha256(
+            pickle.dumps((funcao.__module__, funcao.__qualname__, _versao_codigo(funcao.__module__),
+                          _assinatura_config())) + carga
+        ).hexdigest()
+
+        if _em_cache(caminho_saida(caminho), hash_espec):
+            if _fila is not None:
+                _fila.em_cache += 1
+            print(f"✓ Gráfico em cache: {caminho_saida(caminho)}")
+            return
+
+        if _fila is not None:
+            _fila.adicionar(caminho, hash_espec, funcao.__module__, funcao.__name__, carga)
+            return
+
+        funcao(*args, **kwargs)
+        _registrar(caminho_saida(caminho), hash_espec)
+
+    return wrapper
@@ -0,0 +1,145 @@
+"""Sessão compartilhada: carrega e prepara os dados uma única vez para várias análises"""
+
+import os
+
+from .data_loader import (carregar_csv, carregar_csv_em_blocos, carregar_procedimentos, carregar_municipios,
+                          carregar_estabelecimentos, carregar_cids, carregar_dim_tempo)
+from .data_processor import padronizar_codigo, preparar_competencia
+from .cubo import CuboPARS, ARQUIVO_MANIFESTO_CUBO, MEDIDAS_CUBO, VERSAO_CUBO, assinatura_arquivo, pasta_cubo
+from .classificacao import carregar_classificador
+from .dicionarios import carregar_dicionarios
+from .memoria import csv_cabe_no_orcamento, linhas_por_bloco
+from .monetario import adicionar_centavos
+
+# Motores das agregações: pandas (dados em memória) ou duckdb (SQL sobre os arquivos, utils.motor_duckdb)
+MOTORES = ('pandas', 'duckdb')
+
+# Colunas de código e o tamanho padronizado de cada uma (também usado pelo motor DuckDB)
+CODIGOS_PADRONIZADOS = {
+    'PA_PROC_ID': 10,
+    'PA_CODUNI': 7,
+    'PA_MUNPCN': 6,
+    'PA_UFMUN': 6,
+}
+
+class SessaoAnalise:
+    """Mantém dados e tabelas auxiliares já preparados para várias análises"""
+
+    def __init__(self, caminho='dados_limpos.csv', codigo_municipio='431020', nome_municipio='Ijuí',
+                 motor=None, particoes=None):
+        self.caminho = caminho
+        self.codigo_municipio = codigo_municipio
+        self.nome_municipio = nome_municipio
+        self.motor = (motor or os.getenv('MOTOR_ANALISES', 'pandas')).strip().lower()
+        if self.motor not in MOTORES:
+            raise ValueError(f"Motor de análise inválido: {self.motor} (use {', '.join(MOTORES)})")
+        # Parquet particionado (particionar_dados.py) lido pelo motor duckdb no lugar do CSV
+        self.particoes = particoes
+        self._cache = {}
+
+    def _obter(self, chave, carregar):
+        """Carrega um item apenas na primeira vez em que é pedido"""
+        if chave not in self._cache:
+            self._cache[chave] = carregar()
+        return self._cache[chave]
+
+    @staticmethod
+    def _preparar(df):
+        """Padroniza os códigos e prepara a competência"""
+        for coluna, tamanho in CODIGOS_PADRONIZADOS.items():
+            if coluna in df.columns:
+                df = padronizar_codigo(df, coluna, tamanho=tamanho)
+        return preparar_competencia(adicionar_centavos(df))
+
+    def _preparar_dados(self, caminho):
+        """Carrega o CSV, padroniza os códigos e prepara a competência"""
+        return self._preparar(carregar_csv(caminho))
+
+    def dados(self, caminho=None):
+        """Retorna os dados preparados (cópia rasa, as análises podem criar colunas)"""
+        caminho = caminho or self.caminho
+        df = self._obter(('dados', caminho), lambda: self._preparar_dados(caminho))
+        return df.copy(deep=False)
+
+    def fonte(self):
+        """Dados limpos no motor DuckDB (CSV ou partições), para agregações em SQL"""
+        from .motor_duckdb import FonteDuckDB
+        return self._obter('fonte', lambda: FonteDuckDB(self.particoes or self.caminho))
+
+    def tabela(self):
+        """Dados para as agregações no motor configurado: fonte DuckDB ou DataFrame"""
+        return self.fonte() if self.motor == 'duckdb' else self.dados()
+
+    def procedimentos(self):
+        """Tabela de procedimentos (tb_sigtaw)"""
+        return self._obter('procedimentos', carregar_procedimentos)
+
+    def municipios(self):
+        """Tabela de municípios"""
+        return self._obter('municipios', carregar_municipios)
+
+    def estabelecimentos(self):
+        """Tabela de estabelecimentos (CNES)"""
+        return self._obter('estabelecimentos', carregar_estabelecimentos)
+
+    def cids(self):
+        """Tabela de CIDs"""
+        return self._obter('cids', carregar_cids)
+
+    def dim_tempo(self):
+        """Dimensão tempo"""
+        return self._obter('dim_tempo', carregar_dim_tempo)
+
+    def descricoes_procedimentos(self):
+        """Descrição dos procedimentos indexada pelo código padronizado"""
+        def indexar():
+            df_proc = self.procedimentos()
+            if df_proc.empty:
+                return df_proc.reindex(columns=['ip_cod_padrao', 'ip_dscr']).set_index('ip_cod_padrao')['ip_dscr']
+            return df_proc.drop_duplicates('ip_cod_padrao').set_index('ip_cod_padrao')['ip_dscr']
+        return self._obter('descricoes_procedimentos', indexar)
+
+    def areas(self):
+        """Classificador de procedimentos em áreas clínicas (tabela persistida)"""
+        return self._obter('areas', lambda: carregar_classificador(self.procedimentos()))
+
+    def dicionarios(self):
+        """Dicionários globais de códigos por domínio (procedimento, CID, CNES, município)"""
+        return self._obter('dicionarios', carregar_dicionarios)
+
+    def construir_cubo(self, origem=None):
+        """Constrói o cubo dos dados em memória ou, se o CSV não couber no orçamento de memória, em blocos"""
+        if self.motor == 'pandas' and ('dados', self.caminho) not in self._cache:
+            cabe, bytes_linha = csv_cabe_no_orcamento(self.caminho)
+            if not cabe:
+                blocos = carregar_csv_em_blocos(self.caminho, linhas_por_bloco(bytes_linha))
+                return CuboPARS.construir_em_blocos((self._preparar(b) for b in blocos), origem=origem)
+        return CuboPARS.construir(self.tabela(), origem=origem)
+
+    def cubo(self):
+        """Cubo de medidas da PARS: lido do disco se estiver atualizado, senão construído e gravado
+
+        Um cubo com atualizações incrementais (construir_cubo.py --nova-competencia)
+        vale enquanto o arquivo base e cada arquivo incremental não mudarem. Se
+        ficar desatualizado, o cubo só do arquivo base é gravado em outra pasta,
+        sem sobrescrever o incremental.
+        """
+        def obter():
+            pasta = pasta_cubo(self.caminho)
+            pasta_base = pasta + '__base'
+            origem = assinatura_arquivo(self.caminho)
+            destino = pasta
+            for candidata in (pasta, pasta_base):
+                if not os.path.exists(os.path.join(candidata, ARQUIVO_MANIFESTO_CUBO)):
+                    continue
+                cubo = CuboPARS.carregar(candidata)
+                # Cubos gravados antes de novas medidas ou de outro layout também são reconstruídos
+                if (cubo.versao == VERSAO_CUBO and cubo.corresponde(origem)
+                        and set(MEDIDAS_CUBO) <= set(cubo.cuboides[cubo.base].columns)):
+                    return cubo
+                if candidata == pasta and (cubo.origem or {}).get('atualizacoes'):
+                    destino = pasta_base
+            cubo = self.construir_cubo(origem)
+            cubo.salvar(destino)
+            return cubo
+        return self._obter('cubo', obter)
@@ -0,0 +1,260 @@
+"""Gerador determinístico de registros no formato da PARS e das tabelas de dimensão, para testes em escala"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+# Municípios reais usados pelas análises; os demais recebem códigos sintéticos
+MUNICIPIOS_REAIS = {'431020': 'Ijuí', '431720': 'Santa Rosa', '430610': 'Cruz Alta'}
+
+# Prefixos de UF usados quando os municípios sintéticos não cabem no RS
+PREFIXOS_UF = [43, 42, 41, 35, 33, 31, 29, 26, 23, 52, 53, 50, 51, 15, 13, 21, 22, 24, 25, 27, 28, 32, 11, 12, 14, 16, 17]
+
+# Grupo SIGTAP -> (participação nos registros ambulatoriais, valor unitário mediano em R$, termos das descrições)
+PERFIL_GRUPOS = {
+    '01': (0.10, 5.0, ['ATIVIDADE EDUCATIVA', 'VACINACAO', 'VISITA DOMICILIAR', 'ACOES PREVENTIVAS']),
+    '02': (0.35, 15.0, ['EXAME', 'DOSAGEM', 'ULTRASSONOGRAFIA', 'TOMOGRAFIA', 'ELETROCARDIOGRAMA', 'ECOCARDIOGRAFIA']),
+    '03': (0.40, 20.0, ['CONSULTA MEDICA', 'ATENDIMENTO', 'ACOMPANHAMENTO', 'QUIMIOTERAPIA', 'RADIOTERAPIA',
+                        'ATENDIMENTO PSICOSSOCIAL', 'SESSAO DE PSICOTERAPIA', 'TRATAMENTO']),
+    '04': (0.05, 250.0, ['CIRURGIA', 'EXCISAO', 'BIOPSIA', 'ANGIOPLASTIA CORONARIANA', 'RESSECCAO DE TUMOR']),
+    '05': (0.005, 800.0, ['TRANSPLANTE', 'ACOMPANHAMENTO POS-TRANSPLANTE']),
+    '06': (0.02, 60.0, ['MEDICAMENTO', 'ANTINEOPLASICO']),
+    '07': (0.02, 400.0, ['ORTESE', 'PROTESE', 'STENT VASCULAR', 'MATERIAL ESPECIAL']),
+    '08': (0.055, 8.0, ['DIARIA', 'AJUDA DE CUSTO', 'TRATAMENTO FORA DE DOMICILIO']),
+}
+
+COMPLEMENTOS_DESCRICAO = ['EM ADULTO', 'EM CRIANCA', 'EM ATENCAO ESPECIALIZADA', 'DE MAMA', 'DE PROSTATA',
+                          'CARDIOVASCULAR', 'EM SAUDE MENTAL', 'DO SISTEMA NERVOSO', 'POR PROCEDIMENTO']
+
+MESES = ['Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho', 'Julho', 'Agosto',
+         'Setembro', 'Outubro', 'Novembro', 'Dezembro']
+
+# Colunas da PARS geradas, na ordem do arquivo extraído
+COLUNAS_PARS = ['PA_CODUNI', 'PA_GESTAO', 'PA_UFMUN', 'PA_TPUPS', 'PA_MVM', 'PA_CMP', 'PA_PROC_ID',
+                'PA_CBOCOD', 'PA_CIDPRI', 'PA_CATEND', 'PA_IDADE', 'PA_SEXO', 'PA_RACACOR', 'PA_MUNPCN',
+                'PA_QTDPRO', 'PA_QTDAPR', 'PA_VALPRO', 'PA_VALAPR', 'PA_INE']
+
+def _pesos_zipf(n, expoente, rng):
+    """Pesos de Zipf (rank^-expoente) em ordem aleatória, normalizados"""
+    pesos = 1.0 / np.arange(1, n + 1) ** expoente
+    return rng.permutation(pesos / pesos.sum())
+
+def _acumulado_por_grupo(grupos, pesos):
+    """Probabilidade acumulada dentro de cada grupo, deslocada pelo índice do grupo
+
+    Com os itens ordenados por grupo, sortear um item do grupo g é um único
+    searchsorted(acumulado, g + u) com u uniforme em [0, 1).
+    """
+    soma_grupo = np.bincount(grupos, weights=pesos)
+    acumulado = np.cumsum(pesos / soma_grupo[grupos])
+    inicio = np.searchsorted(grupos, grupos)
+    acumulado = acumulado - np.where(inicio > 0, acumulado[inicio - 1], 0.0)
+    # O último item de cada grupo fecha exatamente em g + 1
+    ultimo = np.r_[np.flatnonzero(np.diff(grupos)), len(grupos) - 1]
+    acumulado[ultimo] = 1.0
+    return grupos + acumulado
+
+def _sortear_no_grupo(rng, acumulado, grupos_registros):
+    """Índice do item sorteado, para cada registro, dentro do grupo informado"""
+    u = rng.random(len(grupos_registros))
+    return np.minimum(np.searchsorted(acumulado, grupos_registros + u, side='right'), len(acumulado) - 1)
+
+class GeradorPARS:
+    """Gera registros da PARS e tabelas de dimensão coerentes entre si
+
+    O catálogo (municípios, procedimentos, estabelecimentos, CIDs) depende só
+    da semente; cada bloco de registros usa um gerador próprio derivado de
+    (semente, índice do bloco), então a mesma semente e o mesmo tamanho de
+    bloco produzem sempre os mesmos arquivos, em qualquer escala.
+    """
+
+    def __init__(self, municipios=3, inicio=202501, fim=202512, procedimentos=4000,
+                 estabelecimentos=40, cids=1500, semente=42):
+        rng = np.random.default_rng(semente)
+        self.semente = semente
+        self.competencias = self._competencias(inicio, fim)
+        self._criar_municipios(rng, municipios)
+        self._criar_procedimentos(rng, procedimentos)
+        self._criar_estabelecimentos(rng, estabelecimentos)
+        self._criar_cids(rng, cids)
+
+    @staticmethod
+    def _competencias(inicio, fim):
+        """Competências AAAAMM entre inicio e fim (inclusive)"""
+        meses = pd.period_range(pd.Period(str(inicio), 'M'), pd.Period(str(fim), 'M'), freq='M')
+        return np.array([p.year * 100 + p.month for p in meses], dtype=np.int64)
+
+    def _criar_municipios(self, rng, n):
+        """Municípios com população de cauda longa (Pareto); os reais vêm primeiro"""
+        codigos = list(MUNICIPIOS_REAIS)[:n]
+        nomes = [MUNICIPIOS_REAIS[c] for c in codigos]
+        for i in range(n - len(codigos)):
+            uf = PREFIXOS_UF[(i // 990) % len(PREFIXOS_UF)]
+            codigos.append(f'{uf * 10000 + (i % 990) * 10 + 5:06d}')
+            nomes.append(f'Município Sintético {i + 1:04d}')
+        peso = rng.pareto(1.2, n) + 1
+        self.municipios = pd.DataFrame({'co_municip': codigos, 'ds_nome': nomes, 'peso': peso / peso.sum()})
+
+    def _criar_procedimentos(self, rng, n):
+        """Códigos SIGTAP de 10 dígitos com frequência de Zipf dentro de cada grupo e preço lognormal"""
+        grupos = list(PERFIL_GRUPOS)
+        participacao = np.array([PERFIL_GRUPOS[g][0] for g in grupos])
+        grupo = np.sort(rng.choice(len(grupos), n, p=participacao / participacao.sum()))
+        codigo = ((grupo + 1) * 10 ** 8 + rng.integers(1, 10, n) * 10 ** 6 + rng.integers(1, 10, n) * 10 ** 4
+                  + rng.integers(1, 1000, n) * 10 + rng.integers(0, 10, n))
+        codigo, unicos = np.unique(codigo, return_index=True)
+        grupo = grupo[unicos]
+
+        mediana = np.array([PERFIL_GRUPOS[g][1] for g in grupos])[grupo]
+        termos = [PERFIL_GRUPOS[grupos[g]][2] for g in grupo]
+        descricoes = [f'{t[rng.integers(len(t))]} {COMPLEMENTOS_DESCRICAO[rng.integers(len(COMPLEMENTOS_DESCRICAO))]}'
+                      for t in termos]
+        self.procedimentos = pd.DataFrame({
+            'ip_cod': [f'{c:010d}' for c in codigo],
+            'ip_dscr': descricoes,
+            'preco': np.round(mediana * rng.lognormal(0, 0.9, len(codigo)), 2),
+        })
+        # Grupos sem procedimento no catálogo não são sorteados
+        participacao = np.where(np.bincount(grupo, minlength=len(grupos)) > 0, participacao, 0)
+        self._prob_grupos = participacao / participacao.sum()
+        self._acumulado_proc = _acumulado_por_grupo(grupo, _pesos_zipf(len(codigo), 1.1, rng))
+
+    def _criar_estabelecimentos(self, rng, media_por_municipio):
+        """Estabelecimentos (CNES de 7 dígitos) proporcionais à população, com volume de Zipf"""
+        n_mun = len(self.municipios)
+        quantidade = np.maximum(1, np.rint(self.municipios['peso'] * n_mun * media_por_municipio)).astype(np.int64)
+        municipio = np.repeat(np.arange(n_mun), quantidade)
+        cnes = 1_000_000 + rng.choice(9_000_000, len(municipio), replace=False)
+        self.estabelecimentos = pd.DataFrame({
+            'cnes': [f'{c:07d}' for c in cnes],
+            'fantasia': [f'UNIDADE DE SAUDE {i + 1:05d}' for i in range(len(municipio))],
+            'raz_soci': [f'ESTABELECIMENTO SINTETICO {i + 1:05d}' for i in range(len(municipio))],
+            'codufmun': self.municipios['co_municip'].to_numpy()[municipio],
+            'bairro': rng.choice(['CENTRO', 'NORTE', 'SUL', 'LESTE', 'OESTE'], len(municipio)),
+        })
+        self._acumulado_estab = _acumulado_por_grupo(municipio, _pesos_zipf(len(municipio), 1.0, rng))
+
+    def _criar_cids(self, rng, n):
+        """CIDs (letra + 3 dígitos) com frequência de Zipf; '0000' é o CID não informado"""
+        letras = np.array(list('ABCDEFGHIJKLMNOPQRSTVZ'))
+        codigos = pd.unique(pd.Series(rng.choice(letras, n * 2)) + pd.Series(rng.integers(0, 1000, n * 2)).map('{:03d}'.format))[:n]
+        self.cids = pd.DataFrame({'cd_cod': codigos, 'cd_descr': [f'DIAGNOSTICO {c}' for c in codigos]})
+        self._peso_cids = _pesos_zipf(len(codigos), 1.2, rng)
+
+    def bloco(self, n, indice=0):
+        """Gera n registros brutos da PARS (com duplicatas, idades inválidas e nulos, como a extração)"""
+        rng = np.random.default_rng([self.semente, indice])
+        n_mun = len(self.municipios)
+
+        municipio = rng.choice(n_mun, n, p=self.municipios['peso'])
+        estab = _sortear_no_grupo(rng, self._acumulado_estab, municipio)
+        grupo = rng.choice(len(self._prob_grupos), n, p=self._prob_grupos)
+        proc = _sortear_no_grupo(rng, self._acumulado_proc, grupo)
+
+        # Competências com leve crescimento ao longo do período
+        tendencia = 1 + 0.01 * np.arange(len(self.competencias))
+        competencia = self.competencias[rng.choice(len(self.competencias), n, p=tendencia / tendencia.sum())]
+
+        # Origem: a maioria reside no município de atendimento; os demais vêm em proporção à população
+        local = rng.random(n) < 0.8
+        origem = np.where(local, municipio, rng.choice(n_mun, n, p=self.municipios['peso']))
+
+        # Idade: crianças e distribuição adulta concentrada entre 40 e 70 anos
+        crianca = rng.random(n) < 0.15
+        idade = np.where(crianca, np.abs(rng.normal(6, 4, n)), rng.beta(2.4, 1.9, n) * 100)
+        idade = np.clip(np.rint(idade), 0, 110).astype(np.int64)
+        idade[rng.random(n) < 0.0005] = 999
+
+        qtd_produzida = rng.geometric(0.7, n)
+        glosa = rng.random(n) < 0.05
+        qtd_aprovada = np.where(glosa, rng.binomial(qtd_produzida, 0.5), qtd_produzida)
+        preco = self.procedimentos['preco'].to_numpy()[proc]
+
+        com_cid = rng.random(n) < 0.6
+        cid = np.where(com_cid, self.cids['cd_cod'].to_numpy()[rng.choice(len(self.cids), n, p=self._peso_cids)], '0000')
+
+        codigos_mun = self.municipios['co_municip'].to_numpy()
+        ine = pd.array(rng.integers(1_000_000, 9_999_999, n), dtype='Int64')
+        ine[rng.random(n) < 0.9] = pd.NA
+        cbo = rng.choice(['225125', '225142', '223505', '251510', '322205'], n).astype(object)
+        cbo[rng.random(n) < 0.03] = None
+
+        df = pd.DataFrame({
+            'PA_CODUNI': self.estabelecimentos['cnes'].to_numpy()[estab],
+            'PA_GESTAO': np.where(rng.random(n) < 0.7, codigos_mun[municipio], '430000'),
+            'PA_UFMUN': codigos_mun[municipio],
+            'PA_TPUPS': rng.choice([1, 2, 4, 5, 36, 39, 70], n),
+            'PA_MVM': competencia,
+            'PA_CMP': competencia,
+            'PA_PROC_ID': self.procedimentos['ip_cod'].to_numpy()[proc],
+            'PA_CBOCOD': cbo,
+            'PA_CIDPRI': cid,
+            'PA_CATEND': rng.choice(['01', '02', '03', '04', '05', '06'], n, p=[0.75, 0.1, 0.05, 0.04, 0.03, 0.03]),
+            'PA_IDADE': idade,
+            'PA_SEXO': rng.choice(['F', 'M', '0'], n, p=[0.57, 0.42, 0.01]),
+            'PA_RACACOR': rng.choice(['01', '02', '03', '04', '05', '99'], n, p=[0.7, 0.06, 0.18, 0.01, 0.01, 0.04]),
+            'PA_MUNPCN': codigos_mun[origem],
+            'PA_QTDPRO': qtd_produzida,
+            'PA_QTDAPR': qtd_aprovada,
+            'PA_VALPRO': np.round(preco * qtd_produzida, 2),
+            'PA_VALAPR': np.round(preco * qtd_aprovada, 2),
+            'PA_INE': ine,
+        }, columns=COLUNAS_PARS)
+
+        # Uma pequena fração de linhas repetidas, como na extração real
+        duplicadas = np.flatnonzero(rng.random(n) < 0.001)
+        return pd.concat([df, df.iloc[duplicadas]], ignore_index=True) if len(duplicadas) else df
+
+    def blocos(self, registros, tamanho_bloco=1_000_000):
+        """Gera os registros em blocos de até tamanho_bloco linhas"""
+        for indice, inicio in enumerate(range(0, registros, tamanho_bloco)):
+            yield self.bloco(min(tamanho_bloco, registros - inicio), indice)
+
+    def dimensoes(self):
+        """Tabelas de dimensão com as colunas lidas por utils.data_loader"""
+        competencias = pd.Series(self.competencias)
+        ano, mes = competencias // 100, competencias % 100
+        trimestre = (mes - 1) // 3 + 1
+        return {
+            'tb_sigtaw': self.procedimentos[['ip_cod', 'ip_dscr']],
+            'tb_municip': self.municipios[['co_municip', 'ds_nome']].assign(co_status='ATIVO'),
+            'cadgerrs': self.estabelecimentos.assign(excluido=0),
+            's_cid': self.cids,
+            'dimtempo': pd.DataFrame({
+                'Id': np.arange(1, len(competencias) + 1),
+                'mes': mes,
+                'mesext': [MESES[m - 1] for m in mes],
+                'ano': ano,
+                'anomes': competencias,
+                'MAExt': [f'{MESES[m - 1]}/{a}' for a, m in zip(ano, mes)],
+                'trimestre': trimestre,
+                'triex_t': [f'{t}º Trimestre' for t in trimestre],
+                'anotri': ano * 10 + trimestre,
+            }),
+        }
+
+    def gravar(self, pasta, registros, tamanho_bloco=1_000_000, particionar=False):
+        """Grava as dimensões (pasta/dimensoes/*.csv) e os registros em CSV, bloco a bloco
+
+        Sem particionar, os registros vão para pasta/dados_pars.csv (o arquivo da
+        extração); com particionar, um dados_pars_<municipio>.csv por município.
+        Retorna {arquivo: linhas gravadas}.
+        """
+        pasta_dimensoes = os.path.join(pasta, 'dimensoes')
+        os.makedirs(pasta_dimensoes, exist_ok=True)
+        for nome, tabela in self.dimensoes().items():
+            tabela.to_csv(os.path.join(pasta_dimensoes, f'{nome}.csv'), index=False)
+
+        linhas = {}
+        for bloco in self.blocos(registros, tamanho_bloco):
+            partes = bloco.groupby('PA_UFMUN', sort=True) if particionar else [(None, bloco)]
+            for municipio, parte in partes:
+                nome = f'dados_pars_{municipio}.csv' if particionar else 'dados_pars.csv'
+                caminho = os.path.join(pasta, nome)
+                # Cabeçalho (e BOM, como na extração) só na primeira escrita de cada arquivo
+                primeiro = caminho not in linhas
+                parte.to_csv(caminho, index=False, mode='w' if primeiro else 'a', header=primeiro,
+                             encoding='utf-8-sig' if primeiro else 'utf-8')
+                linhas[caminho] = linhas.get(caminho, 0) + len(parte)
+        return linhas
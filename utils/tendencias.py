@@ -0,0 +1,125 @@
+"""Tendências e taxas de crescimento de várias séries ao mesmo tempo (matriz período × série)"""
+
+import numpy as np
+import pandas as pd
+
+def matriz_series(df, periodo, serie, valor):
+    """Matriz larga período × série (uma coluna por município, procedimento, estabelecimento...)"""
+    return df.pivot_table(index=periodo, columns=serie, values=valor, aggfunc='sum', observed=True).sort_index()
+
+def _meses(indice):
+    """Índice de competências como PeriodIndex mensal (None se não for um índice de meses)"""
+    if isinstance(indice, pd.PeriodIndex):
+        return indice.asfreq('M')
+    if isinstance(indice, pd.DatetimeIndex):
+        return indice.to_period('M')
+    # Texto ou número AAAAMM / AAAA-MM
+    datas = pd.to_datetime(pd.Index(indice).astype(str).str.replace('-', '', regex=False),
+                           format='%Y%m', errors='coerce')
+    if len(indice) == 0 or datas.isna().any():
+        return None
+    return datas.to_period('M')
+
+def completar_meses(matriz):
+    """Reindexa a matriz em todos os meses entre a primeira e a última competência (NaN nos meses ausentes)
+
+    O índice volta no formato original (AAAA-MM, AAAAMM, datas ou períodos).
+    Índices que não são de meses ficam como estão.
+    """
+    meses = _meses(matriz.index)
+    if meses is None:
+        return matriz
+    completo = pd.period_range(meses.min(), meses.max(), freq='M')
+    resultado = matriz.set_axis(meses).reindex(completo)
+    indice = matriz.index
+    if isinstance(indice, pd.PeriodIndex):
+        novo = completo
+    elif isinstance(indice, pd.DatetimeIndex):
+        novo = completo.to_timestamp()
+    elif pd.api.types.is_integer_dtype(indice):
+        novo = pd.Index(completo.strftime('%Y%m').astype(np.int64))
+    else:
+        formato = '%Y-%m' if str(indice[0])[4:5] == '-' else '%Y%m'
+        novo = pd.Index(completo.strftime(formato))
+    return resultado.set_axis(novo.rename(indice.name))
+
+def variacao(matriz, defasagem=1):
+    """Variação percentual em relação a defasagem meses antes (1 = mês a mês, 12 = ano a ano)
+
+    A defasagem é contada em meses do calendário: competências ausentes viram NaN
+    antes do deslocamento, em vez de deslocar a série por linhas.
+    """
+    matriz = completar_meses(matriz)
+    valores = matriz.to_numpy(dtype=float)
+    anterior = np.full_like(valores, np.nan)
+    if defasagem < len(valores):
+        anterior[defasagem:] = valores[:-defasagem]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        resultado = np.where(anterior > 0, (valores / anterior - 1) * 100, np.nan)
+    return pd.DataFrame(resultado, index=matriz.index, columns=matriz.columns)
+
+def media_movel(matriz, janela=3):
+    """Média móvel dos últimos janela períodos (NaN enquanto a janela não estiver completa)"""
+    return matriz.astype(float).rolling(janela).mean()
+
+def _primeiro_ultimo_validos(valores):
+    """Índices do primeiro e do último valor não nulo de cada coluna"""
+    validos = ~np.isnan(valores)
+    primeiro = validos.argmax(axis=0)
+    ultimo = len(valores) - 1 - validos[::-1].argmax(axis=0)
+    return primeiro, ultimo, validos.sum(axis=0)
+
+def _inclinacao(valores):
+    """Inclinação de mínimos quadrados de cada coluna (valores por período), ignorando nulos"""
+    validos = ~np.isnan(valores)
+    x = np.arange(len(valores), dtype=float)[:, None] * validos
+    y = np.where(validos, valores, 0.0)
+    n = validos.sum(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        media_x = x.sum(axis=0) / n
+        media_y = y.sum(axis=0) / n
+        covariancia = (x * y).sum(axis=0) - n * media_x * media_y
+        variancia = (x * x).sum(axis=0) - n * media_x ** 2
+        return np.where(n >= 2, covariancia / variancia, np.nan)
+
+def calcular_tendencias(matriz, janela=3, periodos_por_ano=12):
+    """Tabela de tendências com uma linha por série
+
+    Colunas: primeiro e último valor, crescimento absoluto e percentual,
+    variação do último período (mês a mês e ano a ano), CAGR, média móvel
+    final e inclinação de mínimos quadrados (absoluta e em % da média).
+    Competências ausentes contam como meses sem dado (CAGR, variação anual e
+    inclinação usam a distância em meses do calendário).
+    """
+    matriz = completar_meses(matriz)
+    valores = matriz.to_numpy(dtype=float)
+    colunas = np.arange(valores.shape[1])
+    primeiro_idx, ultimo_idx, n = _primeiro_ultimo_validos(valores)
+    primeiro = valores[primeiro_idx, colunas]
+    ultimo = valores[ultimo_idx, colunas]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        crescimento_perc = np.where(primeiro > 0, (ultimo / primeiro - 1) * 100, 0.0)
+        anos = (ultimo_idx - primeiro_idx) / periodos_por_ano
+        cagr = np.where((primeiro > 0) & (anos > 0), ((ultimo / primeiro) ** (1 / anos) - 1) * 100, np.nan)
+        inclinacao = _inclinacao(valores)
+        inclinacao_perc = inclinacao / (np.nansum(valores, axis=0) / n) * 100
+
+    def ultima_linha(tabela):
+        return tabela.to_numpy()[ultimo_idx, colunas]
+
+    resultado = pd.DataFrame({
+        'periodos': n,
+        'primeiro': primeiro,
+        'ultimo': ultimo,
+        'crescimento_abs': ultimo - primeiro,
+        'crescimento_perc': crescimento_perc,
+        'variacao_mensal': ultima_linha(variacao(matriz, 1)),
+        'variacao_anual': ultima_linha(variacao(matriz, periodos_por_ano)),
+        'cagr': cagr,
+        'media_movel': ultima_linha(media_movel(matriz, janela)),
+        'inclinacao': inclinacao,
+        'inclinacao_perc': inclinacao_perc,
+    }, index=matriz.columns)
+    # Séries com menos de dois períodos não têm tendência
+    return resultado[resultado['periodos'] >= 2]
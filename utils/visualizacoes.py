@@ -1,12 +1,16 @@
 """Funções para criar visualizações padronizadas"""
 
-import matplotlib.pyplot as plt
 import pandas as pd
-from .common import salvar_grafico
+from .common import pyplot, salvar_grafico
+from .renderizacao import renderizavel
+from .instrumentacao import instrumentar
 
+@renderizavel
+@instrumentar('grafico')
 def criar_grafico_barras_horizontal(dados, labels, titulo, xlabel, output_path, 
                                     color='#3498db', mostrar_valores=True, figsize=(14, 10)):
     """Cria gráfico de barras horizontal padronizado"""
+    plt = pyplot()
     plt.figure(figsize=figsize)
     y_pos = range(len(dados))
     
@@ -22,9 +26,12 @@ def criar_grafico_barras_horizontal(dados, labels, titulo, xlabel, output_path,
     
     salvar_grafico(output_path)
 
+@renderizavel
+@instrumentar('grafico')
 def criar_grafico_barras_vertical(categorias, valores, titulo, ylabel, output_path,
                                   color='#3498db', mostrar_valores=True, figsize=(12, 6)):
     """Cria gráfico de barras vertical"""
+    plt = pyplot()
     plt.figure(figsize=figsize)
     x_pos = range(len(categorias))
     
@@ -43,10 +50,13 @@ def criar_grafico_barras_vertical(categorias, valores, titulo, ylabel, output_pa
     
     salvar_grafico(output_path)
 
+@renderizavel
+@instrumentar('grafico')
 def criar_grafico_barras_agrupadas(categorias, valores1, valores2, 
                                    label1, label2, titulo, output_path,
                                    color1='#3498db', color2='#2ecc71', figsize=(12, 6)):
     """Cria gráfico de barras agrupadas"""
+    plt = pyplot()
     plt.figure(figsize=figsize)
     x = range(len(categorias))
     width = 0.35
@@ -65,9 +75,12 @@ def criar_grafico_barras_agrupadas(categorias, valores1, valores2,
     
     salvar_grafico(output_path)
 
+@renderizavel
+@instrumentar('grafico')
 def criar_grafico_pizza(valores, labels, titulo, output_path, 
                        colors=None, explode=None, figsize=(10, 8)):
     """Cria gráfico de pizza padronizado"""
+    plt = pyplot()
     plt.figure(figsize=figsize)
     
     if colors is None:
@@ -80,10 +93,13 @@ def criar_grafico_pizza(valores, labels, titulo, output_path,
     
     salvar_grafico(output_path)
 
+@renderizavel
+@instrumentar('grafico')
 def criar_grafico_linha_temporal(df_temporal, coluna_tempo, coluna_valor, 
                                 titulo, output_path, media_linha=True,
                                 mostrar_limites=True, figsize=(16, 6)):
     """Cria gráfico de linha temporal"""
+    plt = pyplot()
     plt.figure(figsize=figsize)
     
     media = df_temporal[coluna_valor].mean() if media_linha else None
@@ -118,11 +134,14 @@ def criar_grafico_linha_temporal(df_temporal, coluna_tempo, coluna_valor,
     
     salvar_grafico(output_path)
 
+@renderizavel
+@instrumentar('grafico')
 def criar_grafico_barras_horizontal_agrupadas(categorias, valores1, valores2,
                                               label1, label2, titulo, output_path,
                                               color1='lightcoral', color2='steelblue',
                                               figsize=(14, 10)):
     """Cria gráfico de barras horizontal agrupadas"""
+    plt = pyplot()
     plt.figure(figsize=figsize)
     y_pos = range(len(categorias))
     width = 0.35